@@ -9,7 +9,77 @@ procesa la información de contactos y pagos, y permite enviar mensajes personal
 a través de WhatsApp Web.
 
 Uso:
-    python "Mensaje Automatico.py"
+    python "Mensaje Automatico.py" [--no-cache] [--changed-only] [--send]
+                                   [--transport {gui,http,nulo}] [--session]
+                                   [--shards N]
+    python "Mensaje Automatico.py" --resume [--transport {gui,http,nulo}] [--session]
+    python "Mensaje Automatico.py" --watch [--every DURACION] [--changed-only] [--send]
+    python "Mensaje Automatico.py" --plan RUTA [--priority] [--budget DURACION]
+    python "Mensaje Automatico.py" --from-plan RUTA [--send] [--resume]
+                                   [--transport {gui,http,nulo}]
+
+Opciones:
+    --no-cache        Ignora la caché en disco y vuelve a procesar el Excel completo
+    --parse-workers N Procesa las filas del Excel en N procesos en paralelo
+                      (0: uno por núcleo; default: 1). Sin efecto con --watch
+    --changed-only    Procesa solo los contactos cuyo estado de pago cambió
+                      desde la última ejecución con envío
+    --send            Envía los mensajes (por defecto solo muestra la vista previa)
+    --resume          Retoma la última campaña interrumpida desde la bitácora de
+                      envíos, sin volver a leer el Excel
+    --plan RUTA       Lee el Excel, genera los mensajes y los guarda en un
+                      archivo de plan en vez de mostrarlos o enviarlos
+    --from-plan RUTA  Muestra (o con --send envía) los mensajes de un plan
+                      generado con --plan, sin leer el Excel ni cargar
+                      openpyxl; su bitácora queda junto al plan
+    --transport       Mecanismo de envío: "gui" (WhatsApp Web con pyautogui, por
+                      defecto), "http" (API configurada con WSP_API_URL y
+                      WSP_API_TOKEN) o "nulo" (no envía nada, para pruebas)
+    --session         Mantiene una sola pestaña de WhatsApp Web abierta y cambia
+                      de chat dentro de ella en vez de abrir una por mensaje
+                      (requiere WSP_SONDA_IMAGEN; sin sonda abre una por mensaje)
+    --shards N        Reparte los envíos entre N emisores en paralelo, cada uno
+                      con su pantalla virtual Xvfb y su perfil de navegador
+    --rate-second N, --rate-minute N, --rate-hour N
+                      Máximo de mensajes por segundo, minuto u hora (N > 0;
+                      sin la opción no hay límite)
+    --jitter SEG      Espera aleatoria adicional máxima entre mensajes
+    --quiet-hours HH:MM-HH:MM
+                      Ventana de hora local sin envíos (puede repetirse)
+    --priority        Envía primero a los contactos más urgentes: vencimiento
+                      (diaAPagar/mesAPagar) más cercano y luego más faltantes
+    --budget DURACION Tiempo disponible para enviar (ej: 45m, 2h); con
+                      --priority envía solo a los más urgentes que alcanzan
+                      (implica --priority)
+    --send-cost SEG   Segundos estimados por envío al planificar con --budget
+                      (default: 12 con gui, 1 con http, 0 con nulo)
+    --pipeline        Lee, genera y envía en paralelo: el primer mensaje sale
+                      apenas se leen las primeras filas en vez de esperar a
+                      leer el Excel completo
+    --watch           Modo residente: queda en ejecución vigilando el Excel,
+                      relee solo las filas cambiadas y repite el ciclo de
+                      recordatorios tras cada cambio (o cada --every)
+    --every DURACION  Con --watch, repite el ciclo con esta periodicidad
+                      (ej: 30m, 12h, 1d) en vez de hacerlo tras cada cambio
+    --watch-interval SEG
+                      Segundos entre consultas del Excel en modo residente
+                      (default: 2)
+    --no-group        Envía un mensaje por fila en vez de un mensaje combinado
+                      por teléfono cuando varias filas lo comparten
+    --templates DIR   Carpeta de plantillas de mensajes y reglas para elegirlas
+                      (por defecto la variable PLANTILLAS_DIR)
+    --output MODO     Salida de la vista previa y los envíos: "completo" (por
+                      defecto), "resumen" (primeros --page contactos y totales),
+                      "ndjson" (un objeto JSON por línea) o "silencioso" (totales)
+    --output-file RUTA
+                      Escribe la salida en un archivo en vez de la consola
+    --page N          Contactos y mensajes mostrados en modo resumen (default: 20)
+    --metrics-json RUTA
+                      Guarda un resumen JSON de tiempos por etapa, contadores y
+                      latencias de envío (carga de página, pegado y Enter)
+    --metrics-prom RUTA
+                      Guarda las mismas métricas en formato Prometheus (textfile)
+    --profile         Ejecuta con cProfile y muestra las funciones más costosas
 
 Configuración:
     Crea un archivo .env con la variable ARCHIVO_EXCEL apuntando a tu archivo Excel.
@@ -23,15 +93,48 @@ Advertencias:
     - Realiza pruebas con tu propio número primero
 """
 
-import json
+import argparse
+import contextlib
+import cProfile
 import logging
-from typing import Dict, Any, List
+import os
+import pstats
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
 
 from dotenv import load_dotenv
 
 from utils.formateo import ensure_utf8_stdout
-from utils.manejo_archivo import getData
-from utils.wsp_message import enviarMensajeWhatsApp
+from utils.agrupacion import agrupar_en_ventana, agrupar_por_telefono, expandir
+from utils.bitacora_envios import (
+    EN_CURSO,
+    BitacoraEnvios,
+    Envio,
+    estado_resultado,
+    ruta_bitacora_por_defecto,
+)
+from utils.env_loader import get_excel_path
+from utils.estado_pagos import EstadoPagos, ruta_estado_por_defecto
+from utils.metricas import REGISTRO
+from utils.plan_campana import PlanCampana, escribir_plan
+from utils.planificador import (
+    LimitadorEnvios,
+    formatear_duracion,
+    parse_duracion,
+    parse_jitter,
+    parse_tasa,
+    parse_ventana,
+)
+from utils.plantillas import RenderizadorMensajes, renderizador_desde_entorno
+from utils.prioridad import DURACION_ENVIO_ESTIMADA, ColaPrioridad
+from utils.registros import Contacto, Destinatario
+from utils.salida import COMPLETO, MODOS, Salida
+from utils.transporte import Transporte, TransporteGUI, crear_transporte
+from utils.vigilancia import DEFAULT_INTERVALO, VigilanteArchivo
+
+# Renderizador con el mensaje estándar, compartido para aprovechar su memoria
+_RENDERIZADOR_ESTANDAR = RenderizadorMensajes()
 
 
 def setup_logging() -> None:
@@ -43,95 +146,713 @@ def setup_logging() -> None:
     )
 
 
-def display_data_preview(data: List[Dict[str, Any]]) -> None:
-    """Muestra una vista previa de los datos leídos en formato JSON."""
-    try:
-        print("=== DATOS LEÍDOS ===")
-        print(json.dumps(data, ensure_ascii=False, indent=2))
-        print("=== FIN DATOS ===\n")
-    except Exception as e:
-        logging.warning("No se pudo mostrar datos como JSON: %s", e)
-        print("Datos leídos:", data)
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Interpreta los argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(
+        description="Automatización de mensajes WhatsApp desde datos de Excel"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="ignora la caché en disco y vuelve a procesar el Excel completo"
+    )
+    parser.add_argument(
+        "--changed-only",
+        action="store_true",
+        help="procesa solo los contactos con cambios desde el último envío"
+    )
+    parser.add_argument(
+        "--send",
+        action="store_true",
+        help="envía los mensajes por WhatsApp (por defecto solo vista previa)"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="retoma la última campaña interrumpida sin volver a leer el Excel"
+    )
+    parser.add_argument(
+        "--plan", metavar="RUTA",
+        help="genera los mensajes y los guarda en un archivo de plan, sin enviarlos"
+    )
+    parser.add_argument(
+        "--from-plan", metavar="RUTA",
+        help="muestra o, con --send, envía los mensajes de un archivo de plan "
+             "sin leer el Excel"
+    )
+    parser.add_argument(
+        "--transport",
+        choices=("gui", "http", "nulo"),
+        default="gui",
+        help="mecanismo de envío: WhatsApp Web con pyautogui, API HTTP o nulo "
+             "(no envía nada, para pruebas) (default: gui)"
+    )
+    parser.add_argument(
+        "--session",
+        action="store_true",
+        help="reutiliza una sola pestaña de WhatsApp Web para todos los mensajes"
+    )
+    parser.add_argument(
+        "--shards", type=int, default=1, metavar="N",
+        help="reparte los envíos entre N emisores, cada uno con su pantalla "
+             "virtual y perfil de navegador (default: 1)"
+    )
+    parser.add_argument(
+        "--rate-second", type=parse_tasa, metavar="N",
+        help="máximo de mensajes por segundo"
+    )
+    parser.add_argument(
+        "--rate-minute", type=parse_tasa, metavar="N",
+        help="máximo de mensajes por minuto"
+    )
+    parser.add_argument(
+        "--rate-hour", type=parse_tasa, metavar="N",
+        help="máximo de mensajes por hora"
+    )
+    parser.add_argument(
+        "--jitter", type=parse_jitter, default=0.0, metavar="SEG",
+        help="espera aleatoria adicional máxima entre mensajes, en segundos"
+    )
+    parser.add_argument(
+        "--quiet-hours", type=parse_ventana, action="append", default=[],
+        metavar="HH:MM-HH:MM",
+        help="ventana de hora local sin envíos (puede repetirse)"
+    )
+    parser.add_argument(
+        "--parse-workers", type=int, default=1, metavar="N",
+        help="procesa las filas del Excel en N procesos en paralelo "
+             "(0: uno por núcleo; default: 1)"
+    )
+    parser.add_argument(
+        "--priority",
+        action="store_true",
+        help="envía primero a los contactos con vencimiento más cercano y más faltantes"
+    )
+    parser.add_argument(
+        "--budget", type=parse_duracion, metavar="DURACION",
+        help="tiempo disponible para enviar (ej: 45m, 2h): envía solo a los más "
+             "urgentes que alcanzan (implica --priority)"
+    )
+    parser.add_argument(
+        "--send-cost", type=float, metavar="SEG",
+        help="segundos estimados por envío al planificar con --budget "
+             "(default: según el transporte)"
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="lee, genera y envía en paralelo en vez de leer primero el Excel completo"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="modo residente: vigila el Excel y repite el ciclo tras cada cambio"
+    )
+    parser.add_argument(
+        "--every", type=parse_duracion, metavar="DURACION",
+        help="con --watch, repite el ciclo con esta periodicidad (ej: 30m, 12h, 1d)"
+    )
+    parser.add_argument(
+        "--watch-interval", type=float, default=DEFAULT_INTERVALO, metavar="SEG",
+        help=f"segundos entre consultas del Excel con --watch (default: {DEFAULT_INTERVALO:g})"
+    )
+    parser.add_argument(
+        "--no-group",
+        action="store_true",
+        help="envía un mensaje por fila aunque varias compartan teléfono"
+    )
+    parser.add_argument(
+        "--templates", metavar="DIR",
+        help="carpeta de plantillas de mensajes (default: variable PLANTILLAS_DIR)"
+    )
+    parser.add_argument(
+        "--output", choices=MODOS, default=COMPLETO, metavar="MODO",
+        help="salida de la vista previa y los envíos: completo, resumen (primeros "
+             "--page), ndjson (un JSON por línea) o silencioso (default: completo)"
+    )
+    parser.add_argument(
+        "--output-file", metavar="RUTA",
+        help="escribe la salida en este archivo en vez de la consola"
+    )
+    parser.add_argument(
+        "--page", type=int, default=20, metavar="N",
+        help="contactos y mensajes mostrados en modo resumen (default: 20)"
+    )
+    parser.add_argument(
+        "--metrics-json", metavar="RUTA",
+        help="guarda al terminar un resumen JSON de tiempos por etapa y latencias"
+    )
+    parser.add_argument(
+        "--metrics-prom", metavar="RUTA",
+        help="guarda al terminar las métricas en formato de texto de Prometheus"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="ejecuta con cProfile y muestra las funciones con más tiempo"
+    )
+    return parser.parse_args(argv)
+
+
+def display_data_preview(
+    data: List[Contacto],
+    salida: Optional[Salida] = None
+) -> None:
+    """Muestra una vista previa de los datos leídos según el modo de salida."""
+    if salida is None:
+        with Salida() as salida:
+            salida.datos(data)
+    else:
+        salida.datos(data)
 
 
-def generate_payment_message(item: Dict[str, Any]) -> str:
+def generate_payment_message(
+    item: Destinatario,
+    renderizador: Optional[RenderizadorMensajes] = None
+) -> str:
     """
     Genera un mensaje personalizado basado en los datos de pago del contacto.
     
     Args:
-        item: Diccionario con datos del contacto incluyendo nombre, teléfono y dataPagos
+        item: Contacto con nombre, teléfono y estado de pago (o Grupo de contactos)
+        renderizador: Plantillas a usar (por defecto el mensaje estándar)
         
     Returns:
         Mensaje personalizado formateado para WhatsApp
     """
-    nombre = item.get('nombre', 'Usuario')
-    data_pagos = item.get('dataPagos', {})
+    return (renderizador or _RENDERIZADOR_ESTANDAR).renderizar(item)
+
+
+def _dispatch(
+    envios: Sequence[Envio],
+    transporte: Transporte,
+    bitacora: Optional[BitacoraEnvios] = None,
+    campana: Optional[int] = None,
+    total: Optional[int] = None,
+    limitador: Optional[LimitadorEnvios] = None,
+    salida: Optional[Salida] = None
+) -> List[Optional[bool]]:
+    """
+    Envía los mensajes por el transporte registrando cada intento en la bitácora.
     
-    cantidad_pagado = data_pagos.get('cantidadPagado', 0)
-    faltantes = data_pagos.get('faltantes', 0)
-    dia_a_pagar = data_pagos.get('diaAPagar', 'N/A')
-    mes_a_pagar = data_pagos.get('mesAPagar', 'N/A')
+    Args:
+        envios: Mensajes a enviar
+        transporte: Transporte por el que se despachan los mensajes
+        bitacora: Bitácora de envíos (opcional)
+        campana: Campaña de la bitácora a la que pertenecen los envíos
+        total: Total de contactos, solo para mostrar el avance
+        limitador: Planificador que marca el ritmo de los envíos (opcional)
+        salida: Donde mostrar cada envío (por defecto la consola, modo completo)
+        
+    Returns:
+        Resultado de cada envío, en el mismo orden (None si no se sabe si
+        el mensaje llegó)
+    """
+    logger = logging.getLogger(__name__)
+    inicio = time.monotonic()
+    completados = 0
+    inicios: Dict[int, float] = {}
+    salida = salida or Salida()
     
-    mensaje = (
-        f"Hola {nombre},\n\n"
-        f"Según nuestros registros, has realizado {cantidad_pagado} pagos. "
-        f"Te quedan {faltantes} pagos pendientes. "
-        f"El próximo pago vence el día {dia_a_pagar} del mes {mes_a_pagar}.\n\n"
-        f"Por favor, asegúrate de completar tus pagos a tiempo para evitar inconvenientes.\n\n"
-        f"¡Gracias por tu atención!"
-    )
+    if limitador is not None:
+        logger.info("ETA para %d envíos: %s", len(envios),
+                    formatear_duracion(limitador.eta(len(envios))))
+    
+    def antes(envio: Envio) -> None:
+        inicios[envio.posicion] = time.monotonic()
+        salida.envio(envio, total, en_vivo=True)
+        logger.info("Enviando mensaje a %s (%s)", envio.nombre, envio.telefono)
+        if bitacora is not None:
+            bitacora.marcar(campana, envio.posicion, EN_CURSO)
+    
+    def despues(envio: Envio, enviado: Optional[bool], error: Optional[str]) -> None:
+        nonlocal completados
+        completados += 1
+        restantes = len(envios) - completados
+        
+        latencia = time.monotonic() - inicios.pop(envio.posicion, inicio)
+        REGISTRO.observar("envio_segundos", latencia, transporte=transporte.nombre)
+        REGISTRO.incrementar(
+            "envios_total", transporte=transporte.nombre,
+            resultado="ok" if enviado else "error" if enviado is False else "desconocido"
+        )
+        
+        # ETA: el mayor entre el ritmo observado y el permitido por el planificador
+        promedio = (time.monotonic() - inicio) / completados
+        eta = restantes * promedio
+        if limitador is not None:
+            eta = max(eta, limitador.eta(restantes))
+        logger.info("Avance: %d/%d envíos, ETA %s", completados, len(envios),
+                    formatear_duracion(eta))
+        
+        if enviado is None:
+            logger.warning("No se sabe si llegó el mensaje a %s (%s); no se "
+                           "reintentará: revisarlo a mano", envio.nombre, error)
+        elif not enviado:
+            logger.error("Error enviando mensaje a %s: %s", envio.nombre, error)
+        if bitacora is not None:
+            bitacora.marcar(campana, envio.posicion, estado_resultado(enviado), error)
     
-    return mensaje
+    with REGISTRO.etapa("envio"):
+        return transporte.enviar_lote(envios, antes, despues, limitador=limitador)
 
 
-def process_contacts(data: List[Dict[str, Any]], send_messages: bool = False) -> None:
+def build_envios(
+    data: List[Destinatario],
+    renderizador: Optional[RenderizadorMensajes] = None
+) -> Tuple[List[Destinatario], List[Envio]]:
     """
-    Procesa la lista de contactos y opcionalmente envía mensajes.
+    Genera los mensajes de los contactos con teléfono, en un solo lote.
     
     Args:
-        data: Lista de diccionarios con información de contactos
-        send_messages: Si True, envía mensajes reales por WhatsApp
+        data: Lista de contactos o grupos de contactos
+        renderizador: Plantillas de mensajes (por defecto el mensaje estándar)
+        
+    Returns:
+        Tupla (contactos con teléfono, envío de cada uno); la posición de
+        cada envío es la del contacto en data, contando desde 1
     """
     logger = logging.getLogger(__name__)
     
+    posiciones: List[int] = []
+    contactos: List[Destinatario] = []
     for i, item in enumerate(data, 1):
-        nombre = item.get('nombre')
-        telefono = item.get('telefono')
-        
-        if not telefono:
+        if not item.telefono:
             logger.warning("Contacto %d sin teléfono válido, omitiendo", i)
             continue
-            
-        mensaje = generate_payment_message(item)
-        
-        print(f"\n=== CONTACTO {i}/{len(data)} ===")
-        print(f"Destinatario: {nombre} ({telefono})")
-        print(f"Mensaje:\n{mensaje}")
-        print("=" * 50)
+        posiciones.append(i)
+        contactos.append(item)
+    
+    # Renderizar todos los mensajes en un solo lote
+    with REGISTRO.etapa("renderizado"):
+        mensajes = (renderizador or _RENDERIZADOR_ESTANDAR).renderizar_lote(contactos)
+    envios = [
+        Envio(i, item.nombre, item.telefono, mensaje)
+        for i, item, mensaje in zip(posiciones, contactos, mensajes)
+    ]
+    return contactos, envios
+
+
+def process_contacts(
+    data: List[Destinatario],
+    send_messages: bool = False,
+    bitacora: Optional[BitacoraEnvios] = None,
+    transporte: Optional[Transporte] = None,
+    limitador: Optional[LimitadorEnvios] = None,
+    renderizador: Optional[RenderizadorMensajes] = None,
+    salida: Optional[Salida] = None
+) -> List[Destinatario]:
+    """
+    Procesa la lista de contactos y opcionalmente envía mensajes.
+    
+    Los mensajes se generan todos antes de empezar a enviar, para que la
+    campaña completa quede registrada en la bitácora y pueda retomarse
+    con --resume si la ejecución se interrumpe.
+    
+    Args:
+        data: Lista de contactos (o grupos
+            de contactos que comparten teléfono, ver agrupacion.py)
+        send_messages: Si True, envía mensajes reales por WhatsApp
+        bitacora: Bitácora donde registrar los envíos (solo con send_messages)
+        transporte: Transporte de envío (por defecto TransporteGUI)
+        limitador: Planificador que marca el ritmo de los envíos (opcional)
+        renderizador: Plantillas de mensajes (por defecto el mensaje estándar)
+        salida: Donde mostrar los mensajes (por defecto la consola, modo completo)
         
-        if send_messages:
-            try:
-                logger.info("Enviando mensaje a %s (%s)", nombre, telefono)
-                #enviarMensajeWhatsApp(telefono, mensaje)
-            except Exception as e:
-                logger.error("Error enviando mensaje a %s: %s", nombre, e)
+    Returns:
+        Lista de contactos cuyo mensaje no se pudo enviar
+    """
+    logger = logging.getLogger(__name__)
+    
+    contactos, envios = build_envios(data, renderizador)
+    
+    if not send_messages:
+        if salida is None:
+            with Salida() as salida_consola:
+                for envio in envios:
+                    salida_consola.envio(envio, len(data))
         else:
-            logger.info("Modo preview - no se envió mensaje a %s", nombre)
+            for envio in envios:
+                salida.envio(envio, len(data))
+        logger.info("Modo preview - %d mensajes generados, ninguno enviado", len(envios))
+        return []
+    
+    campana = None
+    if bitacora is not None:
+        campana = bitacora.planificar(envios)
+    
+    if transporte is None:
+        with TransporteGUI() as transporte_gui:
+            resultados = _dispatch(
+                envios, transporte_gui, bitacora, campana, len(data), limitador, salida
+            )
+    else:
+        resultados = _dispatch(
+            envios, transporte, bitacora, campana, len(data), limitador, salida
+        )
+    
+    if campana is not None:
+        bitacora.terminar(campana)
+    
+    # Los desconocidos no se reintentan: el mensaje pudo haber llegado
+    return [item for item, enviado in zip(contactos, resultados) if enviado is False]
+
+
+def resume_campaign(
+    bitacora: BitacoraEnvios,
+    transporte: Transporte,
+    limitador: Optional[LimitadorEnvios] = None,
+    salida: Optional[Salida] = None
+) -> int:
+    """
+    Retoma la última campaña interrumpida de la bitácora.
+    
+    Los envíos ya confirmados se omiten, los que pudieron haber llegado
+    (desconocidos o en curso al interrumpirse) se informan en el log para
+    revisarlos a mano, y el resto se envía en orden con los mensajes
+    guardados, sin volver a leer el Excel.
+    
+    Args:
+        bitacora: Bitácora de envíos
+        transporte: Transporte por el que se despachan los mensajes
+        limitador: Planificador que marca el ritmo de los envíos (opcional)
+        salida: Donde mostrar cada envío (por defecto la consola, modo completo)
+        
+    Returns:
+        Cantidad de envíos que volvieron a fallar
+    """
+    logger = logging.getLogger(__name__)
+    
+    campana = bitacora.campana_pendiente()
+    if campana is None:
+        logger.info("No hay campañas pendientes en %s", bitacora.ruta)
+        return 0
+    
+    envios = bitacora.pendientes(campana)
+    logger.info("Retomando campaña %d: %d envíos pendientes", campana, len(envios))
+    
+    resultados = _dispatch(envios, transporte, bitacora, campana,
+                           limitador=limitador, salida=salida)
+    
+    bitacora.terminar(campana)
+    return resultados.count(False)
+
+
+def send_plan(
+    plan: PlanCampana,
+    send_messages: bool = False,
+    bitacora: Optional[BitacoraEnvios] = None,
+    transporte: Optional[Transporte] = None,
+    limitador: Optional[LimitadorEnvios] = None,
+    salida: Optional[Salida] = None
+) -> int:
+    """
+    Muestra o envía los mensajes de un plan generado con --plan.
+    
+    Los mensajes ya vienen generados: no se lee el Excel ni se usan las
+    plantillas, y cada mensaje se lee del plan recién al mostrarlo o enviarlo.
+    
+    Args:
+        plan: Plan de campaña abierto
+        send_messages: Si True, envía los mensajes
+        bitacora: Bitácora donde registrar los envíos (solo con send_messages)
+        transporte: Transporte de envío (por defecto TransporteGUI)
+        limitador: Planificador que marca el ritmo de los envíos (opcional)
+        salida: Donde mostrar los mensajes (por defecto la consola, modo completo)
+        
+    Returns:
+        Cantidad de envíos que fallaron
+    """
+    logger = logging.getLogger(__name__)
+    logger.info("Plan %s: %d envíos, generado %s", plan.ruta, len(plan),
+                plan.metadatos.get("creado", "en fecha desconocida"))
+    total = plan.metadatos.get("contactos", len(plan))
+    salida = salida or Salida()
+    
+    if not send_messages:
+        for envio in plan:
+            salida.envio(envio, total)
+        logger.info("Modo preview - %d mensajes en el plan, ninguno enviado", len(plan))
+        return 0
+    
+    campana = None
+    if bitacora is not None:
+        campana = bitacora.planificar(plan)
+    
+    if transporte is None:
+        with TransporteGUI() as transporte_gui:
+            resultados = _dispatch(plan, transporte_gui, bitacora, campana, total,
+                                   limitador, salida)
+    else:
+        resultados = _dispatch(plan, transporte, bitacora, campana, total,
+                               limitador, salida)
+    
+    if campana is not None:
+        bitacora.terminar(campana)
+    return resultados.count(False)
+
+
+def write_plan(
+    ruta_plan: str,
+    data: List[Destinatario],
+    renderizador: Optional[RenderizadorMensajes] = None,
+    total: Optional[int] = None
+) -> None:
+    """
+    Genera los mensajes y los guarda en un archivo de plan (--plan).
+    
+    Los errores al escribir se registran en el logger.
+    
+    Args:
+        ruta_plan: Ruta del archivo de plan
+        data: Contactos o grupos, en el orden de envío
+        renderizador: Plantillas de mensajes (por defecto el mensaje estándar)
+        total: Total de contactos leídos, para mostrar el avance al enviar
+    """
+    logger = logging.getLogger(__name__)
+    _, envios = build_envios(data, renderizador)
+    try:
+        with REGISTRO.etapa("escritura_plan"):
+            escribir_plan(ruta_plan, envios,
+                          {"contactos": total if total is not None else len(data)})
+    except (OSError, ValueError) as e:
+        logger.error("No se pudo guardar el plan: %s", e)
+
+
+def build_transport(
+    args: argparse.Namespace,
+    recursos: contextlib.ExitStack
+) -> Transporte:
+    """
+    Construye el transporte de envío según los argumentos de línea de comandos.
+    
+    Args:
+        args: Argumentos interpretados por parse_args
+        recursos: Pila donde registrar el cierre del transporte
+        
+    Returns:
+        Transporte listo para usar
+        
+    Raises:
+        ValueError: Si falta la configuración del transporte elegido
+        OSError: Si no se pudo iniciar una pantalla virtual de los emisores
+    """
+    return recursos.enter_context(
+        crear_transporte(args.transport, sesion=args.session, fragmentos=args.shards)
+    )
+
+
+def build_output(
+    args: argparse.Namespace,
+    recursos: contextlib.ExitStack
+) -> Salida:
+    """
+    Construye la salida de la vista previa y los envíos según los argumentos.
+    
+    Args:
+        args: Argumentos interpretados por parse_args
+        recursos: Pila donde registrar el cierre del archivo y de la salida
+        
+    Returns:
+        Salida lista para usar; al cerrarse escribe los totales
+        
+    Raises:
+        OSError: Si no se puede abrir el archivo de salida
+    """
+    destino = open_output_file(args, recursos)
+    return recursos.enter_context(Salida(args.output, destino, pagina=args.page))
+
+
+def open_output_file(
+    args: argparse.Namespace,
+    recursos: contextlib.ExitStack
+) -> Optional[TextIO]:
+    """
+    Abre el archivo de --output-file, si se pidió.
+    
+    Returns:
+        Archivo abierto (cerrado al cerrar recursos), o None para la consola
+        
+    Raises:
+        OSError: Si no se puede abrir el archivo de salida
+    """
+    if not args.output_file:
+        return None
+    return recursos.enter_context(
+        open(args.output_file, "w", encoding="utf-8", newline="\n")
+    )
+
+
+def build_limiter(args: argparse.Namespace) -> Optional[LimitadorEnvios]:
+    """
+    Construye el planificador de ritmo según los argumentos de línea de comandos.
+    
+    Returns:
+        Planificador configurado, o None si no se pidió ningún límite
+    """
+    if not any((args.rate_second, args.rate_minute, args.rate_hour,
+                args.jitter, args.quiet_hours)):
+        return None
+    return LimitadorEnvios(
+        por_segundo=args.rate_second,
+        por_minuto=args.rate_minute,
+        por_hora=args.rate_hour,
+        jitter=args.jitter,
+        horas_silencio=args.quiet_hours
+    )
+
+
+def parse_workers(args: argparse.Namespace) -> int:
+    """Procesos de lectura del Excel pedidos con --parse-workers (0: uno por núcleo)."""
+    return args.parse_workers or os.cpu_count() or 1
+
+
+def estimate_send_cost(
+    args: argparse.Namespace,
+    transporte: Optional[Transporte] = None
+) -> float:
+    """
+    Estima los segundos que toma cada envío, para planificar con --budget.
+    
+    Usa --send-cost si se indicó; si no, la duración típica del transporte
+    dividida por los envíos que hace en paralelo (--shards o la concurrencia
+    del transporte HTTP).
+    
+    Returns:
+        Segundos estimados por envío
+    """
+    if args.send_cost is not None:
+        return args.send_cost
+    en_paralelo = getattr(transporte, "max_en_vuelo", None) or args.shards
+    return DURACION_ENVIO_ESTIMADA.get(args.transport, 0.0) / max(1, en_paralelo)
 
 
-def main() -> None:
+def export_metrics(args: argparse.Namespace, resumen: bool = True) -> None:
+    """
+    Muestra el resumen de métricas y lo exporta a los archivos pedidos.
+    
+    Los errores al escribir se registran en el logger sin interrumpir el cierre.
+    
+    Args:
+        args: Argumentos interpretados por parse_args
+        resumen: Si False, solo actualiza los archivos (modo residente)
+    """
+    logger = logging.getLogger(__name__)
+    if resumen:
+        REGISTRO.registrar_resumen()
+    try:
+        if args.metrics_json:
+            REGISTRO.exportar_json(args.metrics_json)
+        if args.metrics_prom:
+            REGISTRO.exportar_prometheus(args.metrics_prom)
+    except OSError as e:
+        logger.error("No se pudieron guardar las métricas: %s", e)
+
+
+def print_profile(perfil: cProfile.Profile, limite: int = 25) -> None:
+    """Muestra por stderr las funciones con más tiempo propio y acumulado."""
+    estadisticas = pstats.Stats(perfil, stream=sys.stderr)
+    estadisticas.strip_dirs()
+    print("\n=== PERFIL: tiempo propio ===", file=sys.stderr)
+    estadisticas.sort_stats(pstats.SortKey.TIME).print_stats(limite)
+    print("=== PERFIL: tiempo acumulado ===", file=sys.stderr)
+    estadisticas.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limite)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
     """Función principal del script."""
+    args = parse_args(argv)
+    
     # Configuración inicial
     load_dotenv()
     ensure_utf8_stdout()
     setup_logging()
     
+    perfil = cProfile.Profile() if args.profile else None
+    try:
+        if perfil is not None:
+            perfil.enable()
+        with REGISTRO.etapa("total"):
+            run(args)
+    finally:
+        if perfil is not None:
+            perfil.disable()
+            print_profile(perfil)
+        export_metrics(args)
+
+
+def run(args: argparse.Namespace) -> None:
+    """Ejecuta el flujo completo según los argumentos de línea de comandos."""
     logger = logging.getLogger(__name__)
     logger.info("Iniciando Mensaje Automático WhatsApp")
     
+    ruta = get_excel_path()
+    
+    if args.every is not None and not args.watch:
+        logger.error("--every solo puede usarse junto con --watch")
+        return
+    if args.watch and (args.resume or args.pipeline):
+        logger.error("--watch no puede combinarse con --resume ni --pipeline")
+        return
+    if (args.priority or args.budget is not None) and (args.resume or args.pipeline):
+        logger.error("--priority y --budget no pueden combinarse con --resume ni --pipeline")
+        return
+    if args.parse_workers < 0:
+        logger.error("--parse-workers no puede ser negativo")
+        return
+    if args.send_cost is not None and args.send_cost < 0:
+        logger.error("--send-cost no puede ser negativo")
+        return
+    if args.plan and (args.from_plan or args.send or args.resume
+                      or args.pipeline or args.watch):
+        logger.error("--plan no puede combinarse con --from-plan, --send, --resume, "
+                     "--pipeline ni --watch")
+        return
+    if args.from_plan and (args.pipeline or args.watch or args.changed_only
+                           or args.priority or args.budget is not None):
+        logger.error("--from-plan no puede combinarse con --pipeline, --watch, "
+                     "--changed-only, --priority ni --budget")
+        return
+    
+    # Retomar una campaña interrumpida sin volver a leer el Excel
+    if args.resume:
+        with contextlib.ExitStack() as recursos:
+            bitacora = recursos.enter_context(
+                BitacoraEnvios(ruta_bitacora_por_defecto(args.from_plan or ruta))
+            )
+            try:
+                transporte = build_transport(args, recursos)
+                salida = build_output(args, recursos)
+            except (ValueError, OSError) as e:
+                logger.error("No se pudo preparar el envío: %s", e)
+                return
+            resume_campaign(bitacora, transporte, limitador=build_limiter(args),
+                            salida=salida)
+        logger.info("Procesamiento completado")
+        return
+    
+    if args.from_plan:
+        run_from_plan(args)
+        logger.info("Procesamiento completado")
+        return
+    
+    if args.pipeline:
+        run_pipeline(args, ruta)
+        logger.info("Procesamiento completado")
+        return
+    
+    if args.watch:
+        run_watch(args, ruta)
+        return
+    
+    # Importado aquí: --from-plan y --resume no cargan la lectura del Excel
+    from utils.cache_datos import getDataConCache
+    
     # Cargar datos
     try:
-        data = getData()
+        with REGISTRO.etapa("carga_datos"):
+            data = getDataConCache(ruta, usar_cache=not args.no_cache,
+                                   procesos=parse_workers(args))
     except Exception as e:
         logger.error("Error cargando datos: %s", e)
         return
@@ -142,14 +863,342 @@ def main() -> None:
         
     logger.info("Se cargaron %d contactos", len(data))
     
+    try:
+        renderizador = renderizador_desde_entorno(args.templates)
+    except ValueError as e:
+        logger.error("Error cargando plantillas: %s", e)
+        return
+    
+    with contextlib.ExitStack() as recursos:
+        try:
+            salida = build_output(args, recursos)
+        except OSError as e:
+            logger.error("No se pudo abrir el archivo de salida: %s", e)
+            return
+        
+        estado = None
+        if args.changed_only:
+            estado = recursos.enter_context(
+                EstadoPagos(ruta_estado_por_defecto(ruta))
+            )
+        
+        bitacora = None
+        transporte = None
+        if args.send:
+            bitacora = recursos.enter_context(
+                BitacoraEnvios(ruta_bitacora_por_defecto(ruta))
+            )
+            try:
+                transporte = build_transport(args, recursos)
+            except (ValueError, OSError) as e:
+                logger.error("No se pudo crear el transporte: %s", e)
+                return
+        
+        run_cycle(args, data, renderizador, salida, estado, bitacora, transporte,
+                  build_limiter(args))
+    
+    logger.info("Procesamiento completado")
+
+
+def run_from_plan(args: argparse.Namespace) -> None:
+    """
+    Muestra o envía un plan generado con --plan (--from-plan).
+    
+    La bitácora del plan queda junto al archivo (ej: campana.envios.sqlite
+    para campana.plan), de modo que un envío interrumpido se retoma con
+    --from-plan RUTA --resume.
+    
+    Args:
+        args: Argumentos interpretados por parse_args
+    """
+    logger = logging.getLogger(__name__)
+    
+    with contextlib.ExitStack() as recursos:
+        try:
+            plan = recursos.enter_context(PlanCampana(args.from_plan))
+        except (OSError, ValueError) as e:
+            logger.error("No se pudo abrir el plan: %s", e)
+            return
+        
+        try:
+            salida = build_output(args, recursos)
+        except OSError as e:
+            logger.error("No se pudo abrir el archivo de salida: %s", e)
+            return
+        
+        bitacora = None
+        transporte = None
+        if args.send:
+            bitacora = recursos.enter_context(
+                BitacoraEnvios(ruta_bitacora_por_defecto(args.from_plan))
+            )
+            try:
+                transporte = build_transport(args, recursos)
+            except (ValueError, OSError) as e:
+                logger.error("No se pudo crear el transporte: %s", e)
+                return
+        
+        send_plan(plan, args.send, bitacora, transporte, build_limiter(args), salida)
+
+
+def run_cycle(
+    args: argparse.Namespace,
+    data: List[Contacto],
+    renderizador: RenderizadorMensajes,
+    salida: Salida,
+    estado: Optional[EstadoPagos] = None,
+    bitacora: Optional[BitacoraEnvios] = None,
+    transporte: Optional[Transporte] = None,
+    limitador: Optional[LimitadorEnvios] = None
+) -> None:
+    """
+    Ejecuta un ciclo de recordatorios sobre los contactos ya leídos.
+    
+    Args:
+        args: Argumentos interpretados por parse_args
+        data: Contactos leídos
+        renderizador: Plantillas de mensajes
+        salida: Donde mostrar la vista previa y los envíos
+        estado: Estado de pagos, para procesar solo los cambios (--changed-only)
+        bitacora: Bitácora de envíos (solo con --send)
+        transporte: Transporte de envío (solo con --send)
+        limitador: Planificador que marca el ritmo de los envíos (opcional)
+    """
+    logger = logging.getLogger(__name__)
+    
+    # Quedarse solo con los cambios respecto a la última ejecución
+    pendientes = data if estado is None else estado.cambios(data)
+    
     # Mostrar vista previa
-    display_data_preview(data)
+    display_data_preview(pendientes, salida)
+    
+    # Un solo mensaje combinado por teléfono compartido
+    destinatarios = pendientes if args.no_group else agrupar_por_telefono(pendientes)
+    
+    # Más urgentes primero y, con presupuesto, solo los que alcanzan
+    omitidos: List[Destinatario] = []
+    if args.priority or args.budget is not None:
+        with REGISTRO.etapa("priorizacion"):
+            cola = ColaPrioridad(destinatarios)
+            destinatarios, omitidos = cola.planificar(
+                args.budget, estimate_send_cost(args, transporte), limitador
+            )
+        for item in omitidos:
+            logger.debug("Sin tiempo para %s: queda para la próxima ejecución", item.nombre)
+        REGISTRO.incrementar("omitidos_presupuesto_total", len(omitidos))
+    
+    # Guardar los mensajes en un plan para enviarlos después con --from-plan
+    if args.plan:
+        write_plan(args.plan, destinatarios, renderizador, len(pendientes))
+        if estado is not None:
+            logger.info("Modo plan - el estado de pagos no se actualizó")
+        return
     
     # Procesar contactos (por defecto solo preview, no envía mensajes)
-    # Para enviar mensajes reales, cambiar send_messages=True
-    process_contacts(data, send_messages=False)
+    # Para enviar mensajes reales, usar --send
+    fallidos = process_contacts(
+        destinatarios,
+        send_messages=args.send,
+        bitacora=bitacora,
+        transporte=transporte,
+        limitador=limitador,
+        renderizador=renderizador,
+        salida=salida
+    )
     
-    logger.info("Procesamiento completado")
+    if estado is not None:
+        if args.send:
+            # Los omitidos por presupuesto siguen pendientes para la próxima vez
+            estado.guardar(data, pendientes=expandir(fallidos + omitidos))
+        else:
+            logger.info("Modo preview - el estado de pagos no se actualizó")
+
+
+def run_watch(args: argparse.Namespace, ruta: str) -> None:
+    """
+    Modo residente (--watch): lee el Excel una vez y lo mantiene actualizado.
+    
+    El proceso, las importaciones, las plantillas y el transporte (por
+    ejemplo la pestaña de WhatsApp Web con --session) se preparan una sola
+    vez. El Excel se consulta cada --watch-interval segundos y, cuando
+    cambia, solo se vuelven a procesar las filas modificadas (ver
+    LecturaIncremental). El ciclo de recordatorios se ejecuta al iniciar y
+    luego tras cada cambio, o cada --every si se indicó. Se detiene con Ctrl+C.
+    
+    Args:
+        args: Argumentos interpretados por parse_args
+        ruta: Ruta al archivo Excel
+    """
+    from utils.manejo_archivo import LecturaIncremental
+    
+    logger = logging.getLogger(__name__)
+    
+    try:
+        renderizador = renderizador_desde_entorno(args.templates)
+        vigilante = VigilanteArchivo(ruta, args.watch_interval)
+    except ValueError as e:
+        logger.error("No se pudo iniciar el modo residente: %s", e)
+        return
+    lectura = LecturaIncremental(ruta)
+    
+    with contextlib.ExitStack() as recursos:
+        try:
+            destino = open_output_file(args, recursos)
+        except OSError as e:
+            logger.error("No se pudo abrir el archivo de salida: %s", e)
+            return
+        
+        estado = None
+        if args.changed_only:
+            estado = recursos.enter_context(
+                EstadoPagos(ruta_estado_por_defecto(ruta))
+            )
+        
+        bitacora = None
+        transporte = None
+        if args.send:
+            bitacora = recursos.enter_context(
+                BitacoraEnvios(ruta_bitacora_por_defecto(ruta))
+            )
+            try:
+                transporte = build_transport(args, recursos)
+            except (ValueError, OSError) as e:
+                logger.error("No se pudo crear el transporte: %s", e)
+                return
+        
+        # El planificador se conserva entre ciclos para respetar los límites
+        limitador = build_limiter(args)
+        
+        with REGISTRO.etapa("carga_datos"):
+            lectura.actualizar()
+        logger.info("Modo residente: vigilando %s cada %gs, ciclo %s (Ctrl+C para salir)",
+                    ruta, args.watch_interval,
+                    f"cada {formatear_duracion(args.every)}" if args.every
+                    else "tras cada cambio")
+        
+        proximo = time.monotonic()
+        try:
+            while True:
+                restante = proximo - time.monotonic()
+                if restante > 0:
+                    if vigilante.esperar_cambio(restante):
+                        resumen = lectura.actualizar()
+                        if resumen is not None and args.every is None:
+                            proximo = time.monotonic()
+                    continue
+                
+                if lectura.contactos:
+                    # Una salida por ciclo, para que cada uno informe sus totales
+                    with REGISTRO.etapa("ciclo"), \
+                            Salida(args.output, destino, pagina=args.page) as salida:
+                        run_cycle(args, lectura.contactos, renderizador, salida,
+                                  estado, bitacora, transporte, limitador)
+                else:
+                    logger.warning("No se encontraron datos para procesar")
+                REGISTRO.incrementar("ciclos_total")
+                export_metrics(args, resumen=False)
+                
+                if args.every is None:
+                    proximo = float("inf")
+                    continue
+                # Ciclos a intervalos fijos, sin acumular los que se atrasaron
+                ahora = time.monotonic()
+                while proximo <= ahora:
+                    proximo += args.every
+                logger.info("Próximo ciclo en %s", formatear_duracion(proximo - ahora))
+        except KeyboardInterrupt:
+            logger.info("Modo residente detenido")
+
+
+def run_pipeline(args: argparse.Namespace, ruta: str) -> None:
+    """
+    Ejecuta el flujo con lectura, renderizado y envío superpuestos (--pipeline).
+    
+    Los contactos que comparten teléfono se agrupan dentro de una ventana de
+    DEFAULT_VENTANA_GRUPO contactos, y la vista previa de los datos solo se
+    muestra en modo ndjson, contacto por contacto.
+    
+    Args:
+        args: Argumentos interpretados por parse_args
+        ruta: Ruta al archivo Excel
+    """
+    from utils.cache_datos import iterDataConCache
+    from utils.pipeline import DEFAULT_BLOQUE_LECTURA, DEFAULT_VENTANA_GRUPO, PipelineEnvio
+    
+    logger = logging.getLogger(__name__)
+    
+    try:
+        renderizador = renderizador_desde_entorno(args.templates)
+    except ValueError as e:
+        logger.error("Error cargando plantillas: %s", e)
+        return
+    
+    with contextlib.ExitStack() as recursos:
+        try:
+            salida = build_output(args, recursos)
+        except OSError as e:
+            logger.error("No se pudo abrir el archivo de salida: %s", e)
+            return
+        
+        fuente = iterDataConCache(ruta, usar_cache=not args.no_cache,
+                                  tamano_bloque=DEFAULT_BLOQUE_LECTURA,
+                                  procesos=parse_workers(args))
+        
+        # Conservar todos los contactos leídos para guardar el estado al final
+        estado = None
+        leidos: List[Contacto] = []
+        if args.changed_only:
+            estado = recursos.enter_context(
+                EstadoPagos(ruta_estado_por_defecto(ruta))
+            )
+            fuente = estado.iter_cambios(_registrar(fuente, leidos))
+        
+        if not args.no_group:
+            fuente = agrupar_en_ventana(fuente, DEFAULT_VENTANA_GRUPO)
+        
+        bitacora = None
+        transporte = None
+        if args.send:
+            bitacora = recursos.enter_context(
+                BitacoraEnvios(ruta_bitacora_por_defecto(ruta))
+            )
+            try:
+                transporte = build_transport(args, recursos)
+            except (ValueError, OSError) as e:
+                logger.error("No se pudo crear el transporte: %s", e)
+                return
+        
+        resultado = PipelineEnvio(
+            send_messages=args.send,
+            transporte=transporte,
+            bitacora=bitacora,
+            limitador=build_limiter(args),
+            renderizador=renderizador,
+            salida=salida
+        ).ejecutar(fuente)
+        
+        # Sin contactos leídos (o con error al leer) no se toca el estado
+        if not (leidos if estado is not None else resultado.contactos):
+            logger.warning("No se encontraron datos para procesar")
+            return
+        
+        if estado is not None:
+            if not resultado.completo:
+                logger.warning("Lectura incompleta - el estado de pagos no se actualizó")
+            elif args.send:
+                estado.guardar(leidos, pendientes=expandir(resultado.fallidos))
+            else:
+                logger.info("Modo preview - el estado de pagos no se actualizó")
+
+
+def _registrar(
+    data: Iterable[Contacto],
+    destino: List[Contacto]
+) -> Iterator[Contacto]:
+    """Entrega los contactos sin cambios, guardando cada uno en destino."""
+    for contacto in data:
+        destino.append(contacto)
+        yield contacto
 
 
 if __name__ == "__main__":
@@ -0,0 +1,133 @@
+"""
+Benchmark del arranque en frío del modo vista previa.
+
+Importa "Mensaje Automatico.py" (sin ejecutar main) en un proceso nuevo con
+`python -X importtime`, mide el tiempo total de importación y verifica que
+no se haya cargado ningún módulo de interfaz gráfica (pyautogui, pyperclip
+ni sus backends). En modo vista previa esos módulos no deben importarse.
+
+Uso:
+    python benchmarks/bench_arranque.py [--repeticiones N] [--max-ms MS] [--json RUTA]
+
+Termina con código 1 si se importó un módulo de interfaz o si la mediana
+supera --max-ms.
+"""
+
+import argparse
+import json
+import logging
+import pathlib
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+RAIZ = pathlib.Path(__file__).resolve().parent.parent
+SCRIPT = RAIZ / "Mensaje Automatico.py"
+
+# Módulos que no deben cargarse en el arranque de la vista previa
+MODULOS_GUI = (
+    "pyautogui",
+    "pyperclip",
+    "pyscreeze",
+    "pymsgbox",
+    "pytweening",
+    "mouseinfo",
+    "Xlib",
+    "tkinter",
+)
+
+# Código ejecutado en el proceso hijo: importa el script como módulo
+_CODIGO = """
+import importlib.util, json, sys
+sys.path.insert(0, {raiz!r})
+spec = importlib.util.spec_from_file_location("mensaje_automatico", {script!r})
+modulo = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(modulo)
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+def _medir_importacion() -> Tuple[float, Dict[str, float], List[str]]:
+    """
+    Importa el script principal en un proceso nuevo.
+
+    Returns:
+        Tupla (milisegundos totales, milisegundos acumulados por módulo de
+        primer nivel, módulos cargados)
+    """
+    codigo = _CODIGO.format(raiz=str(RAIZ), script=str(SCRIPT))
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        capture_output=True,
+        text=True,
+        cwd=RAIZ,
+        check=True,
+    )
+
+    # Formato: "import time: <propio us> | <acumulado us> | <módulo>"
+    por_modulo: Dict[str, float] = {}
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:"):
+            continue
+        _, acumulado, nombre = linea[len("import time:"):].split("|")
+        if not acumulado.strip().isdigit() or nombre.startswith("  "):
+            continue
+        por_modulo[nombre.strip()] = int(acumulado) / 1000
+
+    cargados = json.loads(proceso.stdout.strip().splitlines()[-1])
+    return sum(por_modulo.values()), por_modulo, cargados
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeticiones", type=int, default=5,
+                        help="cantidad de arranques medidos (default: 5)")
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="falla si la mediana supera este tiempo en ms")
+    parser.add_argument("--json", default=None,
+                        help="guarda los resultados en este archivo JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    tiempos = []
+    por_modulo: Dict[str, float] = {}
+    cargados: List[str] = []
+    for _ in range(max(1, args.repeticiones)):
+        total, por_modulo, cargados = _medir_importacion()
+        tiempos.append(total)
+
+    mediana = statistics.median(tiempos)
+    gui = [m for m in cargados if m.split(".")[0] in MODULOS_GUI]
+
+    logger.info("Importación del script: mediana %.1f ms (min %.1f, max %.1f, n=%d)",
+                mediana, min(tiempos), max(tiempos), len(tiempos))
+    logger.info("Módulos de primer nivel más lentos:")
+    for nombre, ms in sorted(por_modulo.items(), key=lambda x: -x[1])[:10]:
+        logger.info("  %8.1f ms  %s", ms, nombre)
+
+    if args.json:
+        resultado = {
+            "mediana_ms": mediana,
+            "tiempos_ms": tiempos,
+            "por_modulo_ms": por_modulo,
+            "modulos_gui": gui,
+        }
+        pathlib.Path(args.json).write_text(json.dumps(resultado, indent=2))
+
+    fallo = False
+    if gui:
+        logger.error("Módulos de interfaz cargados en el arranque: %s", ", ".join(gui))
+        fallo = True
+    if args.max_ms is not None and mediana > args.max_ms:
+        logger.error("La mediana %.1f ms supera el máximo de %.1f ms",
+                     mediana, args.max_ms)
+        fallo = True
+    return 1 if fallo else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
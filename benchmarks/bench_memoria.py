@@ -0,0 +1,118 @@
+"""
+Benchmark de memoria de los contactos leídos.
+
+Lee un libro sintético (CSV, generado con generar_libro.py) y compara la
+memoria retenida por la lista de contactos en dos formas:
+
+    - registros: registros.Contacto con __slots__ y DatosPago compartidos
+      (lo que entrega getData)
+    - diccionarios: la forma histórica, un diccionario por contacto con otro
+      diccionario dataPagos adentro (Contacto.to_dict())
+
+Para cada forma informa los bytes retenidos según tracemalloc, los bytes por
+contacto y la duración de una recolección completa de basura (gc.collect)
+con la lista viva, que crece con la cantidad de objetos.
+
+Uso:
+    python benchmarks/bench_memoria.py [--filas 100000] [--directorio RUTA] [--json RUTA]
+"""
+
+import argparse
+import gc
+import json
+import logging
+import pathlib
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+RAIZ = pathlib.Path(__file__).resolve().parent.parent
+
+sys.path.insert(0, str(RAIZ))
+
+logger = logging.getLogger(__name__)
+
+
+def _medir(construir: Callable[[], List[Any]]) -> Dict[str, Any]:
+    """
+    Construye una lista de contactos y mide la memoria que retiene.
+
+    Args:
+        construir: Función que lee el libro y devuelve los contactos
+
+    Returns:
+        Diccionario con contactos, bytes retenidos, bytes por contacto y
+        milisegundos de gc.collect() con la lista viva
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        antes = tracemalloc.get_traced_memory()[0]
+        contactos = construir()
+        gc.collect()
+        retenido = tracemalloc.get_traced_memory()[0] - antes
+    finally:
+        tracemalloc.stop()
+
+    inicio = time.perf_counter()
+    gc.collect()
+    recoleccion = (time.perf_counter() - inicio) * 1000
+
+    return {
+        "contactos": len(contactos),
+        "bytes": retenido,
+        "bytes_por_contacto": retenido / len(contactos) if contactos else None,
+        "gc_ms": recoleccion,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de memoria de los contactos")
+    parser.add_argument("--filas", type=int, default=100000,
+                        help="cantidad de filas del libro (default: 100000)")
+    parser.add_argument("--directorio", default=None,
+                        help="carpeta donde generar y reutilizar los libros")
+    parser.add_argument("--json", default=None, metavar="RUTA",
+                        help="guarda los resultados en un archivo JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("utils").setLevel(logging.WARNING)
+
+    from benchmarks.generar_libro import generar_libro
+    from utils.manejo_archivo import getData
+
+    carpeta = pathlib.Path(args.directorio or tempfile.gettempdir()) / "bench_mensaje"
+    carpeta.mkdir(parents=True, exist_ok=True)
+    ruta = carpeta / f"Mensualidad_{args.filas}.csv"
+    if not ruta.exists():
+        logger.info("Generando libro de %d filas en %s", args.filas, ruta)
+        generar_libro(str(ruta), args.filas)
+
+    resultados = {
+        "registros": _medir(lambda: getData(str(ruta))),
+        "diccionarios": _medir(lambda: [c.to_dict() for c in getData(str(ruta))]),
+    }
+
+    logger.info("%-14s %10s %14s %12s %10s",
+                "forma", "contactos", "MB retenidos", "bytes/cont.", "gc ms")
+    for forma, medida in resultados.items():
+        logger.info("%-14s %10d %14.1f %12.0f %10.1f", forma, medida["contactos"],
+                    medida["bytes"] / 1e6, medida["bytes_por_contacto"] or 0,
+                    medida["gc_ms"])
+
+    registros, diccionarios = resultados["registros"], resultados["diccionarios"]
+    if diccionarios["bytes"]:
+        logger.info("Reducción de memoria: %.0f %%",
+                    (1 - registros["bytes"] / diccionarios["bytes"]) * 100)
+
+    if args.json:
+        pathlib.Path(args.json).write_text(json.dumps(resultados, indent=2),
+                                           encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
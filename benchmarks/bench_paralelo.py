@@ -0,0 +1,105 @@
+"""
+Benchmark de la lectura paralela de libros Excel por rangos de filas.
+
+Lee un libro sintético (generado con generar_libro.py) con getData en un
+solo proceso y repartiendo las filas entre 2, 4, ... procesos hasta la
+cantidad de núcleos, y para cada cantidad informa la duración, la
+aceleración respecto de un proceso y la eficiencia (aceleración dividida
+por procesos; 100 % es escalamiento lineal). También verifica que todas
+las lecturas entreguen exactamente los mismos contactos.
+
+Uso:
+    python benchmarks/bench_paralelo.py [--filas 500000] [--procesos 1 2 4 8]
+                                        [--directorio RUTA] [--json RUTA]
+"""
+
+import argparse
+import json
+import logging
+import os
+import pathlib
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+RAIZ = pathlib.Path(__file__).resolve().parent.parent
+
+sys.path.insert(0, str(RAIZ))
+
+logger = logging.getLogger(__name__)
+
+
+def _procesos_por_defecto() -> List[int]:
+    """Potencias de dos hasta la cantidad de núcleos, más la cantidad de núcleos."""
+    nucleos = os.cpu_count() or 1
+    cantidades = [1]
+    while cantidades[-1] * 2 <= nucleos:
+        cantidades.append(cantidades[-1] * 2)
+    if cantidades[-1] != nucleos:
+        cantidades.append(nucleos)
+    return cantidades
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de la lectura paralela")
+    parser.add_argument("--filas", type=int, default=500000,
+                        help="cantidad de filas del libro (default: 500000)")
+    parser.add_argument("--procesos", type=int, nargs="+", default=None,
+                        help="cantidades de procesos a medir (default: 1, 2, 4... "
+                             "hasta la cantidad de núcleos)")
+    parser.add_argument("--directorio", default=None,
+                        help="carpeta donde generar y reutilizar los libros")
+    parser.add_argument("--json", default=None, metavar="RUTA",
+                        help="guarda los resultados en un archivo JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("utils").setLevel(logging.WARNING)
+
+    from benchmarks.generar_libro import generar_libro
+    from utils.manejo_archivo import getData
+
+    carpeta = pathlib.Path(args.directorio or tempfile.gettempdir()) / "bench_mensaje"
+    carpeta.mkdir(parents=True, exist_ok=True)
+    ruta = carpeta / f"Mensualidad_{args.filas}.xlsx"
+    if not ruta.exists():
+        logger.info("Generando libro de %d filas en %s", args.filas, ruta)
+        generar_libro(str(ruta), args.filas)
+
+    cantidades = sorted(set(args.procesos or _procesos_por_defecto()) | {1})
+    logger.info("Núcleos disponibles: %d", os.cpu_count() or 1)
+
+    resultados: Dict[str, Dict[str, Any]] = {}
+    referencia = None
+    for procesos in cantidades:
+        inicio = time.perf_counter()
+        contactos = getData(str(ruta), procesos=procesos)
+        duracion = time.perf_counter() - inicio
+        if referencia is None:
+            referencia = contactos
+        resultados[str(procesos)] = {
+            "segundos": duracion,
+            "contactos": len(contactos),
+            "iguales": contactos == referencia,
+        }
+
+    base = resultados["1"]["segundos"]
+    logger.info("%-9s %10s %12s %12s %8s", "procesos", "segundos", "aceleración",
+                "eficiencia", "iguales")
+    for procesos, medida in resultados.items():
+        aceleracion = base / medida["segundos"]
+        medida["aceleracion"] = aceleracion
+        medida["eficiencia"] = aceleracion / int(procesos)
+        logger.info("%-9s %10.2f %11.2fx %11.0f %% %8s", procesos, medida["segundos"],
+                    aceleracion, medida["eficiencia"] * 100,
+                    "sí" if medida["iguales"] else "NO")
+
+    if args.json:
+        pathlib.Path(args.json).write_text(json.dumps(resultados, indent=2),
+                                           encoding="utf-8")
+    return 0 if all(m["iguales"] for m in resultados.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
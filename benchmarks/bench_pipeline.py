@@ -0,0 +1,290 @@
+"""
+Benchmark del flujo completo lectura → mensajes → envío.
+
+Para cada tamaño genera (o reutiliza) un libro sintético con
+generar_libro.py y, en un proceso nuevo, mide por etapa:
+
+    - getData: lectura y procesamiento del Excel
+    - getData_csv / getData_parquet: lo mismo desde el mismo libro exportado
+      a CSV y a Parquet (este último solo con pyarrow instalado)
+    - formato / mayuscula: normalización de teléfonos y nombres crudos
+    - agrupar_por_telefono: agrupación de contactos que comparten teléfono
+    - generate_payment_message: generación de mensajes uno a uno
+    - process_contacts: renderizado por lotes y envío con TransporteNulo
+    - pipeline: lectura, renderizado y envío superpuestos (--pipeline), con
+      el tiempo hasta el primer mensaje en pipeline_primer_envio
+
+Cada etapa informa tiempo total, filas por segundo y RSS máximo del proceso
+al terminarla. Los resultados se comparan con la línea base guardada en
+JSON (si existe) y se guardan como nueva línea base con --guardar.
+
+Uso:
+    python benchmarks/bench_pipeline.py [--filas 1000 10000 100000] [--guardar]
+                                        [--baseline RUTA] [--max-regresion PCT]
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import logging
+import pathlib
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+RAIZ = pathlib.Path(__file__).resolve().parent.parent
+SCRIPT = RAIZ / "Mensaje Automatico.py"
+REPETICIONES = 3  # Repeticiones de las etapas en memoria
+BASELINE_POR_DEFECTO = pathlib.Path(__file__).resolve().parent / "baseline_pipeline.json"
+
+sys.path.insert(0, str(RAIZ))
+
+logger = logging.getLogger(__name__)
+
+
+def rss_maximo_mb() -> Optional[float]:
+    """
+    RSS máximo alcanzado por el proceso actual, en MB.
+
+    Returns:
+        Memoria en MB, o None si la plataforma no lo informa
+    """
+    if resource is None:
+        return None
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB y macOS bytes
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return maximo / divisor
+
+
+def cargar_script() -> Any:
+    """Importa "Mensaje Automatico.py" como módulo sin ejecutar main()."""
+    spec = importlib.util.spec_from_file_location("mensaje_automatico", SCRIPT)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def _medir(
+    resultados: Dict[str, Dict[str, Any]],
+    etapa: str,
+    filas: int,
+    funcion: Callable[[], Any],
+    repeticiones: int = 1
+) -> Any:
+    """
+    Ejecuta una etapa y registra su tiempo, filas/s y RSS máximo.
+
+    Con varias repeticiones se registra el menor tiempo, para que las
+    etapas en memoria (de pocos milisegundos) no dependan del ruido.
+    """
+    segundos = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        valor = funcion()
+        segundos = min(segundos, time.perf_counter() - inicio)
+    resultados[etapa] = {
+        "segundos": segundos,
+        "filas_por_segundo": filas / segundos if segundos > 0 else None,
+        "rss_max_mb": rss_maximo_mb(),
+    }
+    logger.info("  %-26s %9.3f s %12.0f filas/s", etapa, segundos,
+                resultados[etapa]["filas_por_segundo"] or 0)
+    return valor
+
+
+def medir_libro(ruta: str, filas: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Mide todas las etapas sobre un libro ya generado.
+
+    Args:
+        ruta: Libro sintético
+        filas: Cantidad de filas del libro
+
+    Returns:
+        Resultados por etapa
+    """
+    import openpyxl
+
+    from utils.agrupacion import agrupar_en_ventana, agrupar_por_telefono
+    from utils.formateo import formato, mayuscula
+    from utils.manejo_archivo import getData, iterData
+    from utils.pipeline import DEFAULT_BLOQUE_LECTURA, DEFAULT_VENTANA_GRUPO, PipelineEnvio
+    from utils.plantillas import RenderizadorMensajes
+    from utils.salida import SILENCIOSO, Salida
+    from utils.transporte import TransporteNulo
+
+    script = cargar_script()
+    resultados: Dict[str, Dict[str, Any]] = {}
+
+    data = _medir(resultados, "getData", filas, lambda: getData(ruta))
+
+    # Los mismos contactos en los otros formatos de entrada, si se generaron
+    for extension in ("csv", "parquet"):
+        otra = pathlib.Path(ruta).with_suffix(f".{extension}")
+        if otra.exists():
+            _medir(resultados, f"getData_{extension}", filas,
+                   lambda: getData(str(otra)))
+
+    # Valores crudos para medir el formateo de forma aislada
+    libro = openpyxl.load_workbook(ruta, read_only=True)
+    crudos = list(libro.active.iter_rows(min_row=3, max_col=3, values_only=True))
+    libro.close()
+    telefonos = [fila[2] for fila in crudos]
+    nombres = [str(fila[1]) for fila in crudos if fila[1]]
+
+    _medir(resultados, "formato", len(telefonos),
+           lambda: [formato(t) for t in telefonos], REPETICIONES)
+    _medir(resultados, "mayuscula", len(nombres),
+           lambda: [mayuscula(n) for n in nombres], REPETICIONES)
+    _medir(resultados, "agrupar_por_telefono", len(data),
+           lambda: agrupar_por_telefono(data), REPETICIONES)
+
+    # Cada repetición usa un renderizador nuevo para medir con la memoria vacía
+    def generar() -> Any:
+        renderizador = RenderizadorMensajes()
+        return [script.generate_payment_message(c, renderizador) for c in data]
+
+    _medir(resultados, "generate_payment_message", len(data), generar, REPETICIONES)
+
+    # Los mensajes por consola no forman parte de la medición
+    def procesar() -> Any:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return script.process_contacts(
+                data,
+                send_messages=True,
+                transporte=TransporteNulo(),
+                renderizador=RenderizadorMensajes()
+            )
+
+    _medir(resultados, "process_contacts", len(data), procesar, REPETICIONES)
+
+    # El pipeline incluye la lectura del Excel: se compara con getData + process_contacts
+    def pipeline() -> Any:
+        fuente = agrupar_en_ventana(iterData(ruta, DEFAULT_BLOQUE_LECTURA),
+                                    DEFAULT_VENTANA_GRUPO)
+        with Salida(SILENCIOSO, io.StringIO()) as salida:
+            return PipelineEnvio(True, TransporteNulo(), salida=salida).ejecutar(fuente)
+
+    resultado = _medir(resultados, "pipeline", filas, pipeline)
+    resultados["pipeline_primer_envio"] = {
+        "segundos": resultado.primer_envio,
+        "filas_por_segundo": None,
+        "rss_max_mb": rss_maximo_mb(),
+    }
+    logger.info("  %-26s %9.3f s", "pipeline_primer_envio", resultado.primer_envio or 0)
+    return resultados
+
+
+def _ejecutar_tamano(ruta: str, filas: int) -> Dict[str, Dict[str, Any]]:
+    """Mide un tamaño en un proceso nuevo para que el RSS no se acumule."""
+    proceso = subprocess.run(
+        [sys.executable, __file__, "--_medir", ruta, str(filas)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    sys.stderr.write(proceso.stderr)
+    return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+
+def comparar(
+    actual: Dict[str, Any],
+    baseline: Dict[str, Any],
+    max_regresion: Optional[float]
+) -> bool:
+    """
+    Compara los tiempos con la línea base e informa las diferencias.
+
+    Returns:
+        True si alguna etapa empeoró más que max_regresion por ciento
+    """
+    regresion = False
+    for tamano, etapas in actual["resultados"].items():
+        previas = baseline.get("resultados", {}).get(tamano, {})
+        for etapa, medida in etapas.items():
+            previa = previas.get(etapa)
+            if not previa or not previa["segundos"]:
+                continue
+            cambio = (medida["segundos"] / previa["segundos"] - 1) * 100
+            marca = ""
+            if max_regresion is not None and cambio > max_regresion:
+                marca = "  <-- regresión"
+                regresion = True
+            logger.info("%8s filas %-26s %+7.1f %%%s", tamano, etapa, cambio, marca)
+    return regresion
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark del flujo completo")
+    parser.add_argument("--filas", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="tamaños de libro a medir (default: 1000 10000 100000)")
+    parser.add_argument("--directorio", default=None,
+                        help="carpeta donde generar y reutilizar los libros")
+    parser.add_argument("--baseline", default=str(BASELINE_POR_DEFECTO),
+                        help="archivo JSON de la línea base")
+    parser.add_argument("--guardar", action="store_true",
+                        help="guarda los resultados como nueva línea base")
+    parser.add_argument("--max-regresion", type=float, default=None, metavar="PCT",
+                        help="falla si una etapa es más lenta que este porcentaje")
+    parser.add_argument("--_medir", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args._medir:
+        # Proceso hijo: medir un libro y devolver el resultado por stdout
+        logging.getLogger("utils").setLevel(logging.WARNING)
+        logging.getLogger("mensaje_automatico").setLevel(logging.WARNING)
+        ruta, filas = args._medir
+        print(json.dumps(medir_libro(ruta, int(filas))))
+        return 0
+
+    from benchmarks.generar_libro import generar_libro, pq
+
+    carpeta = pathlib.Path(args.directorio or tempfile.gettempdir()) / "bench_mensaje"
+    carpeta.mkdir(parents=True, exist_ok=True)
+
+    actual: Dict[str, Any] = {
+        "fecha": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "resultados": {},
+    }
+    for filas in args.filas:
+        ruta = carpeta / f"Mensualidad_{filas}.xlsx"
+        extensiones = (".xlsx", ".csv") + ((".parquet",) if pq is not None else ())
+        for extension in extensiones:
+            destino = ruta.with_suffix(extension)
+            if not destino.exists():
+                logger.info("Generando libro de %d filas en %s", filas, destino)
+                generar_libro(str(destino), filas)
+        logger.info("Libro de %d filas:", filas)
+        actual["resultados"][str(filas)] = _ejecutar_tamano(str(ruta), filas)
+
+    baseline_ruta = pathlib.Path(args.baseline)
+    regresion = False
+    if baseline_ruta.exists():
+        logger.info("Comparación con la línea base %s:", baseline_ruta)
+        baseline = json.loads(baseline_ruta.read_text(encoding="utf-8"))
+        regresion = comparar(actual, baseline, args.max_regresion)
+
+    if args.guardar:
+        baseline_ruta.write_text(json.dumps(actual, indent=2), encoding="utf-8")
+        logger.info("Línea base guardada en %s", baseline_ruta)
+
+    return 1 if regresion else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
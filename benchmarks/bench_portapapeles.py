@@ -0,0 +1,144 @@
+"""
+Micro-benchmark del portapapeles usado para pegar cada mensaje.
+
+Copia --mensajes mensajes de largo similar a un recordatorio con cada
+mecanismo de utils/portapapeles.py y mide la latencia de cada copia, que es
+lo que paga el envío por WhatsApp Web antes del Ctrl+V:
+
+    - pyperclip: un proceso xclip/xsel (Linux) o pbcopy (macOS) por copia
+    - tk: un único dueño del portapapeles (Tk en un hilo) reutilizado
+
+Con --verificar, después de cada copia se lee el portapapeles desde otro
+proceso (pyperclip.paste(), como lo haría el navegador al pegar) y se
+cuentan las lecturas que no devuelven el último mensaje. La lectura no se
+incluye en la latencia.
+
+Requiere pantalla (DISPLAY en Linux; sirve Xvfb). Los mecanismos que no
+están disponibles se informan y se omiten.
+
+Uso:
+    python benchmarks/bench_portapapeles.py [--mensajes 200] [--verificar] [--json RUTA]
+"""
+
+import argparse
+import json
+import logging
+import pathlib
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+RAIZ = pathlib.Path(__file__).resolve().parent.parent
+
+sys.path.insert(0, str(RAIZ))
+
+logger = logging.getLogger(__name__)
+
+# Mecanismos comparados, en el orden del informe
+MECANISMOS = ("pyperclip", "tk")
+
+
+def _mensajes(cantidad: int) -> List[str]:
+    """Genera mensajes distintos con el largo de un recordatorio típico."""
+    return [
+        f"Hola Contacto {i}, te recordamos que tienes {i % 12} pagos pendientes.\n"
+        f"El próximo vence el día {i % 28 + 1}. ¡Gracias por tu atención! " * 3
+        for i in range(cantidad)
+    ]
+
+
+def _medir(mecanismo: str, mensajes: List[str], verificar: bool) -> Dict[str, Any]:
+    """
+    Copia todos los mensajes con un mecanismo y mide cada copia.
+
+    Returns:
+        Diccionario con el tiempo de inicio, las latencias en ms (promedio,
+        p50, p95, máximo) y las lecturas incorrectas si se verificó
+
+    Raises:
+        RuntimeError: Si el mecanismo no está disponible
+        ImportError: Si falta pyperclip
+    """
+    from utils.portapapeles import crear_portapapeles
+
+    inicio = time.perf_counter()
+    portapapeles = crear_portapapeles(mecanismo)
+    arranque = (time.perf_counter() - inicio) * 1000
+
+    lector = None
+    if verificar:
+        import pyperclip
+
+        lector = pyperclip.paste
+
+    latencias = []
+    incorrectas = 0
+    try:
+        for mensaje in mensajes:
+            inicio = time.perf_counter()
+            portapapeles.copiar(mensaje)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            if lector is not None and lector() != mensaje:
+                incorrectas += 1
+    finally:
+        portapapeles.cerrar()
+
+    latencias.sort()
+    return {
+        "arranque_ms": arranque,
+        "copias": len(latencias),
+        "promedio_ms": statistics.fmean(latencias),
+        "p50_ms": latencias[len(latencias) // 2],
+        "p95_ms": latencias[min(len(latencias) - 1, int(len(latencias) * 0.95))],
+        "max_ms": latencias[-1],
+        "lecturas_incorrectas": incorrectas if verificar else None,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mensajes", type=int, default=200,
+                        help="cantidad de copias por mecanismo (default: 200)")
+    parser.add_argument("--verificar", action="store_true",
+                        help="lee el portapapeles desde otro proceso tras cada copia")
+    parser.add_argument("--json", default=None, metavar="RUTA",
+                        help="guarda los resultados en un archivo JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("utils").setLevel(logging.WARNING)
+
+    mensajes = _mensajes(max(1, args.mensajes))
+    resultados: Dict[str, Dict[str, Any]] = {}
+    for mecanismo in MECANISMOS:
+        try:
+            resultados[mecanismo] = _medir(mecanismo, mensajes, args.verificar)
+        except Exception as e:  # mecanismo no disponible en este equipo
+            logger.warning("%s no disponible: %s", mecanismo, e)
+
+    if not resultados:
+        logger.error("Ningún portapapeles disponible (¿hay pantalla?)")
+        return 1
+
+    logger.info("%-10s %12s %10s %10s %10s %10s %12s", "mecanismo", "arranque ms",
+                "prom. ms", "p50 ms", "p95 ms", "máx ms", "incorrectas")
+    for mecanismo, medida in resultados.items():
+        incorrectas = medida["lecturas_incorrectas"]
+        logger.info("%-10s %12.1f %10.2f %10.2f %10.2f %10.2f %12s", mecanismo,
+                    medida["arranque_ms"], medida["promedio_ms"], medida["p50_ms"],
+                    medida["p95_ms"], medida["max_ms"],
+                    "-" if incorrectas is None else incorrectas)
+
+    if len(resultados) == len(MECANISMOS):
+        logger.info("Latencia por mensaje: %.1fx menor con tk",
+                    resultados["pyperclip"]["promedio_ms"] / resultados["tk"]["promedio_ms"])
+
+    if args.json:
+        pathlib.Path(args.json).write_text(json.dumps(resultados, indent=2),
+                                           encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""
+Generador de libros sintéticos con la forma de Mensualidad.xlsx.
+
+Estructura generada:
+    - Fila 1: nombre del mes sobre la primera columna de pago de cada mes
+    - Fila 2: día de cada pago y el marcador "Contador" al final
+    - Columnas A-D: número, nombre, teléfono y estado ("activa"/"inactiva")
+    - Columnas de pago: rachas de pagos realizados seguidas de pendientes,
+      con los distintos valores verdaderos que aparecen en planillas reales
+
+openpyxl guarda los textos como inlineStr en vez de la tabla sharedStrings
+que usa Excel, por lo que leer estos libros es algo más lento que leer uno
+guardado desde Excel: los tiempos de getData son una cota pesimista.
+
+El formato se elige por la extensión de la ruta: .xlsx, .csv (separado por
+comas, como lo exporta Excel), .tsv o .parquet (requiere pyarrow; los meses
+y días van en los nombres de columna, ver utils/lectores.py). Con la misma
+semilla todos los formatos contienen los mismos contactos.
+
+Uso:
+    python benchmarks/generar_libro.py RUTA --filas 100000 [--semilla 1]
+"""
+
+import argparse
+import csv
+import pathlib
+import random
+import sys
+from typing import Iterator, List, Sequence
+
+import openpyxl
+from openpyxl.utils import get_column_letter
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow es opcional: solo se usa para generar .parquet
+    pa = pq = None
+
+MESES = (
+    "Marzo", "Abril", "Mayo", "Junio", "Julio", "Agosto",
+    "Septiembre", "Octubre", "Noviembre", "Diciembre",
+)
+DIAS_PAGO = (5, 20)
+
+NOMBRES = (
+    "ana", "luis", "marta", "josé", "camila", "pedro", "valentina", "diego",
+    "sofía", "matías", "fernanda", "tomás", "isidora", "benjamín", "catalina",
+)
+APELLIDOS = (
+    "pérez", "soto", "gonzález", "muñoz", "rojas", "díaz", "contreras",
+    "silva", "martínez", "sepúlveda", "morales", "fuentes", "araya",
+)
+VERDADEROS = (True, "si", "Sí", "SI", "VERDADERO", "x")
+FALSOS = (False, None, "no", "")
+
+
+def _telefono(rng: random.Random) -> object:
+    """Genera un teléfono en alguno de los formatos que se ven en las planillas."""
+    numero = rng.randint(10_000_000, 99_999_999)
+    forma = rng.random()
+    if forma < 0.5:
+        return f"9{numero}"
+    if forma < 0.7:
+        return int(f"9{numero}")
+    if forma < 0.85:
+        return f"+56 9 {str(numero)[:4]} {str(numero)[4:]}"
+    if forma < 0.95:
+        return f"569{numero}"
+    return None
+
+
+def _cabeceras(meses: Sequence[str]) -> List[List[object]]:
+    """Construye las filas 1 (meses) y 2 (días y marcador) del libro."""
+    fila_meses: List[object] = ["N°", "Nombre", "Teléfono", "Estado"]
+    fila_dias: List[object] = [None, None, None, None]
+    for mes in meses:
+        for i, dia in enumerate(DIAS_PAGO):
+            fila_meses.append(mes if i == 0 else None)
+            fila_dias.append(dia)
+    fila_meses.append(None)
+    fila_dias.append("Contador")
+    return [fila_meses, fila_dias]
+
+
+def _filas_libro(
+    filas: int,
+    meses: Sequence[str],
+    compartidos: float,
+    semilla: int
+) -> Iterator[List[object]]:
+    """Genera las filas de datos del libro, desde la fila 3."""
+    rng = random.Random(semilla)
+    pagos = len(meses) * len(DIAS_PAGO)
+
+    telefonos: List[object] = []
+    for numero in range(1, filas + 1):
+        if telefonos and rng.random() < compartidos:
+            telefono = telefonos[-rng.randint(1, min(5, len(telefonos)))]
+        else:
+            telefono = _telefono(rng)
+            telefonos.append(telefono)
+
+        nombre = f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)}"
+        estado = "inactiva" if rng.random() < 0.05 else "activa"
+        pagados = rng.randint(0, pagos)
+        celdas = [rng.choice(VERDADEROS) for _ in range(pagados)]
+        celdas += [rng.choice(FALSOS) for _ in range(pagos - pagados)]
+        # Algunas planillas tienen pagos adelantados después de un hueco
+        if pagados < pagos - 1 and rng.random() < 0.05:
+            celdas[-1] = True
+
+        yield [numero, nombre, telefono, estado] + celdas + [pagados]
+
+
+def _escribir_xlsx(
+    ruta: str,
+    cabeceras: List[List[object]],
+    datos: Iterator[List[object]],
+    filas: int
+) -> None:
+    """
+    Escribe el libro con openpyxl en modo de solo escritura.
+
+    Como Excel, declara el tamaño de la hoja (etiqueta <dimension>), que el
+    modo de solo escritura omite porque no conoce las filas de antemano. Sin
+    ella, abrir el libro en modo de solo lectura recorre la hoja completa.
+    """
+    libro = openpyxl.Workbook(write_only=True)
+    hoja = libro.create_sheet()
+    dimension = f"A1:{get_column_letter(len(cabeceras[0]))}{filas + len(cabeceras)}"
+    # El escritor consulta calculate_dimension al escribir el comienzo de la hoja
+    hoja.calculate_dimension = lambda: dimension
+    for fila in cabeceras:
+        hoja.append(fila)
+    for fila in datos:
+        hoja.append(fila)
+    libro.save(ruta)
+
+
+def _escribir_texto(
+    ruta: str,
+    cabeceras: List[List[object]],
+    datos: Iterator[List[object]],
+    separador: str
+) -> None:
+    """Escribe un archivo delimitado con los booleanos como los exporta Excel."""
+    def celda(valor: object) -> object:
+        if isinstance(valor, bool):
+            return "TRUE" if valor else "FALSE"
+        return valor
+
+    with open(ruta, "w", newline="", encoding="utf-8") as archivo:
+        escritor = csv.writer(archivo, delimiter=separador)
+        escritor.writerows(cabeceras)
+        escritor.writerows([celda(v) for v in fila] for fila in datos)
+
+
+def _escribir_parquet(
+    ruta: str,
+    cabeceras: List[List[object]],
+    datos: Iterator[List[object]],
+    filas_por_grupo: int = 65536
+) -> None:
+    """
+    Escribe un archivo Parquet con una columna por columna de la planilla.
+
+    Parquet exige un tipo por columna: el número y el contador quedan como
+    enteros y el resto como texto, con los booleanos como "True"/"False".
+    """
+    if pq is None:
+        raise ImportError("Generar archivos Parquet requiere pyarrow (pip install pyarrow)")
+
+    fila_meses, fila_dias = cabeceras
+    nombres = list(fila_meses[:4])
+    mes = None
+    for mes_columna, dia in zip(fila_meses[4:], fila_dias[4:]):
+        mes = mes_columna or mes
+        nombres.append("Contador" if dia == "Contador" else f"{mes} {dia}")
+    enteros = {0, len(nombres) - 1}
+    esquema = pa.schema([
+        (nombre, pa.int64() if i in enteros else pa.string())
+        for i, nombre in enumerate(nombres)
+    ])
+
+    def lote(filas: List[List[object]]) -> "pa.Table":
+        columnas = [
+            [fila[i] if i in enteros or fila[i] is None else str(fila[i]) for fila in filas]
+            for i in range(len(nombres))
+        ]
+        return pa.Table.from_arrays(
+            [pa.array(c, type=t) for c, t in zip(columnas, esquema.types)], schema=esquema
+        )
+
+    with pq.ParquetWriter(ruta, esquema) as escritor:
+        pendientes: List[List[object]] = []
+        for fila in datos:
+            pendientes.append(fila)
+            if len(pendientes) >= filas_por_grupo:
+                escritor.write_table(lote(pendientes))
+                pendientes = []
+        if pendientes:
+            escritor.write_table(lote(pendientes))
+
+
+def generar_libro(
+    ruta: str,
+    filas: int,
+    meses: Sequence[str] = MESES,
+    compartidos: float = 0.3,
+    semilla: int = 1
+) -> str:
+    """
+    Escribe un libro sintético en streaming (memoria constante).
+
+    Args:
+        ruta: Ruta del archivo a crear (.xlsx, .csv, .tsv o .parquet)
+        filas: Cantidad de contactos (filas de datos)
+        meses: Meses de la cabecera; cada uno tiene len(DIAS_PAGO) pagos
+        compartidos: Proporción de filas que reutilizan el teléfono de una
+            fila anterior (familias con el mismo apoderado)
+        semilla: Semilla del generador aleatorio, para libros reproducibles
+
+    Returns:
+        Ruta del archivo creado
+
+    Raises:
+        ValueError: Si la extensión no es de un formato soportado
+    """
+    cabeceras = _cabeceras(meses)
+    datos = _filas_libro(filas, meses, compartidos, semilla)
+    extension = pathlib.Path(ruta).suffix.lower()
+    if extension == ".xlsx":
+        _escribir_xlsx(ruta, cabeceras, datos, filas)
+    elif extension == ".csv":
+        _escribir_texto(ruta, cabeceras, datos, ",")
+    elif extension == ".tsv":
+        _escribir_texto(ruta, cabeceras, datos, "\t")
+    elif extension == ".parquet":
+        _escribir_parquet(ruta, cabeceras, datos)
+    else:
+        raise ValueError(f"Formato no soportado para el libro sintético: {extension!r}")
+    return ruta
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Genera un libro sintético")
+    parser.add_argument("ruta", help="archivo .xlsx, .csv, .tsv o .parquet a crear")
+    parser.add_argument("--filas", type=int, default=1000,
+                        help="cantidad de contactos (default: 1000)")
+    parser.add_argument("--semilla", type=int, default=1,
+                        help="semilla del generador aleatorio (default: 1)")
+    args = parser.parse_args()
+
+    generar_libro(args.ruta, args.filas, semilla=args.semilla)
+    print(f"Libro generado: {args.ruta} ({args.filas} filas)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Dobles de prueba para el envío por WhatsApp Web.
+
+Contiene un reloj simulado, sondas de disponibilidad y un controlador
+de interfaz falsos que permiten ejecutar enviarMensajeWhatsApp y medir sus
+tiempos sin pantalla, sin navegador y sin esperar en tiempo real, y un
+transporte falso que registra los envíos de los emisores de fragmentos.py.
+
+Example:
+    >>> from utils.wsp_message import enviarMensajeWhatsApp
+    >>> reloj = RelojFalso()
+    >>> gui = ControladorFalso()
+    >>> enviarMensajeWhatsApp("+56912345678", "Hola", sonda=SondaFalsa(reloj, 2.0),
+    ...                       controlador=gui, reloj=reloj.ahora, dormir=reloj.dormir)
+    True
+    >>> reloj.tiempo  # 2 s de carga + 3 esperas de 1 s entre acciones
+    5.0
+"""
+
+import threading
+import time
+from typing import Iterable, List, Set, Tuple
+
+from utils.transporte import Transporte
+
+
+class RelojFalso:
+    """Reloj simulado: dormir() avanza el tiempo en vez de esperar."""
+
+    def __init__(self, inicio: float = 0.0) -> None:
+        self.tiempo = inicio
+        self.esperas: List[float] = []
+
+    def ahora(self) -> float:
+        """Devuelve el tiempo simulado actual en segundos."""
+        return self.tiempo
+
+    def dormir(self, segundos: float) -> None:
+        """Avanza el tiempo simulado y registra la espera."""
+        self.esperas.append(segundos)
+        self.tiempo += segundos
+
+
+class SondaFalsa:
+    """
+    Sonda que indica que el chat está listo a partir de cierto instante.
+
+    Args:
+        reloj: Reloj simulado compartido con el envío
+        listo_en: Segundos (desde la creación) en que el chat queda listo
+    """
+
+    def __init__(self, reloj: RelojFalso, listo_en: float) -> None:
+        self.reloj = reloj
+        self.instante_listo = reloj.ahora() + listo_en
+        self.consultas = 0
+
+    def __call__(self) -> bool:
+        self.consultas += 1
+        return self.reloj.ahora() >= self.instante_listo
+
+
+class SondaChatAbierto:
+    """
+    Sonda que ve un chat abierto salvo justo después de presionar Esc.
+
+    Args:
+        controlador: Controlador falso cuyas acciones se observan
+    """
+
+    def __init__(self, controlador: "ControladorFalso") -> None:
+        self.controlador = controlador
+
+    def __call__(self) -> bool:
+        acciones = self.controlador.acciones
+        return bool(acciones) and acciones[-1] != ("presionar", "esc")
+
+
+class ControladorFalso:
+    """
+    Controlador de interfaz que solo registra las acciones realizadas.
+
+    Las acciones de fallas se registran y luego lanzan RuntimeError, como
+    una tecla que llegó a presionarse antes de que pyautogui fallara.
+    """
+
+    def __init__(self) -> None:
+        self.acciones: List[Tuple[str, ...]] = []
+        self.fallas: Set[Tuple[str, ...]] = set()
+
+    def _registrar(self, accion: Tuple[str, ...]) -> None:
+        self.acciones.append(accion)
+        if accion in self.fallas:
+            raise RuntimeError(f"falla simulada en {accion}")
+
+    def abrir(self, url: str) -> None:
+        self._registrar(("abrir", url))
+
+    def pegar(self, texto: str) -> None:
+        self._registrar(("pegar", texto))
+
+    def presionar(self, tecla: str) -> None:
+        self._registrar(("presionar", tecla))
+
+    def atajo(self, *teclas: str) -> None:
+        self._registrar(("atajo",) + teclas)
+
+
+class TransporteFalso(Transporte):
+    """
+    Transporte que registra cada envío y el hilo que lo hizo.
+
+    Puede compartirse entre varios emisores: también registra cuántos
+    envíos llegaron a estar en curso a la vez.
+
+    Args:
+        fallar: Teléfonos cuyo envío falla
+        latencia: Segundos que tarda cada envío
+    """
+
+    nombre = "falso"
+
+    def __init__(self, fallar: Iterable[str] = (), latencia: float = 0.0) -> None:
+        self.fallar = set(fallar)
+        self.latencia = latencia
+        self.enviados: List[Tuple[str, str, str]] = []  # (hilo, teléfono, mensaje)
+        self.en_curso = 0
+        self.max_en_curso = 0
+        self._lock = threading.Lock()
+
+    def enviar(self, telefono: str, mensaje: str) -> bool:
+        with self._lock:
+            self.en_curso += 1
+            self.max_en_curso = max(self.max_en_curso, self.en_curso)
+        time.sleep(self.latencia)
+        with self._lock:
+            self.en_curso -= 1
+            self.enviados.append((threading.current_thread().name, telefono, mensaje))
+        return telefono not in self.fallar
@@ -0,0 +1,91 @@
+"""Pruebas de la bitácora de envíos y de qué se retoma con --resume."""
+
+import pathlib
+from typing import Iterator
+
+import pytest
+
+from utils.bitacora_envios import (
+    DESCONOCIDO,
+    EN_CURSO,
+    ENVIADO,
+    FALLIDO,
+    BitacoraEnvios,
+    Envio,
+)
+
+ANA = Envio(1, "Ana", "+56911111111", "Hola Ana")
+LUIS = Envio(2, "Luis", "+56922222222", "Hola Luis")
+
+
+@pytest.fixture
+def bitacora(tmp_path: pathlib.Path) -> Iterator[BitacoraEnvios]:
+    with BitacoraEnvios(str(tmp_path / "envios.sqlite")) as bitacora:
+        yield bitacora
+
+
+def test_campana_completa_termina(bitacora: BitacoraEnvios) -> None:
+    campana = bitacora.planificar([ANA, LUIS])
+    assert bitacora.pendientes(campana) == [ANA, LUIS]
+
+    for envio in (ANA, LUIS):
+        bitacora.marcar(campana, envio.posicion, ENVIADO)
+    bitacora.terminar(campana)
+    assert bitacora.campana_pendiente() is None
+
+
+def test_fallido_se_retoma(bitacora: BitacoraEnvios) -> None:
+    campana = bitacora.planificar([ANA, LUIS])
+    bitacora.marcar(campana, ANA.posicion, ENVIADO)
+    bitacora.marcar(campana, LUIS.posicion, FALLIDO, "sin conexión")
+    bitacora.terminar(campana)
+
+    assert bitacora.campana_pendiente() == campana
+    assert bitacora.pendientes(campana) == [LUIS]
+
+
+def test_campana_nueva_reemplaza_a_la_interrumpida(bitacora: BitacoraEnvios) -> None:
+    vieja = bitacora.planificar([ANA, LUIS._replace(mensaje="mensaje viejo")])
+    bitacora.marcar(vieja, ANA.posicion, ENVIADO)
+    bitacora.marcar(vieja, LUIS.posicion, FALLIDO, "sin conexión")
+    bitacora.terminar(vieja)
+
+    nueva = bitacora.planificar([LUIS])
+    bitacora.marcar(nueva, LUIS.posicion, ENVIADO)
+    bitacora.terminar(nueva)
+
+    # --resume no debe volver a la campaña vieja ni reenviar su mensaje
+    assert bitacora.campana_pendiente() is None
+
+
+def test_campana_del_pipeline_reemplaza_a_la_interrumpida(bitacora: BitacoraEnvios) -> None:
+    vieja = bitacora.planificar([ANA])
+    nueva = bitacora.nueva_campana()
+    assert bitacora.campana_pendiente() == nueva != vieja
+
+
+def test_desconocido_no_se_reintenta(bitacora: BitacoraEnvios) -> None:
+    campana = bitacora.planificar([ANA, LUIS])
+    bitacora.marcar(campana, ANA.posicion, DESCONOCIDO, "sin respuesta en 30s")
+    bitacora.marcar(campana, LUIS.posicion, FALLIDO, "HTTP 500")
+
+    assert bitacora.pendientes(campana) == [LUIS]
+    assert bitacora.desconocidos(campana) == [ANA.posicion]
+
+    bitacora.marcar(campana, LUIS.posicion, ENVIADO)
+    bitacora.terminar(campana)
+    assert bitacora.campana_pendiente() is None
+
+
+def test_en_curso_al_interrumpirse_no_se_reintenta(bitacora: BitacoraEnvios) -> None:
+    campana = bitacora.planificar([ANA, LUIS])
+    # La ejecución se cortó después de despachar el mensaje de Ana
+    bitacora.marcar(campana, ANA.posicion, EN_CURSO)
+
+    assert bitacora.pendientes(campana) == [LUIS]
+    assert bitacora.desconocidos(campana) == [ANA.posicion]
+
+    bitacora.marcar(campana, LUIS.posicion, EN_CURSO)
+    bitacora.marcar(campana, LUIS.posicion, ENVIADO)
+    bitacora.terminar(campana)
+    assert bitacora.campana_pendiente() is None
@@ -0,0 +1,123 @@
+"""Pruebas del reparto de envíos entre emisores (fragmentos.py)."""
+
+import threading
+from typing import List, Optional, Tuple
+
+import pytest
+
+from dobles import TransporteFalso
+from utils import fragmentos
+from utils.bitacora_envios import Envio
+from utils.fragmentos import ConfigFragmento, TransporteFragmentado
+
+
+class _HiloEmisor(threading.Thread):
+    """Emisor en un hilo, con la interfaz de multiprocessing.Process que usa el coordinador."""
+
+    exitcode = 0
+
+    def terminate(self) -> None:
+        pass
+
+
+class _FragmentadoEnHilos(TransporteFragmentado):
+    """
+    TransporteFragmentado con los emisores en hilos del mismo proceso.
+
+    Los emisores corren el mismo _emisor y las tareas y eventos pasan por
+    las mismas colas de multiprocessing (con pickle), pero el transporte
+    de cada emisor puede ser un doble creado en la prueba.
+    """
+
+    def _iniciar_emisor(self, config: ConfigFragmento) -> None:
+        tareas = self._contexto.Queue()
+        hilo = _HiloEmisor(target=fragmentos._emisor, args=(config, tareas, self._eventos),
+                           name=f"emisor-{config.indice}", daemon=True)
+        hilo.start()
+        self._tareas.append(tareas)
+        self._procesos.append(hilo)
+
+
+@pytest.fixture
+def falso(monkeypatch) -> TransporteFalso:
+    """Transporte falso compartido por todos los emisores."""
+    transporte = TransporteFalso(fallar={"+56900000003", "+56900000007"}, latencia=0.01)
+    monkeypatch.setattr(fragmentos, "_crear_transporte_emisor", lambda config: transporte)
+    return transporte
+
+
+def _envios(cantidad: int, mensaje: str = "Hola {}") -> List[Envio]:
+    return [Envio(i, f"Contacto {i}", f"+569{i:08d}", mensaje.format(i))
+            for i in range(cantidad)]
+
+
+def _enviar(
+    emisores: int,
+    envios: List[Envio]
+) -> Tuple[List[Optional[bool]], List[Envio], List[Tuple[Envio, Optional[bool]]]]:
+    """Envía un lote y devuelve los resultados y el orden de los ganchos."""
+    antes: List[Envio] = []
+    despues: List[Tuple[Envio, Optional[bool]]] = []
+    with _FragmentadoEnHilos(emisores, "nulo") as transporte:
+        resultados = transporte.enviar_lote(
+            envios, antes=antes.append, despues=lambda e, exito, _: despues.append((e, exito))
+        )
+    return resultados, antes, despues
+
+
+@pytest.mark.parametrize("cantidad", [0, 1, 2, 3, 4, 25])
+def test_reparte_todos_los_envios_una_vez(falso: TransporteFalso, cantidad: int) -> None:
+    envios = _envios(cantidad)
+    resultados, antes, despues = _enviar(3, envios)
+
+    assert sorted(telefono for _, telefono, _ in falso.enviados) == [e.telefono for e in envios]
+    assert resultados == [e.telefono not in falso.fallar for e in envios]
+    assert sorted(despues) == sorted(zip(envios, resultados))
+    assert falso.max_en_curso <= 3
+
+
+def test_un_envio_en_curso_por_emisor_y_carga_repartida(falso: TransporteFalso) -> None:
+    _enviar(3, _envios(30))
+
+    assert falso.max_en_curso == 3
+    por_emisor = {hilo for hilo, _, _ in falso.enviados}
+    assert por_emisor == {"emisor-0", "emisor-1", "emisor-2"}
+
+
+def test_orden_de_envio(falso: TransporteFalso) -> None:
+    envios = _envios(12)
+    resultados, antes, _ = _enviar(4, envios)
+    # Los envíos se entregan a los emisores en el orden de la lista
+    assert antes == envios
+    assert resultados == [e.telefono not in falso.fallar for e in envios]
+
+    # Con un solo emisor además se envían en ese orden
+    falso.enviados.clear()
+    _, _, despues = _enviar(1, envios)
+    assert [telefono for _, telefono, _ in falso.enviados] == [e.telefono for e in envios]
+    assert [e for e, _ in despues] == envios
+
+
+@pytest.mark.parametrize("mensaje", [
+    "Hola José, ¿pagaste la cuota de diciembre? Ñandú",
+    "Recordatorio 💸🙏 👨‍👩‍👧‍👦 🇨🇱",
+    "é combinada, 𝔘𝔫𝔦𝔠𝔬𝔡𝔢 y ​ sin ancho",
+    "🙂" * 5000,
+])
+def test_mensajes_multibyte_llegan_intactos(falso: TransporteFalso, mensaje: str) -> None:
+    envios = [Envio(0, "Ana", "+56900000000", mensaje), Envio(1, "Luis", "+56900000001", mensaje)]
+    resultados, _, _ = _enviar(2, envios)
+
+    assert resultados == [True, True]
+    assert sorted((telefono, m) for _, telefono, m in falso.enviados) == [
+        ("+56900000000", mensaje), ("+56900000001", mensaje)
+    ]
+
+
+def test_emisores_en_procesos_con_transporte_nulo() -> None:
+    envios = _envios(6, "¿Pagaste? 🙂 {}")
+    despues: List[Envio] = []
+    with TransporteFragmentado(2, "nulo") as transporte:
+        resultados = transporte.enviar_lote(envios, despues=lambda e, *_: despues.append(e))
+    assert resultados == [True] * 6
+    assert sorted(despues) == envios
@@ -0,0 +1,80 @@
+"""Pruebas de la lectura de libros Excel por rangos de filas."""
+
+import pathlib
+from typing import List
+
+import openpyxl
+import pytest
+
+from utils import manejo_archivo
+from utils.lectores import _filas_rango_xlsx, _filas_xlsx, _total_filas_xlsx
+from utils.registros import Contacto
+
+FILAS_DATOS = 30
+FILA_VACIA = 12  # Fila sin celdas en el XML de la hoja
+
+
+@pytest.fixture
+def libro(tmp_path: pathlib.Path) -> str:
+    """Libro con contactos válidos, inactivos, sin teléfono y una fila vacía."""
+    excel = openpyxl.Workbook()
+    hoja = excel.active
+    hoja.append([None, None, None, None, "Marzo", None, "Abril", None])
+    hoja.append([None, None, None, None, "5", "20", "5", "Contador"])
+    for row in range(3, FILAS_DATOS + 3):
+        if row == FILA_VACIA:
+            continue
+        estado = "inactiva" if row % 7 == 0 else "activa"
+        telefono = None if row % 11 == 0 else f"9{row:08d}"
+        pagos = [True] * (row % 4) + ["no"] * (3 - row % 4)
+        for column, valor in enumerate([row, f"contacto {row}", telefono, estado, *pagos], 1):
+            hoja.cell(row=row, column=column, value=valor)
+    ruta = tmp_path / "Mensualidad.xlsx"
+    excel.save(ruta)
+    return str(ruta)
+
+
+def _por_rangos(ruta: str, cortes: List[int]) -> List[Contacto]:
+    """Concatena _procesar_rango sobre los rangos que empiezan en cada corte."""
+    total = _total_filas_xlsx(ruta)
+    limites = [3, *cortes, total + 1]
+    esquema = manejo_archivo._construir_esquema(*_filas_rango_xlsx(ruta, 1, 2))
+    contactos: List[Contacto] = []
+    for inicio, siguiente in zip(limites, limites[1:]):
+        leidos, errores, leidas = manejo_archivo._procesar_rango(
+            ruta, inicio, siguiente - 1, esquema, 4)
+        assert errores == 0
+        assert leidas == siguiente - inicio
+        contactos.extend(leidos)
+    return contactos
+
+
+def test_rango_entrega_las_mismas_filas_que_la_lectura_completa(libro: str) -> None:
+    completas = list(_filas_xlsx(libro))
+    total = _total_filas_xlsx(libro)
+    assert total == len(completas)
+    for inicio in range(1, total + 1):
+        for fin in range(inicio, total + 1):
+            assert list(_filas_rango_xlsx(libro, inicio, fin)) == completas[inicio - 1:fin]
+
+
+def test_toda_division_en_dos_rangos_coincide_con_un_proceso(libro: str) -> None:
+    esperados = list(manejo_archivo.iterData(libro, procesos=1))
+    assert esperados
+    for corte in range(4, _total_filas_xlsx(libro) + 1):
+        assert _por_rangos(libro, [corte]) == esperados, f"corte en la fila {corte}"
+
+
+def test_divisiones_parejas_coinciden_con_un_proceso(libro: str, monkeypatch) -> None:
+    esperados = list(manejo_archivo.iterData(libro, procesos=1))
+    monkeypatch.setattr(manejo_archivo, "MIN_FILAS_POR_PROCESO", 1)
+    for procesos in range(2, FILAS_DATOS + 1):
+        rangos = manejo_archivo._rangos_paralelos(libro, procesos)
+        assert rangos[0][0] == 3 and rangos[-1][1] == _total_filas_xlsx(libro)
+        assert _por_rangos(libro, [inicio for inicio, _ in rangos[1:]]) == esperados
+
+
+def test_iterData_en_varios_procesos(libro: str, monkeypatch) -> None:
+    esperados = list(manejo_archivo.iterData(libro, procesos=1))
+    monkeypatch.setattr(manejo_archivo, "MIN_FILAS_POR_PROCESO", 1)
+    assert list(manejo_archivo.iterData(libro, procesos=3)) == esperados
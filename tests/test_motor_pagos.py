@@ -0,0 +1,27 @@
+"""Pruebas del cálculo de pagos por lotes."""
+
+from utils.motor_pagos import calcular_pagos, en_bloques
+
+
+def test_cuenta_el_tramo_inicial_de_pagos() -> None:
+    filas = [
+        (None,) * 4 + (True, "si", None),
+        (None,) * 4 + ("Sí", "VERDADERO", "true"),
+        (None,) * 4 + (None, True, True),
+        (None,) * 4 + ("no", "si", "si"),
+    ]
+    assert calcular_pagos(filas, 5, 3) == ([2, 3, 0, 0], [1, 0, 3, 3])
+
+
+def test_filas_cortas_cuentan_como_pendientes() -> None:
+    filas = [("Ana", "+569", True), ("Luis", "+569", True, "si", "SI")]
+    assert calcular_pagos(filas, 3, 4) == ([1, 3], [3, 1])
+
+
+def test_sin_columnas_de_pago_o_sin_filas() -> None:
+    assert calcular_pagos([("Ana",)], 2, 0) == ([0], [0])
+    assert calcular_pagos([], 5, 3) == ([], [])
+
+
+def test_en_bloques() -> None:
+    assert list(en_bloques(range(5), 2)) == [[0, 1], [2, 3], [4]]
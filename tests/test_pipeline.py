@@ -0,0 +1,41 @@
+"""Pruebas del pipeline de lectura, renderizado y envío."""
+
+import pathlib
+from typing import Iterator
+
+from utils.bitacora_envios import BitacoraEnvios
+from utils.pipeline import PipelineEnvio
+from utils.registros import Contacto, DatosPago
+from utils.salida import SILENCIOSO, Salida
+from utils.transporte import TransporteNulo
+
+
+def _contactos(cantidad: int) -> Iterator[Contacto]:
+    for i in range(cantidad):
+        yield Contacto(f"Contacto {i}", f"+569{i:08d}", DatosPago(1, 2, "5", "Marzo"))
+
+
+def _lectura_interrumpida() -> Iterator[Contacto]:
+    yield from _contactos(3)
+    raise OSError("archivo truncado")
+
+
+def _ejecutar(ruta: pathlib.Path, fuente: Iterator[Contacto]):
+    with BitacoraEnvios(str(ruta)) as bitacora, TransporteNulo() as transporte, \
+            Salida(SILENCIOSO) as salida:
+        resultado = PipelineEnvio(True, transporte, bitacora, salida=salida).ejecutar(fuente)
+        return resultado, bitacora.campana_pendiente()
+
+
+def test_lectura_completa_termina_la_campana(tmp_path: pathlib.Path) -> None:
+    resultado, pendiente = _ejecutar(tmp_path / "envios.sqlite", _contactos(5))
+    assert resultado.completo
+    assert resultado.envios == 5
+    assert pendiente is None
+
+
+def test_lectura_interrumpida_deja_la_campana_abierta(tmp_path: pathlib.Path) -> None:
+    resultado, pendiente = _ejecutar(tmp_path / "envios.sqlite", _lectura_interrumpida())
+    assert not resultado.completo
+    assert resultado.envios == 3
+    assert pendiente is not None
@@ -0,0 +1,112 @@
+"""Pruebas del archivo de plan de campaña (--plan / --from-plan)."""
+
+import pathlib
+import struct
+from typing import Iterator
+
+import pytest
+
+from utils.bitacora_envios import Envio
+from utils.plan_campana import PlanCampana, escribir_plan
+
+ENVIOS = [
+    Envio(1, "José Muñoz", "+56911111111", "Hola José, ¿pagaste la cuota? Ñandú 💸"),
+    Envio(2, "Zoë", "+56922222222", "Recordatorio 👨‍👩‍👧‍👦 🇨🇱\nsegunda línea"),
+    Envio(5, "", "+56933333333", ""),
+]
+
+
+@pytest.fixture
+def ruta(tmp_path: pathlib.Path) -> pathlib.Path:
+    ruta = tmp_path / "campana.plan"
+    escribir_plan(str(ruta), ENVIOS, {"origen": "Pagos año 2024"})
+    return ruta
+
+
+def _modificar(ruta: pathlib.Path, desplazamiento: int, datos: bytes) -> None:
+    contenido = bytearray(ruta.read_bytes())
+    contenido[desplazamiento:desplazamiento + len(datos)] = datos
+    ruta.write_bytes(bytes(contenido))
+
+
+def test_ida_y_vuelta_con_texto_no_ascii(ruta: pathlib.Path) -> None:
+    with PlanCampana(str(ruta)) as plan:
+        assert len(plan) == 3
+        assert list(plan) == ENVIOS
+        assert plan.metadatos["origen"] == "Pagos año 2024"
+        assert "creado" in plan.metadatos
+
+
+def test_plan_vacio(tmp_path: pathlib.Path) -> None:
+    ruta = tmp_path / "vacio.plan"
+    assert escribir_plan(str(ruta), []) == 0
+    with PlanCampana(str(ruta)) as plan:
+        assert len(plan) == 0
+        assert list(plan) == []
+
+
+def test_indices_negativos_y_rebanadas(ruta: pathlib.Path) -> None:
+    with PlanCampana(str(ruta)) as plan:
+        assert plan[0] == ENVIOS[0]
+        assert plan[-1] == ENVIOS[-1]
+        assert plan[-3] == ENVIOS[0]
+        assert plan[1:] == ENVIOS[1:]
+        assert plan[::-1] == ENVIOS[::-1]
+        assert plan[-2:10] == ENVIOS[-2:10]
+        assert plan[3:] == []
+        for indice in (3, -4):
+            with pytest.raises(IndexError):
+                plan[indice]
+
+
+@pytest.mark.parametrize("recorte", [1, 8, 30])
+def test_archivo_truncado(ruta: pathlib.Path, recorte: int) -> None:
+    contenido = ruta.read_bytes()
+    ruta.write_bytes(contenido[:-recorte])
+    with pytest.raises(ValueError, match="truncado"):
+        PlanCampana(str(ruta))
+
+
+def test_archivo_demasiado_corto(tmp_path: pathlib.Path) -> None:
+    ruta = tmp_path / "corto.plan"
+    ruta.write_bytes(b"MAPC")
+    with pytest.raises(ValueError, match="demasiado corto"):
+        PlanCampana(str(ruta))
+
+
+def test_crc_incorrecto(ruta: pathlib.Path) -> None:
+    contenido = ruta.read_bytes()
+    desplazamiento = contenido.index("Ñandú".encode("utf-8"))
+    _modificar(ruta, desplazamiento, b"X")
+
+    with pytest.raises(ValueError, match="CRC"):
+        PlanCampana(str(ruta))
+    # Sin verificar se abre igual: el CRC es la única defensa contra este daño
+    with PlanCampana(str(ruta), verificar=False) as plan:
+        assert len(plan) == 3
+
+
+def test_version_no_soportada(ruta: pathlib.Path) -> None:
+    _modificar(ruta, 4, struct.pack("<H", 2))
+    with pytest.raises(ValueError, match="Versión de plan no soportada"):
+        PlanCampana(str(ruta))
+
+
+def test_no_es_un_plan(tmp_path: pathlib.Path) -> None:
+    ruta = tmp_path / "otro.plan"
+    ruta.write_bytes(b"PK\x03\x04" + bytes(64))
+    with pytest.raises(ValueError, match="no es un plan"):
+        PlanCampana(str(ruta))
+
+
+def test_escribir_es_atomico(tmp_path: pathlib.Path, ruta: pathlib.Path) -> None:
+    def envios_con_error() -> Iterator[Envio]:
+        yield ENVIOS[0]
+        raise RuntimeError("se cortó la generación")
+
+    with pytest.raises(RuntimeError):
+        escribir_plan(str(ruta), envios_con_error())
+    # El plan anterior queda intacto y no quedan temporales
+    with PlanCampana(str(ruta)) as plan:
+        assert list(plan) == ENVIOS
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["campana.plan"]
@@ -0,0 +1,27 @@
+"""Pruebas de las opciones del planificador de envíos (--rate-*, --jitter)."""
+
+import pytest
+
+from utils.planificador import parse_jitter, parse_tasa
+
+
+@pytest.mark.parametrize("texto, esperada", [("1", 1.0), ("0.5", 0.5), ("30", 30.0)])
+def test_tasa_valida(texto: str, esperada: float) -> None:
+    assert parse_tasa(texto) == esperada
+
+
+@pytest.mark.parametrize("texto", ["0", "-5", "inf", "nan", "1e400", "", "abc"])
+def test_tasa_no_valida(texto: str) -> None:
+    with pytest.raises(ValueError):
+        parse_tasa(texto)
+
+
+@pytest.mark.parametrize("texto, esperado", [("0", 0.0), ("2.5", 2.5)])
+def test_jitter_valido(texto: str, esperado: float) -> None:
+    assert parse_jitter(texto) == esperado
+
+
+@pytest.mark.parametrize("texto", ["-1", "inf", "nan", "abc"])
+def test_jitter_no_valido(texto: str) -> None:
+    with pytest.raises(ValueError):
+        parse_jitter(texto)
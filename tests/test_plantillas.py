@@ -0,0 +1,75 @@
+"""Pruebas de la carga de plantillas y reglas (plantillas.py)."""
+
+import json
+import pathlib
+
+import pytest
+
+from utils.plantillas import Plantilla, RenderizadorMensajes, cargar_plantillas
+from utils.registros import Contacto, DatosPago
+
+
+def _carpeta(tmp_path: pathlib.Path, reglas: object = None, **plantillas: str) -> str:
+    for archivo, texto in plantillas.items():
+        (tmp_path / f"{archivo}.txt").write_text(texto, encoding="utf-8")
+    if reglas is not None:
+        (tmp_path / "reglas.json").write_text(json.dumps(reglas), encoding="utf-8")
+    return str(tmp_path)
+
+
+@pytest.mark.parametrize("texto", [
+    "Vence el día {diaAPagar:d}",  # diaAPagar es texto
+    "Hola {nombre!z}",
+    "Hola {nombre",
+    "Hola {apellido}",
+    "Quedan {faltantes:%Y}",
+])
+def test_plantilla_invalida_falla_al_cargar(tmp_path: pathlib.Path, texto: str) -> None:
+    carpeta = _carpeta(tmp_path, {"por_defecto": "aviso.txt"}, aviso=texto)
+    with pytest.raises(ValueError, match="aviso.txt"):
+        cargar_plantillas(carpeta)
+
+
+def test_plantilla_con_formato_del_tipo_correcto() -> None:
+    plantilla = Plantilla("aviso.txt", "{nombre:>6}: {faltantes:02d} pagos")
+    assert plantilla.renderizar({"nombre": "Ana", "faltantes": 3}) == "   Ana: 03 pagos"
+
+
+@pytest.mark.parametrize("reglas, clave", [
+    (["aviso.txt"], "objeto"),
+    ({"por_defecto": 3}, "por_defecto"),
+    ({"reglas": {"plantilla": "aviso.txt"}}, "reglas"),
+    ({"reglas": ["aviso.txt"]}, "objeto"),
+    ({"reglas": [{"faltantes_min": 3}]}, "plantilla"),
+    ({"reglas": [{"plantilla": "aviso.txt", "faltantes_min": "3"}]}, "faltantes_min"),
+    ({"reglas": [{"plantilla": "aviso.txt", "faltantes_max": True}]}, "faltantes_max"),
+    ({"reglas": [{"plantilla": "aviso.txt", "meses": "Marzo"}]}, "meses"),
+])
+def test_reglas_invalidas_fallan_al_cargar(
+    tmp_path: pathlib.Path, reglas: object, clave: str
+) -> None:
+    carpeta = _carpeta(tmp_path, reglas, aviso="Hola {nombre}")
+    with pytest.raises(ValueError, match=clave):
+        cargar_plantillas(carpeta)
+
+
+def test_reglas_validas(tmp_path: pathlib.Path) -> None:
+    carpeta = _carpeta(
+        tmp_path,
+        {"por_defecto": "aviso.txt",
+         "reglas": [{"plantilla": "marzo.txt", "faltantes_min": 2, "meses": ["Marzo"]}]},
+        aviso="Hola {nombre}", marzo="Marzo: {nombre}",
+    )
+    renderizador = cargar_plantillas(carpeta)
+    assert renderizador.renderizar(Contacto("Ana", "+56911111111",
+                                            DatosPago(1, 2, "5", "Marzo"))) == "Marzo: Ana"
+    assert renderizador.renderizar(Contacto("Ana", "+56911111111",
+                                            DatosPago(1, 1, "5", "Marzo"))) == "Hola Ana"
+
+
+def test_campos_sin_dato_usan_el_valor_por_defecto() -> None:
+    renderizador = RenderizadorMensajes(
+        Plantilla("aviso.txt", "{nombre}|{cantidadPagado}|{diaAPagar}|{mesAPagar}")
+    )
+    contacto = Contacto(None, "+56911111111", DatosPago(None, 0, "", None))
+    assert renderizador.renderizar(contacto) == "Usuario|0|N/A|N/A"
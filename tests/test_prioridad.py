@@ -0,0 +1,44 @@
+"""Pruebas del cálculo de vencimientos para la priorización."""
+
+import datetime
+
+import pytest
+
+from utils.prioridad import _SIN_FECHA, fecha_vencimiento, urgencia
+from utils.registros import Contacto, DatosPago
+
+HOY = datetime.date(2024, 6, 15)
+
+
+def _pagos(dia: object, mes: object = "Junio") -> DatosPago:
+    return DatosPago(1, 2, dia, mes)
+
+
+@pytest.mark.parametrize("dia", ["inf", "-inf", "nan", "1e400", "0", "32", "-5", "1e20",
+                                 "N/A", "", None])
+def test_dia_no_valido_no_tiene_fecha(dia: object) -> None:
+    assert fecha_vencimiento(_pagos(dia), HOY) is None
+
+
+def test_mes_no_reconocido_no_tiene_fecha() -> None:
+    assert fecha_vencimiento(_pagos("5", "Mes 13"), HOY) is None
+
+
+@pytest.mark.parametrize("dia, mes, esperada", [
+    ("5", "Junio", datetime.date(2024, 6, 5)),
+    ("20.0", " marzo ", datetime.date(2024, 3, 20)),
+    ("31", "Junio", datetime.date(2024, 6, 30)),  # último día del mes
+    ("30", "Febrero", datetime.date(2024, 2, 29)),
+])
+def test_fecha_de_vencimiento(dia: str, mes: str, esperada: datetime.date) -> None:
+    assert fecha_vencimiento(_pagos(dia, mes), HOY) == esperada
+
+
+def test_diciembre_visto_en_enero_esta_atrasado() -> None:
+    enero = datetime.date(2025, 1, 10)
+    assert fecha_vencimiento(_pagos("20", "Diciembre"), enero) == datetime.date(2024, 12, 20)
+
+
+def test_contacto_con_dia_no_valido_va_al_final() -> None:
+    contacto = Contacto("Ana", "+56912345678", _pagos("inf"))
+    assert urgencia(contacto, HOY) == (_SIN_FECHA, -2)
@@ -0,0 +1,178 @@
+"""Pruebas de TransporteHTTP contra un servidor HTTP local."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List
+
+import pytest
+
+from utils.bitacora_envios import (
+    DESCONOCIDO,
+    BitacoraEnvios,
+    Envio,
+    estado_resultado,
+)
+from utils.transporte import TransporteHTTP
+
+
+class _Servidor(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _Manejador)
+        self.recibidos: List[Dict[str, Any]] = []
+        self.estado = 200
+        self.demora = 0.0
+        self.cerrar_tras_responder = False
+        self.cortar_sin_responder = False
+        self.en_vuelo = 0
+        self.max_en_vuelo = 0
+        self.candado = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/messages"
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        servidor: _Servidor = self.server  # type: ignore[assignment]
+        cuerpo = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with servidor.candado:
+            servidor.recibidos.append(cuerpo)
+            servidor.en_vuelo += 1
+            servidor.max_en_vuelo = max(servidor.max_en_vuelo, servidor.en_vuelo)
+        if servidor.cortar_sin_responder:
+            # Recibió la solicitud pero la conexión se corta antes de responder
+            with servidor.candado:
+                servidor.en_vuelo -= 1
+            self.close_connection = True
+            return
+        try:
+            time.sleep(servidor.demora)
+        finally:
+            with servidor.candado:
+                servidor.en_vuelo -= 1
+        respuesta = b'{"ok": true}' if servidor.estado < 400 else b'{"error": "falla"}'
+        try:
+            self.send_response(servidor.estado)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(respuesta)))
+            self.end_headers()
+            self.wfile.write(respuesta)
+        except OSError:
+            return  # el cliente ya se fue (timeout)
+        # Simula un servidor que cierra la conexión keep-alive al quedar inactiva
+        self.close_connection = servidor.cerrar_tras_responder
+
+
+@pytest.fixture
+def servidor() -> Iterator[_Servidor]:
+    servidor = _Servidor()
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _envios(cantidad: int) -> List[Envio]:
+    return [Envio(i, f"Contacto {i}", f"+5691234{i:04d}", f"Hola {i} ✓")
+            for i in range(1, cantidad + 1)]
+
+
+def test_envio_exitoso(servidor: _Servidor) -> None:
+    with TransporteHTTP(servidor.url, "token") as transporte:
+        assert transporte.enviar("+56912345678", "Hola ✓") is True
+
+    assert servidor.recibidos == [{
+        "messaging_product": "whatsapp",
+        "to": "56912345678",
+        "type": "text",
+        "text": {"body": "Hola ✓"},
+    }]
+
+
+def test_error_http_es_fallido(servidor: _Servidor) -> None:
+    servidor.estado = 500
+    errores = []
+    with TransporteHTTP(servidor.url, "token") as transporte:
+        resultados = transporte.enviar_lote(
+            _envios(2), despues=lambda envio, exito, error: errores.append(error)
+        )
+
+    assert resultados == [False, False]
+    assert all(error.startswith("HTTP 500") for error in errores)
+    assert len(servidor.recibidos) == 2
+
+
+def test_servidor_inalcanzable_es_fallido(servidor: _Servidor) -> None:
+    url = servidor.url
+    servidor.shutdown()
+    servidor.server_close()
+    with TransporteHTTP(url, "token", timeout=1) as transporte:
+        assert transporte.enviar("+56912345678", "Hola") is False
+
+
+def test_respeta_max_en_vuelo(servidor: _Servidor) -> None:
+    servidor.demora = 0.1
+    with TransporteHTTP(servidor.url, "token", max_en_vuelo=3) as transporte:
+        resultados = transporte.enviar_lote(_envios(12))
+
+    assert resultados == [True] * 12
+    assert len(servidor.recibidos) == 12
+    assert servidor.max_en_vuelo == 3
+
+
+def test_timeout_no_reenvia_y_queda_desconocido(
+    servidor: _Servidor, tmp_path: Any
+) -> None:
+    servidor.demora = 1.0
+    envios = _envios(1)
+    with BitacoraEnvios(str(tmp_path / "envios.sqlite")) as bitacora:
+        campana = bitacora.planificar(envios)
+        with TransporteHTTP(servidor.url, "token", timeout=0.3) as transporte:
+            resultados = transporte.enviar_lote(
+                envios,
+                despues=lambda envio, exito, error: bitacora.marcar(
+                    campana, envio.posicion, estado_resultado(exito), error
+                ),
+            )
+        time.sleep(1.0)  # dar tiempo a que llegue un eventual reintento
+
+        assert resultados == [None]
+        assert len(servidor.recibidos) == 1
+        # Al retomar no se vuelve a enviar
+        assert bitacora.pendientes(campana) == []
+        assert bitacora.desconocidos(campana) == [1]
+        estado = bitacora._conexion.execute(
+            "SELECT estado FROM envios WHERE campana = ?", (campana,)
+        ).fetchone()[0]
+        assert estado == DESCONOCIDO
+
+
+def test_reintenta_conexion_keep_alive_cerrada(servidor: _Servidor) -> None:
+    servidor.cerrar_tras_responder = True
+    with TransporteHTTP(servidor.url, "token", max_en_vuelo=1) as transporte:
+        assert transporte.enviar("+56911111111", "uno") is True
+        time.sleep(0.1)  # el servidor ya cerró la conexión que quedó en el pool
+        assert transporte.enviar("+56922222222", "dos") is True
+
+    assert [cuerpo["text"]["body"] for cuerpo in servidor.recibidos] == ["uno", "dos"]
+
+
+def test_corte_tras_escribir_la_solicitud_no_reenvia(servidor: _Servidor) -> None:
+    with TransporteHTTP(servidor.url, "token", max_en_vuelo=1) as transporte:
+        assert transporte.enviar("+56911111111", "uno") is True
+        # La conexión keep-alive reutilizada se corta esperando la respuesta
+        servidor.cortar_sin_responder = True
+        assert transporte.enviar("+56922222222", "dos") is None
+
+    assert [cuerpo["text"]["body"] for cuerpo in servidor.recibidos] == ["uno", "dos"]
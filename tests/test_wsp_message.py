@@ -0,0 +1,276 @@
+"""Pruebas del envío por WhatsApp Web sin pantalla, con dobles de prueba."""
+
+from typing import Any, Optional, Tuple
+
+from dobles import ControladorFalso, RelojFalso, SondaChatAbierto, SondaFalsa
+
+from utils.wsp_message import SesionWhatsApp, enviarMensajeWhatsApp, esperar_listo
+
+
+def _sesion(
+    listo_en: Optional[float] = None
+) -> Tuple[SesionWhatsApp, ControladorFalso, RelojFalso]:
+    """Sesión con una sonda que ve el chat abierto salvo tras Esc, o listo en listo_en."""
+    reloj = RelojFalso()
+    gui = ControladorFalso()
+    sonda = SondaChatAbierto(gui) if listo_en is None else SondaFalsa(reloj, listo_en)
+    sesion = SesionWhatsApp(
+        sonda=sonda, wait_time=5.0, action_delay=1.0,
+        controlador=gui, reloj=reloj.ahora, dormir=reloj.dormir
+    )
+    return sesion, gui, reloj
+
+
+def test_esperar_listo_vuelve_apenas_la_sonda_responde() -> None:
+    reloj = RelojFalso()
+    sonda = SondaFalsa(reloj, 1.0)
+
+    assert esperar_listo(sonda, 9.0, intervalo=0.25, reloj=reloj.ahora,
+                         dormir=reloj.dormir)
+    assert reloj.tiempo == 1.0
+    assert sonda.consultas == 5
+
+
+def test_esperar_listo_timeout() -> None:
+    reloj = RelojFalso()
+    sonda = SondaFalsa(reloj, 60.0)
+
+    assert not esperar_listo(sonda, 2.0, intervalo=0.3, reloj=reloj.ahora,
+                             dormir=reloj.dormir)
+    assert reloj.tiempo == 2.0  # la última espera se recorta al tiempo restante
+
+
+def test_esperar_listo_tolera_errores_de_la_sonda() -> None:
+    reloj = RelojFalso()
+    consultas = []
+
+    def sonda() -> bool:
+        consultas.append(reloj.ahora())
+        if len(consultas) < 3:
+            raise OSError("captura de pantalla fallida")
+        return True
+
+    assert esperar_listo(sonda, 5.0, intervalo=0.5, reloj=reloj.ahora,
+                         dormir=reloj.dormir)
+    assert consultas == [0.0, 0.5, 1.0]
+
+
+def test_esperar_listo_sonda_que_siempre_falla() -> None:
+    reloj = RelojFalso()
+
+    def sonda() -> Any:
+        raise RuntimeError("sin pantalla")
+
+    assert not esperar_listo(sonda, 1.0, reloj=reloj.ahora, dormir=reloj.dormir)
+    assert reloj.tiempo == 1.0
+
+
+def test_envio_directo_con_sonda() -> None:
+    reloj = RelojFalso()
+    gui = ControladorFalso()
+
+    assert enviarMensajeWhatsApp("+56912345678", "Hola", sonda=SondaFalsa(reloj, 2.0),
+                                 controlador=gui, reloj=reloj.ahora, dormir=reloj.dormir)
+    assert gui.acciones == [
+        ("abrir", "https://web.whatsapp.com/send?phone=+56912345678"),
+        ("pegar", "Hola"),
+        ("presionar", "enter"),
+        ("atajo", "ctrl", "w"),
+    ]
+    assert reloj.tiempo == 5.0  # 2 s de carga + 3 esperas de 1 s entre acciones
+
+
+def test_sesion_cambia_de_chat_en_la_misma_pestana() -> None:
+    sesion, gui, _ = _sesion()
+
+    assert sesion.enviar("+56911111111", "uno")
+    assert gui.acciones == [
+        ("abrir", "https://web.whatsapp.com/send?phone=+56911111111"),
+        ("pegar", "uno"),
+        ("presionar", "enter"),
+    ]
+    assert sesion.abierta
+
+    gui.acciones.clear()
+    assert sesion.enviar("+56922222222", "dos")
+    # El chat nuevo se abre por la URL del número, no por la búsqueda
+    assert gui.acciones == [
+        ("presionar", "esc"),
+        ("atajo", "ctrl", "l"),
+        ("pegar", "https://web.whatsapp.com/send?phone=+56922222222"),
+        ("presionar", "enter"),
+        ("pegar", "dos"),
+        ("presionar", "enter"),
+    ]
+
+    gui.acciones.clear()
+    sesion.cerrar()
+    assert gui.acciones == [("atajo", "ctrl", "w")]
+    assert not sesion.abierta
+
+
+def test_sesion_chat_no_listo_envia_en_pestana_nueva() -> None:
+    sesion, gui, reloj = _sesion()
+    assert sesion.enviar("+56911111111", "uno")
+
+    # El siguiente chat nunca queda listo dentro de la sesión
+    sesion.sonda = lambda: False
+    gui.acciones.clear()
+    assert not sesion.enviar("+56922222222", "dos")
+
+    assert ("pegar", "dos") not in gui.acciones
+    assert gui.acciones[-2:] == [
+        ("abrir", "https://web.whatsapp.com/send?phone=+56922222222"),
+        ("atajo", "ctrl", "w"),
+    ]
+    assert not sesion.abierta
+
+
+def test_sesion_error_de_interfaz_usa_pestana_nueva() -> None:
+    sesion, gui, _ = _sesion()
+    assert sesion.enviar("+56911111111", "uno")
+
+    original = gui.atajo
+
+    def atajo(*teclas: str) -> None:
+        if teclas == ("ctrl", "l"):
+            raise RuntimeError("atajo no disponible")
+        original(*teclas)
+
+    gui.atajo = atajo  # type: ignore[method-assign]
+    gui.acciones.clear()
+    assert sesion.enviar("+56922222222", "dos")
+    assert gui.acciones[-4:] == [
+        ("abrir", "https://web.whatsapp.com/send?phone=+56922222222"),
+        ("pegar", "dos"),
+        ("presionar", "enter"),
+        ("atajo", "ctrl", "w"),
+    ]
+    assert not sesion.abierta
+
+
+def test_sesion_sin_sonda_abre_una_pestana_por_mensaje() -> None:
+    reloj = RelojFalso()
+    gui = ControladorFalso()
+    sesion = SesionWhatsApp(sonda=None, wait_time=5.0, action_delay=1.0,
+                            controlador=gui, reloj=reloj.ahora, dormir=reloj.dormir)
+
+    assert sesion.enviar("+56911111111", "uno")
+    assert sesion.enviar("+56922222222", "dos")
+
+    # Nunca pega en un chat que no pudo verificarse: cada mensaje usa la URL
+    assert ("atajo", "ctrl", "l") not in gui.acciones
+    assert [a for a in gui.acciones if a[0] in ("abrir", "atajo")] == [
+        ("abrir", "https://web.whatsapp.com/send?phone=+56911111111"),
+        ("atajo", "ctrl", "w"),
+        ("abrir", "https://web.whatsapp.com/send?phone=+56922222222"),
+        ("atajo", "ctrl", "w"),
+    ]
+    assert not sesion.abierta
+
+
+def test_sesion_primer_envio_fallido_cierra_la_pestana() -> None:
+    sesion, gui, _ = _sesion(listo_en=60.0)
+
+    assert not sesion.enviar("+56911111111", "uno")
+    assert gui.acciones == [
+        ("abrir", "https://web.whatsapp.com/send?phone=+56911111111"),
+        ("atajo", "ctrl", "w"),
+    ]
+    assert not sesion.abierta
+
+
+def test_envio_con_error_cierra_la_pestana_aunque_no_se_pida() -> None:
+    reloj = RelojFalso()
+    gui = ControladorFalso()
+
+    def pegar(texto: str) -> None:
+        raise RuntimeError("portapapeles no disponible")
+
+    gui.pegar = pegar  # type: ignore[method-assign]
+    assert not enviarMensajeWhatsApp("+56911111111", "uno", close_tab=False,
+                                     sonda=SondaFalsa(reloj, 0.0), controlador=gui,
+                                     reloj=reloj.ahora, dormir=reloj.dormir)
+    assert gui.acciones[-1] == ("atajo", "ctrl", "w")
+
+
+def test_error_al_cerrar_tras_enter_cuenta_como_enviado() -> None:
+    reloj = RelojFalso()
+    gui = ControladorFalso()
+    gui.fallas.add(("atajo", "ctrl", "w"))
+
+    assert enviarMensajeWhatsApp("+56911111111", "uno", sonda=SondaFalsa(reloj, 0.0),
+                                 controlador=gui, reloj=reloj.ahora,
+                                 dormir=reloj.dormir) is True
+    assert gui.acciones.count(("presionar", "enter")) == 1
+
+
+def test_error_al_presionar_enter_es_desconocido() -> None:
+    reloj = RelojFalso()
+    gui = ControladorFalso()
+    gui.fallas.add(("presionar", "enter"))
+
+    assert enviarMensajeWhatsApp("+56911111111", "uno", close_tab=False,
+                                 sonda=SondaFalsa(reloj, 0.0), controlador=gui,
+                                 reloj=reloj.ahora, dormir=reloj.dormir) is None
+    assert gui.acciones[-1] == ("atajo", "ctrl", "w")
+
+
+def test_sesion_error_al_presionar_enter_no_reenvia() -> None:
+    sesion, gui, _ = _sesion()
+    assert sesion.enviar("+56911111111", "uno")
+
+    original = gui.presionar
+
+    def presionar(tecla: str) -> None:
+        original(tecla)
+        if gui.acciones[-2:] == [("pegar", "dos"), ("presionar", "enter")]:
+            raise RuntimeError("pyautogui interrumpido")
+
+    gui.presionar = presionar  # type: ignore[method-assign]
+    gui.acciones.clear()
+    assert sesion.enviar("+56922222222", "dos") is None
+
+    # No se reenvía en una pestaña nueva: el mensaje pudo haber salido
+    assert gui.acciones.count(("pegar", "dos")) == 1
+    assert not any(accion[0] == "abrir" for accion in gui.acciones)
+    assert not sesion.abierta
+
+
+def test_sesion_error_tras_enter_no_reenvia() -> None:
+    sesion, gui, reloj = _sesion()
+    assert sesion.enviar("+56911111111", "uno")
+
+    original = reloj.dormir
+
+    def dormir(segundos: float) -> None:
+        if gui.acciones[-2:] == [("pegar", "dos"), ("presionar", "enter")]:
+            raise RuntimeError("interrupción tras el envío")
+        original(segundos)
+
+    sesion.dormir = dormir
+    gui.acciones.clear()
+    assert sesion.enviar("+56922222222", "dos") is True
+    assert gui.acciones.count(("pegar", "dos")) == 1
+    assert not any(accion[0] == "abrir" for accion in gui.acciones)
+
+
+def test_sesion_no_pega_si_el_chat_anterior_sigue_abierto() -> None:
+    sesion, gui, _ = _sesion()
+    assert sesion.enviar("+56911111111", "uno")
+
+    # Esc no cerró el chat de +56911111111: no se puede confirmar el cambio
+    sesion.sonda = lambda: True
+    gui.acciones.clear()
+    assert sesion.enviar("+56922222222", "dos")
+
+    # Nada se pegó en la sesión: el mensaje salió por una pestaña con su URL
+    assert gui.acciones == [
+        ("presionar", "esc"),
+        ("atajo", "ctrl", "w"),
+        ("abrir", "https://web.whatsapp.com/send?phone=+56922222222"),
+        ("pegar", "dos"),
+        ("presionar", "enter"),
+        ("atajo", "ctrl", "w"),
+    ]
+    assert not sesion.abierta
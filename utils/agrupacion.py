@@ -0,0 +1,159 @@
+"""
+Módulo de agrupación de contactos por teléfono.
+
+Varias filas del Excel pueden compartir el mismo teléfono (por ejemplo, el
+apoderado de varios integrantes de una familia). Para no enviar un mensaje
+por fila al mismo número, agrupar_por_telefono reúne esas filas en un solo
+registros.Grupo con sus 'miembros', que las plantillas convierten en un
+mensaje combinado con los pagos pendientes de cada integrante.
+
+agrupar_en_ventana hace lo mismo sobre un flujo de contactos (ver
+pipeline.py), mirando solo las últimas filas leídas para no tener que
+esperar al final del Excel.
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .registros import Contacto, Destinatario, Grupo
+
+logger = logging.getLogger(__name__)
+
+
+def unir_nombres(nombres: List[str]) -> str:
+    """
+    Une nombres en un texto legible, sin repetir los duplicados.
+
+    Example:
+        >>> unir_nombres(["Ana", "Luis", "Marta"])
+        'Ana, Luis y Marta'
+    """
+    nombres = list(dict.fromkeys(nombres))
+    if len(nombres) <= 1:
+        return "".join(nombres)
+    return f"{', '.join(nombres[:-1])} y {nombres[-1]}"
+
+
+def agrupar_por_telefono(data: Iterable[Contacto]) -> List[Destinatario]:
+    """
+    Reúne en un solo contacto las filas que comparten teléfono.
+
+    Los teléfonos ya vienen normalizados con formateo.formato desde getData,
+    por lo que basta con compararlos directamente. Los contactos sin
+    compañeros de teléfono (o sin teléfono) se devuelven sin cambios.
+
+    Args:
+        data: Contactos en el orden del Excel
+
+    Returns:
+        Contactos agrupados, en el orden de la primera aparición de cada
+        teléfono. Cada grupo es un Grupo con 'nombre' (nombres unidos),
+        'telefono' y 'miembros' (los contactos originales, en orden)
+
+    Example:
+        >>> agrupar_por_telefono([
+        ...     Contacto("Ana", "+56912345678", pagos_ana),
+        ...     Contacto("Luis", "+56912345678", pagos_luis),
+        ... ])
+        [Grupo('Ana y Luis', '+56912345678', [...])]
+    """
+    por_telefono: Dict[str, List[Contacto]] = {}
+    grupos: List[List[Contacto]] = []
+
+    for contacto in data:
+        telefono = contacto.telefono
+        if not telefono:
+            grupos.append([contacto])
+            continue
+        miembros = por_telefono.get(telefono)
+        if miembros is None:
+            por_telefono[telefono] = miembros = []
+            grupos.append(miembros)
+        miembros.append(contacto)
+
+    resultado = [_grupo(miembros) for miembros in grupos]
+    agrupados = sum(len(miembros) for miembros in grupos if len(miembros) > 1)
+
+    if agrupados:
+        logger.info("Agrupación: %d contactos comparten teléfono, %d mensajes en total",
+                    agrupados, len(resultado))
+    return resultado
+
+
+def _grupo(miembros: List[Contacto]) -> Destinatario:
+    """Convierte los contactos de un mismo teléfono en un solo contacto."""
+    if len(miembros) == 1:
+        return miembros[0]
+    return Grupo(
+        unir_nombres([str(m.nombre or '') for m in miembros]),
+        miembros[0].telefono,
+        miembros,
+    )
+
+
+def agrupar_en_ventana(
+    data: Iterable[Contacto],
+    ventana: Optional[int] = None
+) -> Iterator[Destinatario]:
+    """
+    Versión en flujo de agrupar_por_telefono.
+
+    Cada teléfono se entrega cuando su primera fila queda `ventana` filas
+    atrás, reuniendo las filas con el mismo teléfono leídas hasta entonces.
+    Si una fila con ese teléfono aparece más adelante, forma otro grupo
+    (y recibe otro mensaje). Con ventana=None el resultado es el mismo que
+    el de agrupar_por_telefono, pero solo se entrega al final.
+
+    Args:
+        data: Contactos en el orden del Excel
+        ventana: Cantidad de filas de anticipación, o None para todas
+
+    Yields:
+        Contactos agrupados, en el orden de la primera aparición de cada teléfono
+    """
+    # Clave (teléfono o posición si no tiene) -> (posición de la primera fila, miembros)
+    abiertos: "OrderedDict[Any, Tuple[int, List[Contacto]]]" = OrderedDict()
+    agrupados = 0
+    entregados = 0
+
+    for i, contacto in enumerate(data):
+        clave = contacto.telefono or ("sin_telefono", i)
+        if clave in abiertos:
+            abiertos[clave][1].append(contacto)
+        else:
+            abiertos[clave] = (i, [contacto])
+
+        while ventana is not None and abiertos:
+            primera, miembros = next(iter(abiertos.values()))
+            if i - primera < ventana:
+                break
+            abiertos.popitem(last=False)
+            agrupados += len(miembros) if len(miembros) > 1 else 0
+            entregados += 1
+            yield _grupo(miembros)
+
+    for _, miembros in abiertos.values():
+        agrupados += len(miembros) if len(miembros) > 1 else 0
+        entregados += 1
+        yield _grupo(miembros)
+
+    if agrupados:
+        logger.info("Agrupación: %d contactos comparten teléfono, %d mensajes en total",
+                    agrupados, entregados)
+
+
+def expandir(contactos: Iterable[Destinatario]) -> List[Contacto]:
+    """
+    Reemplaza cada grupo por sus miembros.
+
+    Args:
+        contactos: Contactos, agrupados o no
+
+    Returns:
+        Contactos originales, en orden
+    """
+    resultado: List[Contacto] = []
+    for contacto in contactos:
+        resultado.extend(contacto.miembros or (contacto,))
+    return resultado
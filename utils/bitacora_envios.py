@@ -0,0 +1,332 @@
+"""
+Módulo de bitácora de envíos (write-ahead journal).
+
+Registra en SQLite cada envío planificado junto con su mensaje ya generado
+y va actualizando su estado (planificado, en curso, enviado, fallido o
+desconocido) antes y después de cada intento. Si la ejecución se
+interrumpe, una ejecución posterior puede retomar la campaña desde el
+primer envío no confirmado sin volver a leer el Excel ni repetir los
+envíos ya hechos.
+
+Un envío "desconocido" es uno que pudo haber llegado (por ejemplo, la API
+no respondió a tiempo después de recibir la solicitud): no se reintenta
+al retomar, para no duplicar el mensaje, y debe revisarse a mano. Los
+envíos que quedaron "en curso" al interrumpirse la ejecución pasan a
+desconocidos al retomar, por la misma razón.
+"""
+
+import logging
+import pathlib
+import sqlite3
+import time
+from typing import Any, Iterable, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Estados posibles de un envío
+PLANIFICADO = "planificado"
+EN_CURSO = "en_curso"
+ENVIADO = "enviado"
+FALLIDO = "fallido"
+DESCONOCIDO = "desconocido"
+
+# Estados que no se reintentan al retomar una campaña
+_CERRADOS = (ENVIADO, DESCONOCIDO)
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS campanas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    creada REAL NOT NULL,
+    terminada REAL
+);
+CREATE TABLE IF NOT EXISTS envios (
+    campana INTEGER NOT NULL REFERENCES campanas(id),
+    posicion INTEGER NOT NULL,
+    nombre TEXT,
+    telefono TEXT NOT NULL,
+    mensaje TEXT NOT NULL,
+    estado TEXT NOT NULL,
+    intentos INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    actualizado REAL NOT NULL,
+    PRIMARY KEY (campana, posicion)
+);
+"""
+
+
+class Envio(NamedTuple):
+    """Mensaje ya generado listo para enviar a un contacto."""
+    posicion: int
+    nombre: str
+    telefono: str
+    mensaje: str
+
+
+def estado_resultado(exito: Optional[bool]) -> str:
+    """
+    Traduce el resultado de un envío al estado de la bitácora.
+
+    Args:
+        exito: True si llegó, False si falló sin llegar, None si no se sabe
+
+    Returns:
+        ENVIADO, FALLIDO o DESCONOCIDO
+    """
+    if exito is None:
+        return DESCONOCIDO
+    return ENVIADO if exito else FALLIDO
+
+
+def ruta_bitacora_por_defecto(ruta_excel: str) -> str:
+    """
+    Devuelve la ruta de la bitácora de envíos asociada a un archivo Excel.
+
+    Args:
+        ruta_excel: Ruta al archivo Excel
+
+    Returns:
+        Ruta al archivo SQLite junto al Excel (ej: Mensualidad.envios.sqlite)
+    """
+    excel = pathlib.Path(ruta_excel)
+    return str(excel.with_name(f"{excel.stem}.envios.sqlite"))
+
+
+class BitacoraEnvios:
+    """
+    Bitácora SQLite de campañas de envío.
+
+    Cada cambio de estado se confirma en disco antes de continuar, de modo
+    que tras una caída la bitácora refleja el último envío intentado.
+
+    Example:
+        >>> with BitacoraEnvios("Mensualidad.envios.sqlite") as bitacora:
+        ...     campana = bitacora.planificar([Envio(1, "Ana", "+56912345678", "Hola")])
+        ...     for envio in bitacora.pendientes(campana):
+        ...         bitacora.marcar(campana, envio.posicion, EN_CURSO)
+    """
+
+    def __init__(self, ruta: str) -> None:
+        """
+        Abre (o crea) la bitácora.
+
+        Args:
+            ruta: Ruta al archivo SQLite
+        """
+        self.ruta = ruta
+        self._conexion = sqlite3.connect(ruta)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.executescript(_ESQUEMA)
+
+    def __enter__(self) -> "BitacoraEnvios":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.cerrar()
+
+    def cerrar(self) -> None:
+        """Cierra la conexión con la bitácora."""
+        self._conexion.close()
+
+    def planificar(self, envios: Iterable[Envio]) -> int:
+        """
+        Registra una nueva campaña con todos sus envíos en estado planificado.
+
+        Args:
+            envios: Envíos de la campaña en el orden de envío
+
+        Returns:
+            Identificador de la campaña creada
+        """
+        ahora = time.time()
+        with self._conexion:
+            campana = self._crear_campana(ahora)
+            self._conexion.executemany(
+                "INSERT INTO envios (campana, posicion, nombre, telefono, mensaje, "
+                "estado, actualizado) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (campana, envio.posicion, envio.nombre, envio.telefono,
+                     envio.mensaje, PLANIFICADO, ahora)
+                    for envio in envios
+                )
+            )
+        logger.info("Campaña %d planificada en %s", campana, self.ruta)
+        return campana
+
+    def nueva_campana(self) -> int:
+        """
+        Registra una campaña vacía a la que se agregan los envíos a medida
+        que se generan (ver pipeline.py).
+
+        Returns:
+            Identificador de la campaña creada
+        """
+        with self._conexion:
+            campana = self._crear_campana(time.time())
+        logger.info("Campaña %d abierta en %s", campana, self.ruta)
+        return campana
+
+    def _crear_campana(self, ahora: float) -> int:
+        """
+        Crea una campaña y da por terminadas las anteriores que no terminaron.
+
+        Una campaña nueva se genera con los datos actuales, así que reemplaza
+        a las anteriores: retomarlas enviaría mensajes desactualizados a
+        contactos que la nueva ya pudo haber alcanzado. Debe llamarse dentro
+        de una transacción.
+
+        Returns:
+            Identificador de la campaña creada
+        """
+        campana = self._conexion.execute(
+            "INSERT INTO campanas (creada) VALUES (?)", (ahora,)
+        ).lastrowid
+        anteriores = [fila[0] for fila in self._conexion.execute(
+            "SELECT id FROM campanas WHERE terminada IS NULL AND id < ? ORDER BY id",
+            (campana,)
+        )]
+        if anteriores:
+            self._conexion.execute(
+                "UPDATE campanas SET terminada = ? WHERE terminada IS NULL AND id < ?",
+                (ahora, campana)
+            )
+            logger.warning("Campañas sin terminar %s reemplazadas por la campaña %d: "
+                           "sus envíos sin confirmar ya no se retomarán",
+                           anteriores, campana)
+        return campana
+
+    def agregar(self, campana: int, envio: Envio) -> None:
+        """
+        Registra un envío planificado en una campaña existente.
+
+        Args:
+            campana: Identificador de la campaña
+            envio: Envío a registrar
+        """
+        with self._conexion:
+            self._conexion.execute(
+                "INSERT INTO envios (campana, posicion, nombre, telefono, mensaje, "
+                "estado, actualizado) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (campana, envio.posicion, envio.nombre, envio.telefono,
+                 envio.mensaje, PLANIFICADO, time.time())
+            )
+
+    def campana_pendiente(self) -> Optional[int]:
+        """
+        Busca la campaña más reciente que no terminó.
+
+        Solo puede haber una: cada campaña nueva da por terminadas las
+        anteriores (ver _crear_campana).
+
+        Returns:
+            Identificador de la campaña, o None si no hay campañas pendientes
+        """
+        fila = self._conexion.execute(
+            "SELECT id FROM campanas WHERE terminada IS NULL ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        return fila[0] if fila else None
+
+    def pendientes(self, campana: int) -> List[Envio]:
+        """
+        Obtiene los envíos por reintentar de una campaña interrumpida, en orden.
+
+        Incluye los planificados y los fallidos. Los que quedaron en curso al
+        interrumpirse la ejecución pudieron haber llegado (el mensaje ya se
+        había despachado), por lo que se marcan como desconocidos y, como
+        estos, no se reintentan: sus posiciones se informan en el log para
+        revisarlas a mano.
+
+        Args:
+            campana: Identificador de la campaña
+
+        Returns:
+            Lista de envíos por realizar
+        """
+        with self._conexion:
+            interrumpidos = self._conexion.execute(
+                "UPDATE envios SET estado = ?, error = ?, actualizado = ? "
+                "WHERE campana = ? AND estado = ?",
+                (DESCONOCIDO, "ejecución interrumpida durante el envío", time.time(),
+                 campana, EN_CURSO)
+            ).rowcount
+        if interrumpidos:
+            logger.warning("Campaña %d: %d envíos quedaron en curso al interrumpirse "
+                           "y pudieron haber llegado", campana, interrumpidos)
+
+        desconocidos = self.desconocidos(campana)
+        if desconocidos:
+            logger.warning("Campaña %d: no se sabe si llegaron los envíos en posiciones "
+                           "%s; no se reintentarán, revisarlos a mano",
+                           campana, desconocidos)
+
+        filas = self._conexion.execute(
+            "SELECT posicion, nombre, telefono, mensaje FROM envios "
+            "WHERE campana = ? AND estado NOT IN (?, ?) ORDER BY posicion",
+            (campana, *_CERRADOS)
+        ).fetchall()
+        return [Envio(*fila) for fila in filas]
+
+    def desconocidos(self, campana: int) -> List[int]:
+        """
+        Obtiene las posiciones de los envíos que no se sabe si llegaron.
+
+        Args:
+            campana: Identificador de la campaña
+
+        Returns:
+            Posiciones en orden
+        """
+        filas = self._conexion.execute(
+            "SELECT posicion FROM envios WHERE campana = ? AND estado = ? "
+            "ORDER BY posicion",
+            (campana, DESCONOCIDO)
+        ).fetchall()
+        return [fila[0] for fila in filas]
+
+    def marcar(
+        self,
+        campana: int,
+        posicion: int,
+        estado: str,
+        error: Optional[str] = None
+    ) -> None:
+        """
+        Actualiza el estado de un envío y lo confirma en disco.
+
+        Args:
+            campana: Identificador de la campaña
+            posicion: Posición del envío dentro de la campaña
+            estado: Nuevo estado (EN_CURSO, ENVIADO, FALLIDO o DESCONOCIDO)
+            error: Descripción del error si el envío falló
+        """
+        intento = 1 if estado == EN_CURSO else 0
+        with self._conexion:
+            self._conexion.execute(
+                "UPDATE envios SET estado = ?, error = ?, intentos = intentos + ?, "
+                "actualizado = ? WHERE campana = ? AND posicion = ?",
+                (estado, error, intento, time.time(), campana, posicion)
+            )
+
+    def terminar(self, campana: int) -> None:
+        """
+        Marca una campaña como terminada si ya no le quedan envíos pendientes.
+
+        Los envíos desconocidos no cuentan como pendientes: no se reintentan.
+
+        Args:
+            campana: Identificador de la campaña
+        """
+        restantes = self._conexion.execute(
+            "SELECT COUNT(*) FROM envios WHERE campana = ? AND estado NOT IN (?, ?)",
+            (campana, *_CERRADOS)
+        ).fetchone()[0]
+
+        if restantes:
+            logger.info("Campaña %d con %d envíos sin confirmar, usa --resume para "
+                        "reintentarlos", campana, restantes)
+            return
+
+        with self._conexion:
+            self._conexion.execute(
+                "UPDATE campanas SET terminada = ? WHERE id = ?", (time.time(), campana)
+            )
+        logger.info("Campaña %d terminada", campana)
@@ -0,0 +1,283 @@
+"""
+Módulo de caché en disco para los datos leídos del Excel.
+
+Guarda el resultado de getData() en una instantánea binaria comprimida junto
+al archivo Excel, identificada por la huella del libro (ruta, fecha de
+modificación, tamaño y hash del contenido). Mientras el libro no cambie,
+las ejecuciones siguientes cargan la instantánea en vez de volver a
+procesar el Excel con openpyxl.
+"""
+
+import hashlib
+import logging
+import os
+import pathlib
+import pickle
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional
+
+from .env_loader import get_excel_path
+from .manejo_archivo import TAMANO_BLOQUE, iterData
+from .metricas import REGISTRO
+from .registros import Contacto
+
+logger = logging.getLogger(__name__)
+
+# Configuraciones por defecto
+CACHE_DIRNAME = ".cache_mensaje"  # Carpeta de instantáneas junto al Excel
+DEFAULT_MAX_EDAD = 7 * 24 * 3600  # Antigüedad máxima de una instantánea (segundos)
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024  # Tamaño máximo total de la caché
+
+# Encabezado de las instantáneas: identificador y versión del formato
+# (versión 2: contactos como registros.Contacto en vez de diccionarios)
+_MAGIC = b"MACH"
+_VERSION = 2
+_EXTENSION = ".bin"
+
+
+def huella_archivo(ruta: str) -> Dict[str, Any]:
+    """
+    Calcula la huella de un archivo usada como clave de la caché.
+
+    Args:
+        ruta: Ruta al archivo
+
+    Returns:
+        Diccionario con ruta absoluta, mtime en nanosegundos, tamaño en bytes
+        y hash SHA-256 del contenido
+
+    Raises:
+        OSError: Si el archivo no existe o no se puede leer
+    """
+    ruta_abs = str(pathlib.Path(ruta).resolve())
+    info = os.stat(ruta_abs)
+
+    digest = hashlib.sha256()
+    with open(ruta_abs, "rb") as archivo:
+        for trozo in iter(lambda: archivo.read(1024 * 1024), b""):
+            digest.update(trozo)
+
+    return {
+        "ruta": ruta_abs,
+        "mtime": info.st_mtime_ns,
+        "tamano": info.st_size,
+        "sha256": digest.hexdigest(),
+    }
+
+
+def _ruta_instantanea(directorio: pathlib.Path, huella: Dict[str, Any]) -> pathlib.Path:
+    """Devuelve la ruta de la instantánea correspondiente a una huella."""
+    nombre = pathlib.Path(huella["ruta"]).stem
+    return directorio / f"{nombre}-{huella['sha256'][:16]}{_EXTENSION}"
+
+
+def _leer_instantanea(
+    ruta: pathlib.Path,
+    huella: Dict[str, Any]
+) -> Optional[List[Contacto]]:
+    """
+    Lee una instantánea y la devuelve solo si su clave coincide con la huella.
+
+    Args:
+        ruta: Ruta de la instantánea
+        huella: Huella actual del archivo Excel
+
+    Returns:
+        Datos guardados, o None si no existe, está corrupta o no coincide
+    """
+    try:
+        contenido = ruta.read_bytes()
+    except FileNotFoundError:
+        return None
+
+    cabecera = _MAGIC + bytes([_VERSION])
+    if not contenido.startswith(cabecera):
+        logger.debug("Instantánea con formato desconocido: %s", ruta)
+        return None
+
+    try:
+        clave, datos = pickle.loads(zlib.decompress(contenido[len(cabecera):]))
+    except Exception as e:
+        logger.warning("Instantánea de caché corrupta '%s': %s", ruta, e)
+        return None
+
+    if clave != huella:
+        return None
+    return datos
+
+
+def _escribir_instantanea(
+    ruta: pathlib.Path,
+    huella: Dict[str, Any],
+    datos: List[Contacto]
+) -> None:
+    """Escribe una instantánea de forma atómica (archivo temporal + rename)."""
+    carga = zlib.compress(
+        pickle.dumps((huella, datos), protocol=pickle.HIGHEST_PROTOCOL)
+    )
+    temporal = ruta.with_suffix(ruta.suffix + ".tmp")
+    temporal.write_bytes(_MAGIC + bytes([_VERSION]) + carga)
+    os.replace(temporal, ruta)
+
+
+def limpiar_cache(
+    directorio: pathlib.Path,
+    max_edad: float = DEFAULT_MAX_EDAD,
+    max_bytes: int = DEFAULT_MAX_BYTES
+) -> int:
+    """
+    Aplica la política de expulsión de la caché.
+
+    Primero elimina las instantáneas más antiguas que max_edad y luego,
+    si el total sigue superando max_bytes, elimina las menos usadas
+    recientemente hasta quedar bajo el límite.
+
+    Args:
+        directorio: Carpeta de instantáneas
+        max_edad: Antigüedad máxima en segundos
+        max_bytes: Tamaño total máximo en bytes
+
+    Returns:
+        Cantidad de instantáneas eliminadas
+    """
+    if not directorio.is_dir():
+        return 0
+
+    ahora = time.time()
+    eliminadas = 0
+    vigentes = []
+
+    for instantanea in directorio.glob(f"*{_EXTENSION}"):
+        try:
+            info = instantanea.stat()
+        except FileNotFoundError:
+            continue
+        if ahora - info.st_mtime > max_edad:
+            instantanea.unlink(missing_ok=True)
+            eliminadas += 1
+        else:
+            vigentes.append((info.st_mtime, info.st_size, instantanea))
+
+    # Expulsar por tamaño, de la menos a la más recientemente usada
+    total = sum(tamano for _, tamano, _ in vigentes)
+    for _, tamano, instantanea in sorted(vigentes):
+        if total <= max_bytes:
+            break
+        instantanea.unlink(missing_ok=True)
+        total -= tamano
+        eliminadas += 1
+
+    if eliminadas:
+        logger.debug("Caché: %d instantáneas eliminadas", eliminadas)
+    return eliminadas
+
+
+def getDataConCache(
+    ruta: Optional[str] = None,
+    usar_cache: bool = True,
+    directorio: Optional[str] = None,
+    max_edad: float = DEFAULT_MAX_EDAD,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    procesos: int = 1
+) -> List[Contacto]:
+    """
+    Obtiene los datos del Excel reutilizando la instantánea en caché si es válida.
+
+    Es un envoltorio sobre iterDataConCache() que acumula los contactos en una lista.
+
+    Args:
+        ruta: Ruta al archivo Excel. Si es None se usa get_excel_path()
+        usar_cache: Si False, ignora la caché y procesa siempre el Excel
+        directorio: Carpeta de instantáneas (por defecto CACHE_DIRNAME junto al Excel)
+        max_edad: Antigüedad máxima de las instantáneas en segundos
+        max_bytes: Tamaño total máximo de la caché en bytes
+        procesos: Procesos entre los que repartir la lectura del Excel (ver iterData)
+
+    Returns:
+        Lista de contactos con el mismo formato que getData()
+
+    Note:
+        Los errores de la caché nunca interrumpen la carga: se registran
+        en el logger y se recurre a leer el Excel.
+    """
+    return list(iterDataConCache(ruta, usar_cache, directorio, max_edad, max_bytes,
+                                 procesos=procesos))
+
+
+def iterDataConCache(
+    ruta: Optional[str] = None,
+    usar_cache: bool = True,
+    directorio: Optional[str] = None,
+    max_edad: float = DEFAULT_MAX_EDAD,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    tamano_bloque: int = TAMANO_BLOQUE,
+    procesos: int = 1
+) -> Iterator[Contacto]:
+    """
+    Recorre los datos del Excel reutilizando la instantánea en caché si es válida.
+
+    Si la instantánea es válida se recorren sus contactos; si no, se
+    recorre iterData() entregando cada contacto apenas se lee, y la
+    instantánea se guarda al terminar el recorrido completo del Excel.
+
+    Args:
+        ruta: Ruta al archivo Excel. Si es None se usa get_excel_path()
+        usar_cache: Si False, ignora la caché y procesa siempre el Excel
+        directorio: Carpeta de instantáneas (por defecto CACHE_DIRNAME junto al Excel)
+        max_edad: Antigüedad máxima de las instantáneas en segundos
+        max_bytes: Tamaño total máximo de la caché en bytes
+        tamano_bloque: Filas por bloque de lectura (ver iterData)
+        procesos: Procesos entre los que repartir la lectura del Excel (ver iterData)
+
+    Yields:
+        Contactos con el mismo formato que getData()
+    """
+    ruta = ruta or get_excel_path()
+
+    if not usar_cache:
+        logger.info("Caché deshabilitada, procesando Excel completo")
+        yield from iterData(ruta, tamano_bloque, procesos)
+        return
+
+    try:
+        huella = huella_archivo(ruta)
+    except OSError:
+        # Archivo inexistente o ilegible: iterData registra el error
+        yield from iterData(ruta, tamano_bloque, procesos)
+        return
+
+    carpeta = (
+        pathlib.Path(directorio) if directorio
+        else pathlib.Path(huella["ruta"]).parent / CACHE_DIRNAME
+    )
+    instantanea = _ruta_instantanea(carpeta, huella)
+
+    datos = _leer_instantanea(instantanea, huella)
+    REGISTRO.incrementar("cache_consultas_total",
+                         resultado="acierto" if datos is not None else "fallo")
+    if datos is not None:
+        logger.info("Datos cargados desde caché: %s", instantanea)
+        # Marcar como usada recientemente para la política de expulsión
+        try:
+            os.utime(instantanea)
+        except OSError:
+            pass
+        yield from datos
+        return
+
+    datos = []
+    for contacto in iterData(ruta, tamano_bloque, procesos):
+        datos.append(contacto)
+        yield contacto
+    if not datos:
+        # No guardar resultados vacíos: pueden deberse a un error de lectura
+        return
+
+    try:
+        carpeta.mkdir(parents=True, exist_ok=True)
+        _escribir_instantanea(instantanea, huella, datos)
+        logger.info("Instantánea de caché guardada: %s", instantanea)
+        limpiar_cache(carpeta, max_edad=max_edad, max_bytes=max_bytes)
+    except OSError as e:
+        logger.warning("No se pudo guardar la caché en '%s': %s", carpeta, e)
@@ -19,7 +19,9 @@ def get_excel_path(
     ),
     defaults: Sequence[str] = (
         "Mensualidad.xlsx", 
-        "formulario postulacion (Respuestas).xlsx"
+        "formulario postulacion (Respuestas).xlsx",
+        "Mensualidad.csv",
+        "Mensualidad.parquet"
     )
 ) -> str:
     """
@@ -0,0 +1,209 @@
+"""
+Módulo de estado persistente de pagos entre ejecuciones.
+
+Guarda en una base SQLite el último estado de pago visto de cada contacto,
+identificado por su teléfono normalizado con formateo.formato (más su nombre
+y un número de ocurrencia, para distinguir a varios integrantes que comparten
+teléfono). Permite comparar una lectura nueva del Excel con la anterior y
+quedarse solo con los contactos cuyo estado cambió.
+"""
+
+import logging
+import pathlib
+import sqlite3
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .registros import Contacto
+
+logger = logging.getLogger(__name__)
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS contactos (
+    telefono TEXT NOT NULL,
+    nombre TEXT NOT NULL,
+    ocurrencia INTEGER NOT NULL,
+    cantidad_pagado INTEGER,
+    faltantes INTEGER,
+    dia_a_pagar TEXT,
+    mes_a_pagar TEXT,
+    actualizado REAL NOT NULL,
+    PRIMARY KEY (telefono, nombre, ocurrencia)
+)
+"""
+
+# Clave y estado de pago tal como se guardan en la base
+ClaveContacto = Tuple[str, str, int]
+EstadoContacto = Tuple[Any, Any, Any, Any]
+
+
+def ruta_estado_por_defecto(ruta_excel: str) -> str:
+    """
+    Devuelve la ruta de la base de estado asociada a un archivo Excel.
+
+    Args:
+        ruta_excel: Ruta al archivo Excel
+
+    Returns:
+        Ruta al archivo SQLite junto al Excel (ej: Mensualidad.estado.sqlite)
+    """
+    excel = pathlib.Path(ruta_excel)
+    return str(excel.with_name(f"{excel.stem}.estado.sqlite"))
+
+
+def _con_claves(
+    data: Iterable[Contacto]
+) -> Iterator[Tuple[ClaveContacto, Contacto]]:
+    """
+    Asocia a cada contacto su clave en la base.
+
+    La clave es (teléfono normalizado, nombre, ocurrencia), donde ocurrencia
+    numera las filas repetidas con el mismo teléfono y nombre.
+
+    Args:
+        data: Contactos en el orden del Excel
+
+    Yields:
+        Tuplas (clave, contacto)
+    """
+    vistos: Counter = Counter()
+    for contacto in data:
+        base = (contacto.telefono or "", contacto.nombre or "")
+        yield base + (vistos[base],), contacto
+        vistos[base] += 1
+
+
+def _estado(contacto: Contacto) -> EstadoContacto:
+    """Extrae el estado de pago comparable de un contacto."""
+    return contacto.pagos.clave()
+
+
+class EstadoPagos:
+    """
+    Almacén SQLite del último estado de pago visto de cada contacto.
+
+    Example:
+        >>> with EstadoPagos("Mensualidad.estado.sqlite") as estado:
+        ...     cambios = estado.cambios(data)
+        ...     estado.guardar(data)
+    """
+
+    def __init__(self, ruta: str) -> None:
+        """
+        Abre (o crea) la base de estado.
+
+        Args:
+            ruta: Ruta al archivo SQLite
+        """
+        self.ruta = ruta
+        self._conexion = sqlite3.connect(ruta)
+        self._conexion.execute(_ESQUEMA)
+        self._conexion.commit()
+
+    def __enter__(self) -> "EstadoPagos":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.cerrar()
+
+    def cerrar(self) -> None:
+        """Cierra la conexión con la base."""
+        self._conexion.close()
+
+    def _cargar(self) -> Dict[ClaveContacto, EstadoContacto]:
+        """Carga todo el estado guardado en memoria con una sola consulta."""
+        filas = self._conexion.execute(
+            "SELECT telefono, nombre, ocurrencia, cantidad_pagado, faltantes, "
+            "dia_a_pagar, mes_a_pagar FROM contactos"
+        )
+        return {tuple(fila[:3]): tuple(fila[3:]) for fila in filas}
+
+    def cambios(self, data: Iterable[Contacto]) -> List[Contacto]:
+        """
+        Filtra los contactos cuyo estado de pago cambió desde la última ejecución.
+
+        Se consideran cambiados los contactos que no estaban en la base
+        (recién atrasados o nuevos) y aquellos cuyo estado de pago es distinto
+        al guardado.
+
+        Args:
+            data: Contactos leídos en la ejecución actual
+
+        Returns:
+            Lista de contactos con cambios, en el mismo orden de entrada
+        """
+        return list(self.iter_cambios(data))
+
+    def iter_cambios(self, data: Iterable[Contacto]) -> Iterator[Contacto]:
+        """
+        Versión en flujo de cambios(), para filtrar los contactos a medida que se leen.
+
+        El estado guardado se carga al llamar a este método, por lo que el
+        iterador devuelto puede recorrerse desde otro hilo sin usar la
+        conexión SQLite.
+
+        Args:
+            data: Contactos leídos en la ejecución actual (puede ser un iterador)
+
+        Returns:
+            Iterador de los contactos con cambios, en el mismo orden de entrada
+        """
+        return self._filtrar_cambios(data, self._cargar())
+
+    @staticmethod
+    def _filtrar_cambios(
+        data: Iterable[Contacto],
+        anterior: Dict[ClaveContacto, EstadoContacto]
+    ) -> Iterator[Contacto]:
+        """Entrega los contactos cuyo estado difiere del estado anterior."""
+        cambiados = 0
+        nuevos = 0
+
+        for clave, contacto in _con_claves(data):
+            previo = anterior.get(clave)
+            if previo is None:
+                nuevos += 1
+            elif previo == _estado(contacto):
+                continue
+            cambiados += 1
+            yield contacto
+
+        logger.info("Estado: %d contactos con cambios (%d nuevos atrasados)",
+                    cambiados, nuevos)
+
+    def guardar(
+        self,
+        data: Iterable[Contacto],
+        pendientes: Optional[Iterable[Contacto]] = None
+    ) -> None:
+        """
+        Reemplaza el estado guardado por el de la ejecución actual.
+
+        Los contactos que ya no aparecen (al día o inactivos) se eliminan,
+        de modo que si vuelven a atrasarse se detectan como nuevos.
+
+        Args:
+            data: Todos los contactos leídos en la ejecución actual
+            pendientes: Contactos cuyo mensaje no se pudo enviar; conservan su
+                estado anterior para volver a detectarse en la próxima ejecución
+        """
+        omitir = {id(c) for c in pendientes or ()}
+        anterior = self._cargar()
+        ahora = time.time()
+
+        filas = []
+        for clave, contacto in _con_claves(data):
+            if id(contacto) in omitir:
+                if clave in anterior:
+                    filas.append(clave + anterior[clave] + (ahora,))
+                continue
+            filas.append(clave + _estado(contacto) + (ahora,))
+
+        with self._conexion:
+            self._conexion.execute("DELETE FROM contactos")
+            self._conexion.executemany(
+                "INSERT OR REPLACE INTO contactos VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                filas
+            )
+        logger.info("Estado guardado: %d contactos en %s", len(filas), self.ruta)
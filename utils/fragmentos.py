@@ -0,0 +1,545 @@
+"""
+Módulo de envío fragmentado entre varios emisores en paralelo.
+
+Un solo emisor de WhatsApp Web maneja un teclado y un navegador, por lo que
+no puede enviar más de un mensaje a la vez. TransporteFragmentado reparte
+los envíos entre N procesos emisores aislados:
+
+- Cada emisor corre en su propio proceso, con su propia pantalla virtual
+  Xvfb (variable DISPLAY) para que las acciones de pyautogui de un emisor
+  no se mezclen con las de otro
+- Cada emisor abre el navegador con su propio perfil (--user-data-dir),
+  vinculado una vez a WhatsApp Web, de modo que las sesiones no se pisan
+- El coordinador (el proceso principal) entrega cada envío al primer
+  emisor libre, por lo que la carga queda balanceada aunque algunos envíos
+  tarden más que otros, y recoge los resultados en el orden en que llegan
+
+Con el transporte "nulo" (y la latencia de WSP_NULO_LATENCIA) los emisores
+no abren pantallas ni navegadores, lo que permite probar el reparto en un
+servidor Linux sin pantalla.
+
+La configuración se lee de las variables de entorno WSP_NAVEGADOR (comando
+del navegador, por defecto el primer Chrome/Chromium instalado) y
+WSP_PERFILES_DIR (carpeta de perfiles, por defecto ~/.mensaje_automatico/perfiles).
+"""
+
+import concurrent.futures
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import shutil
+import subprocess
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from .bitacora_envios import Envio
+from .metricas import REGISTRO
+from .planificador import LimitadorEnvios
+from .transporte import (
+    AntesEnvio,
+    DespuesEnvio,
+    Transporte,
+    TransporteGUI,
+    TransporteNulo,
+    _sin_gancho,
+)
+from .wsp_message import ControladorGUI
+
+logger = logging.getLogger(__name__)
+
+# Variables de entorno
+NAVEGADOR_ENV = "WSP_NAVEGADOR"
+PERFILES_DIR_ENV = "WSP_PERFILES_DIR"
+
+# Configuraciones por defecto
+NAVEGADORES = ("google-chrome", "chromium", "chromium-browser")
+DEFAULT_PERFILES_DIR = os.path.join("~", ".mensaje_automatico", "perfiles")
+DEFAULT_RESOLUCION = (1920, 1080)  # Tamaño de cada pantalla virtual
+DEFAULT_TIMEOUT_CIERRE = 15.0  # Espera máxima al cierre de cada emisor (segundos)
+_INTERVALO_REVISION = 0.5  # Cada cuánto se revisa que los emisores sigan vivos
+
+# Eventos que los emisores envían al coordinador
+_LISTO = "listo"
+_FIN = "fin"
+_ERROR = "error"
+
+# Evento: (tipo, fragmento, identificador del envío, éxito, error); el
+# éxito es None si no se sabe si el mensaje llegó
+Evento = Tuple[str, int, Optional[int], Optional[bool], Optional[str]]
+
+
+@dataclass(frozen=True)
+class ConfigFragmento:
+    """
+    Configuración de un emisor, enviada a su proceso al iniciarlo.
+
+    Attributes:
+        indice: Número del emisor (desde 0)
+        transporte: "gui" o "nulo"
+        sesion: Para "gui", mantiene una sola pestaña de WhatsApp Web abierta
+        pantalla: DISPLAY de la pantalla virtual del emisor (solo "gui")
+        perfil: Carpeta del perfil de navegador del emisor (solo "gui")
+        navegador: Comando del navegador (solo "gui")
+        latencia: Segundos que simula tardar cada envío (solo "nulo")
+    """
+    indice: int
+    transporte: str
+    sesion: bool = False
+    pantalla: Optional[str] = None
+    perfil: Optional[str] = None
+    navegador: Optional[str] = None
+    latencia: float = 0.0
+
+
+class PantallaVirtual:
+    """
+    Servidor X virtual (Xvfb) para un emisor.
+
+    El número de pantalla lo elige Xvfb (-displayfd), por lo que varias
+    pantallas pueden convivir con las de otros programas sin chocar.
+
+    Args:
+        ancho: Ancho de la pantalla en píxeles
+        alto: Alto de la pantalla en píxeles
+
+    Example:
+        >>> with PantallaVirtual() as pantalla:
+        ...     pantalla.display
+        ':1'
+    """
+
+    def __init__(self, ancho: int = DEFAULT_RESOLUCION[0], alto: int = DEFAULT_RESOLUCION[1]):
+        self.ancho = ancho
+        self.alto = alto
+        self.display: Optional[str] = None
+        self._proceso: Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> "PantallaVirtual":
+        self.iniciar()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.detener()
+
+    def iniciar(self) -> str:
+        """
+        Inicia Xvfb y espera a que informe su número de pantalla.
+
+        Returns:
+            Valor de DISPLAY de la pantalla (ej: ":1")
+
+        Raises:
+            ValueError: Si Xvfb no está instalado
+            OSError: Si Xvfb no pudo iniciar
+        """
+        ejecutable = shutil.which("Xvfb")
+        if ejecutable is None:
+            raise ValueError("Xvfb no está instalado (por ejemplo: apt install xvfb)")
+
+        lectura, escritura = os.pipe()
+        try:
+            self._proceso = subprocess.Popen(
+                [ejecutable, "-displayfd", str(escritura), "-nolisten", "tcp",
+                 "-screen", "0", f"{self.ancho}x{self.alto}x24"],
+                pass_fds=(escritura,),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        finally:
+            os.close(escritura)
+
+        # Xvfb escribe el número de pantalla cuando está listo para conexiones;
+        # si falla al iniciar, el pipe se cierra sin datos
+        with os.fdopen(lectura) as pipe:
+            numero = pipe.readline().strip()
+        if not numero:
+            self.detener()
+            raise OSError("Xvfb no pudo iniciar una pantalla virtual")
+
+        self.display = f":{numero}"
+        logger.debug("Pantalla virtual %s iniciada", self.display)
+        return self.display
+
+    def detener(self) -> None:
+        """Detiene Xvfb."""
+        if self._proceso is None:
+            return
+        self._proceso.terminate()
+        try:
+            self._proceso.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self._proceso.kill()
+            self._proceso.wait()
+        self._proceso = None
+
+
+class ControladorNavegador(ControladorGUI):
+    """
+    Acciones de interfaz de un emisor: abre las URL en su propio perfil.
+
+    El primer abrir() inicia el navegador con el perfil del emisor en la
+    pantalla del proceso (DISPLAY); los siguientes abren una pestaña nueva
+    en esa misma ventana. Pegar y presionar teclas usan pyautogui como
+    ControladorGUI, sobre la pantalla virtual del emisor.
+
+    Args:
+        navegador: Comando del navegador (Chrome o Chromium)
+        perfil: Carpeta del perfil (--user-data-dir)
+        resolucion: Tamaño de la ventana, igual al de la pantalla virtual
+    """
+
+    def __init__(
+        self,
+        navegador: str,
+        perfil: str,
+        resolucion: Tuple[int, int] = DEFAULT_RESOLUCION
+    ) -> None:
+        self.navegador = navegador
+        self.perfil = perfil
+        self.resolucion = resolucion
+
+    def abrir(self, url: str) -> None:
+        """Abre una URL en el navegador del perfil del emisor."""
+        # La ventana cubre toda la pantalla: sin gestor de ventanas, el
+        # teclado va a la ventana que está bajo el puntero
+        subprocess.Popen(
+            [self.navegador, f"--user-data-dir={self.perfil}", "--no-first-run",
+             "--no-default-browser-check", "--window-position=0,0",
+             f"--window-size={self.resolucion[0]},{self.resolucion[1]}", url],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+
+def navegador_desde_entorno() -> str:
+    """
+    Busca el comando del navegador de los emisores.
+
+    Returns:
+        Valor de WSP_NAVEGADOR, o el primer navegador de NAVEGADORES instalado
+
+    Raises:
+        ValueError: Si no se encontró ningún navegador
+    """
+    configurado = os.getenv(NAVEGADOR_ENV, "").strip()
+    if configurado:
+        return configurado
+    for nombre in NAVEGADORES:
+        ruta = shutil.which(nombre)
+        if ruta:
+            return ruta
+    raise ValueError(f"No se encontró Chrome ni Chromium; definir {NAVEGADOR_ENV}")
+
+
+def _crear_transporte_emisor(config: ConfigFragmento) -> Transporte:
+    """Crea el transporte de un emisor dentro de su proceso."""
+    if config.transporte == "nulo":
+        return TransporteNulo(config.latencia)
+    return TransporteGUI(
+        sesion=config.sesion,
+        controlador=ControladorNavegador(config.navegador, config.perfil)
+    )
+
+
+def _emisor(
+    config: ConfigFragmento,
+    tareas: "multiprocessing.Queue[Any]",
+    eventos: "multiprocessing.Queue[Evento]"
+) -> None:
+    """
+    Proceso emisor: envía los mensajes que le entrega el coordinador.
+
+    Args:
+        config: Configuración del emisor
+        tareas: Cola de tuplas (identificador, teléfono, mensaje); None termina
+        eventos: Cola compartida de eventos hacia el coordinador
+    """
+    # DISPLAY debe quedar definido antes de que se cargue pyautogui
+    if config.pantalla is not None:
+        os.environ["DISPLAY"] = config.pantalla
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f"%(asctime)s %(levelname)s [emisor {config.indice}] %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S"
+    )
+
+    try:
+        transporte = _crear_transporte_emisor(config)
+    except Exception as e:
+        eventos.put((_ERROR, config.indice, None, False, str(e)))
+        return
+
+    with transporte:
+        eventos.put((_LISTO, config.indice, None, True, None))
+        while True:
+            tarea = tareas.get()
+            if tarea is None:
+                return
+            identificador, telefono, mensaje = tarea
+            error = None
+            try:
+                exito = transporte.enviar(telefono, mensaje)
+                if exito is None:
+                    error = f"el emisor {config.indice} no confirmó si el mensaje llegó"
+                elif not exito:
+                    error = f"el emisor {config.indice} no pudo completar el envío"
+            except Exception as e:
+                exito, error = False, str(e)
+            eventos.put((_FIN, config.indice, identificador, exito, error))
+
+
+class TransporteFragmentado(Transporte):
+    """
+    Transporte que reparte los envíos entre varios procesos emisores.
+
+    Cada emisor tiene su pantalla virtual y su perfil de navegador (con el
+    transporte "gui") y envía un mensaje a la vez; el coordinador entrega
+    cada envío al primer emisor libre. Si un emisor muere, su envío en
+    curso se informa como desconocido (pudo haber salido) y el resto sigue
+    con los demás.
+
+    Los perfiles deben vincularse una vez a WhatsApp Web, abriendo el
+    navegador con cada perfil en una pantalla visible y escaneando el QR:
+        google-chrome --user-data-dir=~/.mensaje_automatico/perfiles/emisor_0
+
+    Args:
+        fragmentos: Cantidad de emisores
+        transporte: Transporte de cada emisor: "gui" o "nulo"
+        sesion: Para "gui", cada emisor mantiene una sola pestaña abierta
+        latencia: Para "nulo", segundos que simula tardar cada envío
+        perfiles: Carpeta de perfiles (por defecto WSP_PERFILES_DIR)
+
+    Raises:
+        ValueError: Si falta Xvfb o el navegador, o el transporte no es válido
+        OSError: Si no se pudo iniciar una pantalla virtual
+
+    Example:
+        >>> with TransporteFragmentado(4, "nulo", latencia=0.5) as transporte:
+        ...     transporte.enviar_lote(envios)
+        [True, True, True, True, True, True, True, True]
+    """
+
+    def __init__(
+        self,
+        fragmentos: int,
+        transporte: str = "gui",
+        sesion: bool = False,
+        latencia: float = 0.0,
+        perfiles: Optional[str] = None
+    ) -> None:
+        if transporte not in ("gui", "nulo"):
+            raise ValueError(f"Transporte no fragmentable: {transporte!r}")
+        if fragmentos < 1:
+            raise ValueError("La cantidad de fragmentos debe ser positiva")
+
+        self.nombre = transporte
+        self.max_en_vuelo = fragmentos
+        self._contexto = multiprocessing.get_context("spawn")
+        self._eventos: "multiprocessing.Queue[Evento]" = self._contexto.Queue()
+        self._tareas: List["multiprocessing.Queue[Any]"] = []
+        self._procesos: List[multiprocessing.Process] = []
+        self._pantallas: List[PantallaVirtual] = []
+        self._libres: "queue.Queue[int]" = queue.Queue()
+        self._pendientes: Dict[int, "concurrent.futures.Future[Tuple[Optional[bool], Optional[str]]]"] = {}
+        self._asignados: Dict[int, int] = {}  # emisor -> envío en curso
+        self._caidos: Set[int] = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._cerrado = threading.Event()
+
+        try:
+            navegador = navegador_desde_entorno() if transporte == "gui" else None
+            carpeta = os.path.expanduser(
+                perfiles or os.getenv(PERFILES_DIR_ENV, "").strip() or DEFAULT_PERFILES_DIR
+            )
+            for indice in range(fragmentos):
+                config = ConfigFragmento(indice, transporte, sesion, latencia=latencia)
+                if transporte == "gui":
+                    pantalla = PantallaVirtual()
+                    self._pantallas.append(pantalla)
+                    perfil = os.path.join(carpeta, f"emisor_{indice}")
+                    os.makedirs(perfil, exist_ok=True)
+                    config = ConfigFragmento(indice, transporte, sesion,
+                                             pantalla=pantalla.iniciar(), perfil=perfil,
+                                             navegador=navegador)
+                self._iniciar_emisor(config)
+        except Exception:
+            self.cerrar()
+            raise
+
+        self._colector = threading.Thread(
+            target=self._recolectar, name="fragmentos-colector", daemon=True
+        )
+        self._colector.start()
+        logger.info("Envío fragmentado: %d emisores con transporte %s",
+                    fragmentos, transporte)
+
+    def _iniciar_emisor(self, config: ConfigFragmento) -> None:
+        """Lanza el proceso de un emisor."""
+        tareas = self._contexto.Queue()
+        proceso = self._contexto.Process(
+            target=_emisor,
+            args=(config, tareas, self._eventos),
+            name=f"emisor-{config.indice}",
+            daemon=True,
+        )
+        proceso.start()
+        self._tareas.append(tareas)
+        self._procesos.append(proceso)
+
+    def _recolectar(self) -> None:
+        """Hilo colector: procesa los eventos de los emisores."""
+        while not self._cerrado.is_set():
+            try:
+                tipo, emisor, identificador, exito, error = self._eventos.get(
+                    timeout=_INTERVALO_REVISION
+                )
+            except queue.Empty:
+                self._revisar_emisores()
+                continue
+            except (EOFError, OSError):
+                return
+
+            if tipo == _LISTO:
+                logger.info("Emisor %d listo", emisor)
+                self._libres.put(emisor)
+            elif tipo == _ERROR:
+                logger.error("El emisor %d no pudo iniciar: %s", emisor, error)
+                self._marcar_caido(emisor)
+            elif tipo == _FIN:
+                with self._lock:
+                    self._asignados.pop(emisor, None)
+                    futuro = self._pendientes.pop(identificador, None)
+                REGISTRO.incrementar("fragmento_envios_total", emisor=emisor,
+                                     resultado="ok" if exito else "error" if exito is False
+                                     else "desconocido")
+                self._libres.put(emisor)
+                if futuro is not None:
+                    futuro.set_result((exito, error))
+
+    def _revisar_emisores(self) -> None:
+        """Detecta emisores caídos y da por desconocidos sus envíos en curso."""
+        for indice, proceso in enumerate(self._procesos):
+            if indice not in self._caidos and not proceso.is_alive():
+                logger.error("El emisor %d terminó inesperadamente (código %s)",
+                             indice, proceso.exitcode)
+                self._marcar_caido(indice)
+
+    def _marcar_caido(self, emisor: int) -> None:
+        """Saca a un emisor del reparto; su envío en curso queda desconocido."""
+        with self._lock:
+            self._caidos.add(emisor)
+            identificador = self._asignados.pop(emisor, None)
+            futuro = self._pendientes.pop(identificador, None)
+        if futuro is not None:
+            # El emisor pudo haber enviado el mensaje antes de terminar
+            futuro.set_result((None, f"el emisor {emisor} terminó inesperadamente"))
+
+    def _activos(self) -> bool:
+        """Indica si queda algún emisor que no haya caído."""
+        return len(self._caidos) < len(self._procesos)
+
+    def _despachar(
+        self,
+        telefono: str,
+        mensaje: str
+    ) -> "concurrent.futures.Future[Tuple[Optional[bool], Optional[str]]]":
+        """
+        Entrega un envío al primer emisor libre.
+
+        Returns:
+            Futuro con la tupla (exito, error) del envío
+        """
+        futuro: "concurrent.futures.Future[Tuple[Optional[bool], Optional[str]]]" = (
+            concurrent.futures.Future()
+        )
+        while True:
+            if not self._activos() or self._cerrado.is_set():
+                futuro.set_result((False, "no quedan emisores activos"))
+                return futuro
+            try:
+                emisor = self._libres.get(timeout=_INTERVALO_REVISION)
+            except queue.Empty:
+                continue
+            if emisor not in self._caidos:
+                break
+
+        identificador = next(self._ids)
+        with self._lock:
+            self._pendientes[identificador] = futuro
+            self._asignados[emisor] = identificador
+        self._tareas[emisor].put((identificador, telefono, mensaje))
+        return futuro
+
+    def enviar(self, telefono: str, mensaje: str) -> Optional[bool]:
+        exito, error = self._despachar(telefono, mensaje).result()
+        if exito is None:
+            logger.warning("No se sabe si llegó el mensaje a %s: %s", telefono, error)
+        elif not exito:
+            logger.error("Error enviando mensaje a %s: %s", telefono, error)
+        return exito
+
+    def enviar_lote(
+        self,
+        envios: Sequence[Envio],
+        antes: AntesEnvio = _sin_gancho,
+        despues: DespuesEnvio = _sin_gancho,
+        limitador: Optional[LimitadorEnvios] = None
+    ) -> List[Optional[bool]]:
+        """
+        Reparte los envíos entre los emisores, con uno en curso por emisor.
+
+        Los ganchos y el planificador corren en el hilo que llama, de modo
+        que la bitácora SQLite se sigue usando desde un solo hilo.
+        """
+        resultados: List[Optional[bool]] = [False] * len(envios)
+        en_curso: Dict["concurrent.futures.Future[Any]", int] = {}
+
+        def completar() -> None:
+            hechos, _ = concurrent.futures.wait(
+                en_curso, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for futuro in hechos:
+                posicion = en_curso.pop(futuro)
+                exito, error = futuro.result()
+                resultados[posicion] = exito
+                despues(envios[posicion], exito, error)
+
+        for posicion, envio in enumerate(envios):
+            while len(en_curso) >= self.max_en_vuelo:
+                completar()
+            if limitador is not None:
+                limitador.esperar()
+            antes(envio)
+            en_curso[self._despachar(envio.telefono, envio.mensaje)] = posicion
+        while en_curso:
+            completar()
+        return resultados
+
+    def cerrar(self) -> None:
+        """Detiene los emisores, sus pantallas virtuales y el colector."""
+        for tareas, proceso in zip(self._tareas, self._procesos):
+            if proceso.is_alive():
+                tareas.put(None)
+        for proceso in self._procesos:
+            proceso.join(DEFAULT_TIMEOUT_CIERRE)
+            if proceso.is_alive():
+                logger.warning("El emisor %s no terminó a tiempo, se detiene", proceso.name)
+                proceso.terminate()
+                proceso.join()
+        self._cerrado.set()
+
+        # Los envíos despachados que quedaron sin respuesta pudieron haber
+        # llegado: se informan como desconocidos
+        with self._lock:
+            pendientes = list(self._pendientes.values())
+            self._pendientes.clear()
+        for futuro in pendientes:
+            futuro.set_result((None, "transporte fragmentado cerrado sin respuesta del emisor"))
+
+        for pantalla in self._pantallas:
+            pantalla.detener()
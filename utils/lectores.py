@@ -0,0 +1,288 @@
+"""
+Módulo de lectores de archivos de entrada.
+
+manejo_archivo.iterData no lee el archivo directamente: pide a este módulo
+el lector registrado para la extensión del archivo. Cada lector entrega las
+filas con la misma forma que la planilla Excel (tuplas de valores, con los
+meses en la fila 1, los días y el marcador "Contador" en la fila 2 y los
+contactos desde la fila 3), de modo que el procesamiento y los registros
+resultantes son los mismos sin importar el formato.
+
+Lectores incluidos:
+    - .xlsx / .xlsm: openpyxl en modo solo lectura (el más lento)
+    - .csv: módulo csv en streaming, con separador "," o ";" detectado
+      automáticamente y codificación UTF-8 o Windows-1252
+    - .tsv / .tab: igual que .csv con tabulador como separador
+    - .parquet / .pq: lectura por columnas con pyarrow (opcional); los
+      meses y días salen de los nombres de columna (ver _filas_parquet)
+
+Para agregar un formato basta con decorar una función con registrar_lector.
+
+Los formatos que pueden leer un rango de filas y declaran su tamaño
+registran además un LectorRangos (ver registrar_lector_rangos), que
+manejo_archivo usa para repartir la lectura entre varios procesos. Por
+ahora solo Excel, el formato más lento de procesar.
+"""
+
+import codecs
+import csv
+import logging
+import pathlib
+from typing import (
+    Any, Callable, Dict, Generator, List, NamedTuple, Optional, Sequence, Tuple
+)
+
+from .metricas import REGISTRO
+
+logger = logging.getLogger(__name__)
+
+# Fila de valores tal como la entrega openpyxl en modo solo lectura
+Fila = Sequence[Any]
+
+# Lector: recibe la ruta y entrega las filas del archivo en orden; el archivo
+# se abre en la primera fila y se cierra al agotar o cerrar el generador
+Lector = Callable[[str], Generator[Fila, None, None]]
+
+# Lectores registrados por extensión (en minúsculas, con el punto)
+LECTORES: Dict[str, Lector] = {}
+
+
+class LectorRangos(NamedTuple):
+    """Lectura por rangos de filas de un formato, para procesarlo en paralelo."""
+    # Recibe la ruta y devuelve la última fila del archivo, o None si no se
+    # puede saber sin recorrerlo completo
+    total_filas: Callable[[str], Optional[int]]
+    # Recibe la ruta y las filas inicial y final (desde 1, inclusive) y
+    # entrega esas filas en orden, incluidas las vacías
+    filas: Callable[[str, int, int], Generator[Fila, None, None]]
+
+
+# Lectores por rangos registrados por extensión
+LECTORES_RANGOS: Dict[str, LectorRangos] = {}
+
+# Configuraciones por defecto
+MUESTRA_CSV = 64 * 1024  # Bytes leídos para detectar separador y codificación
+SEPARADORES_CSV = ",;"  # Separadores aceptados en archivos .csv
+FILAS_POR_LOTE_PARQUET = 4096  # Filas convertidas a Python de una vez
+MARCADOR_CONTADOR = "Contador"  # Columna que cierra las columnas de pago
+COLUMNAS_CONTACTO = 4  # Número, nombre, teléfono y estado, antes de los pagos
+
+# Booleanos de Excel tal como quedan al exportar a CSV
+_BOOLEANOS_CSV = {"TRUE": True, "FALSE": False}
+
+
+def registrar_lector(*extensiones: str) -> Callable[[Lector], Lector]:
+    """
+    Registra un lector para una o más extensiones de archivo.
+
+    Example:
+        >>> @registrar_lector(".json")
+        ... def _filas_json(ruta):
+        ...     yield from json.load(open(ruta))
+    """
+    def decorador(lector: Lector) -> Lector:
+        for extension in extensiones:
+            LECTORES[extension.lower()] = lector
+        return lector
+    return decorador
+
+
+def registrar_lector_rangos(lector: LectorRangos, *extensiones: str) -> None:
+    """Registra la lectura por rangos de filas para una o más extensiones."""
+    for extension in extensiones:
+        LECTORES_RANGOS[extension.lower()] = lector
+
+
+def lector_rangos_para(ruta: str) -> Optional[LectorRangos]:
+    """
+    Obtiene la lectura por rangos correspondiente a la extensión de un archivo.
+
+    Returns:
+        Lector por rangos registrado, o None si el formato solo se lee completo
+    """
+    return LECTORES_RANGOS.get(pathlib.Path(ruta).suffix.lower())
+
+
+def lector_para(ruta: str) -> Lector:
+    """
+    Obtiene el lector correspondiente a la extensión de un archivo.
+
+    Args:
+        ruta: Ruta al archivo de entrada
+
+    Returns:
+        Lector registrado para la extensión
+
+    Raises:
+        ValueError: Si la extensión no tiene un lector registrado
+    """
+    extension = pathlib.Path(ruta).suffix.lower()
+    lector = LECTORES.get(extension)
+    if lector is None:
+        soportadas = ", ".join(sorted(LECTORES))
+        raise ValueError(
+            f"Formato de archivo no soportado: {extension or ruta!r} "
+            f"(soportados: {soportadas})"
+        )
+    return lector
+
+
+@registrar_lector(".xlsx", ".xlsm")
+def _filas_xlsx(ruta: str) -> Generator[Fila, None, None]:
+    """Recorre la hoja activa de un libro Excel con openpyxl en modo streaming."""
+    # Importación diferida: openpyxl solo se carga al leer un libro Excel
+    import openpyxl
+
+    with REGISTRO.etapa("carga_libro"):
+        excel = openpyxl.load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        yield from excel.active.iter_rows(values_only=True)
+    finally:
+        excel.close()
+
+
+def _total_filas_xlsx(ruta: str) -> Optional[int]:
+    """Última fila de la hoja activa según la dimensión declarada en el libro."""
+    import openpyxl
+
+    excel = openpyxl.load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        # Sin la etiqueta <dimension> openpyxl no conoce el tamaño (max_row None)
+        return excel.active.max_row
+    finally:
+        excel.close()
+
+
+def _filas_rango_xlsx(ruta: str, inicio: int, fin: int) -> Generator[Fila, None, None]:
+    """
+    Recorre las filas inicio a fin de la hoja activa de un libro Excel.
+
+    openpyxl no puede saltar filas: las anteriores a inicio se interpretan
+    igual y se descartan, y la lectura se detiene al pasar la fila fin.
+    """
+    import openpyxl
+
+    excel = openpyxl.load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        yield from excel.active.iter_rows(min_row=inicio, max_row=fin, values_only=True)
+    finally:
+        excel.close()
+
+
+registrar_lector_rangos(LectorRangos(_total_filas_xlsx, _filas_rango_xlsx), ".xlsx", ".xlsm")
+
+
+def _codificacion(muestra: bytes) -> str:
+    """
+    Detecta la codificación de un archivo de texto a partir de su comienzo.
+
+    Returns:
+        "utf-8-sig" si la muestra es UTF-8 válido (con o sin BOM), o
+        "cp1252", la codificación de los CSV de Excel en Windows en español
+    """
+    try:
+        # Decodificador incremental: tolera un carácter cortado al final
+        codecs.getincrementaldecoder("utf-8")().decode(muestra, final=False)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "cp1252"
+
+
+def _valor_csv(valor: str) -> Any:
+    """Convierte una celda de texto al valor que entregaría openpyxl."""
+    if valor == "":
+        return None
+    return _BOOLEANOS_CSV.get(valor, valor)
+
+
+def _filas_texto(ruta: str, separador: Optional[str]) -> Generator[Fila, None, None]:
+    """
+    Recorre un archivo de texto delimitado fila por fila.
+
+    Args:
+        ruta: Ruta al archivo
+        separador: Separador de columnas, o None para detectarlo entre
+            SEPARADORES_CSV
+    """
+    with open(ruta, "rb") as archivo:
+        muestra = archivo.read(MUESTRA_CSV)
+    codificacion = _codificacion(muestra)
+
+    if separador is None:
+        texto = muestra.decode(codificacion, errors="ignore")
+        try:
+            separador = csv.Sniffer().sniff(texto, delimiters=SEPARADORES_CSV).delimiter
+        except csv.Error:
+            separador = SEPARADORES_CSV[0]
+    logger.debug("Leyendo %s con separador %r y codificación %s",
+                 ruta, separador, codificacion)
+
+    with open(ruta, newline="", encoding=codificacion) as archivo:
+        for fila in csv.reader(archivo, delimiter=separador):
+            yield tuple(map(_valor_csv, fila))
+
+
+@registrar_lector(".csv")
+def _filas_csv(ruta: str) -> Generator[Fila, None, None]:
+    """Recorre un CSV con el separador detectado automáticamente."""
+    return _filas_texto(ruta, None)
+
+
+@registrar_lector(".tsv", ".tab")
+def _filas_tsv(ruta: str) -> Generator[Fila, None, None]:
+    """Recorre un archivo separado por tabuladores."""
+    return _filas_texto(ruta, "\t")
+
+
+def _cabeceras_desde_columnas(nombres: Sequence[str]) -> Tuple[List[Any], List[Any]]:
+    """
+    Arma las filas 1 y 2 de la planilla a partir de los nombres de columna.
+
+    Las columnas de pago se llaman "<Mes> <Día>" (ej: "Marzo 5") y terminan
+    en la columna "Contador"; las primeras COLUMNAS_CONTACTO columnas son
+    número, nombre, teléfono y estado, con cualquier nombre.
+
+    Returns:
+        Tupla (fila de meses, fila de días)
+    """
+    meses: List[Any] = [None] * min(COLUMNAS_CONTACTO, len(nombres))
+    dias: List[Any] = list(meses)
+    for nombre in nombres[COLUMNAS_CONTACTO:]:
+        if nombre == MARCADOR_CONTADOR:
+            meses.append(None)
+            dias.append(MARCADOR_CONTADOR)
+            break
+        mes, _, dia = str(nombre).rpartition(" ")
+        meses.append(mes or None)
+        dias.append(dia)
+    return meses, dias
+
+
+@registrar_lector(".parquet", ".pq")
+def _filas_parquet(ruta: str) -> Generator[Fila, None, None]:
+    """
+    Recorre un archivo Parquet por lotes de columnas con pyarrow.
+
+    A diferencia de CSV, Parquet exige un tipo por columna, por lo que las
+    filas de meses y días no van como datos: se obtienen de los nombres de
+    columna (ver _cabeceras_desde_columnas). Cada lote se convierte a
+    Python columna por columna, que es mucho más rápido que fila por fila.
+
+    Raises:
+        ImportError: Si pyarrow no está instalado
+    """
+    # Importación diferida: pyarrow es opcional y tarda en cargarse
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Leer archivos Parquet requiere pyarrow (pip install \".[parquet]\")")
+
+    with REGISTRO.etapa("carga_libro"):
+        archivo = pq.ParquetFile(ruta)
+    try:
+        yield from _cabeceras_desde_columnas(archivo.schema_arrow.names)
+        for lote in archivo.iter_batches(batch_size=FILAS_POR_LOTE_PARQUET):
+            columnas = [columna.to_pylist() for columna in lote.columns]
+            yield from zip(*columnas)
+    finally:
+        archivo.close()
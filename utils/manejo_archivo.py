@@ -3,98 +3,146 @@ Módulo de manejo de archivos Excel.
 
 Este módulo contiene funciones para leer y procesar datos desde archivos Excel,
 específicamente diseñado para manejar información de contactos y datos de pagos.
+Además de Excel acepta CSV, TSV y Parquet con la misma estructura: el lector
+de cada formato se elige por la extensión del archivo (ver lectores.py).
+
+Los libros Excel grandes pueden procesarse en varios procesos (ver iterData
+con procesos > 1): cada proceso abre el libro, lee un rango de filas y
+calcula sus contactos, y los resultados se entregan en orden de fila.
 """
 
+import concurrent.futures
 import logging
-from typing import Dict, List, Optional, Any
-
-import openpyxl
-from openpyxl.worksheet.worksheet import Worksheet
+import math
+import multiprocessing
+from dataclasses import dataclass
+from typing import Any, Dict, Generator, Iterator, List, NamedTuple, Optional, Tuple
 
 from .env_loader import get_excel_path
 from .formateo import formato, mayuscula
+from .lectores import Fila, lector_para, lector_rangos_para
+from .metricas import REGISTRO
+from .motor_pagos import VALORES_VERDADEROS, calcular_pagos, en_bloques
+from .registros import PAGOS_DESCONOCIDOS, Contacto, DatosPago
 
 logger = logging.getLogger(__name__)
 
+# Cantidad de filas que se procesan juntas en el cálculo de pagos
+TAMANO_BLOQUE = 4096
+
+# Filas mínimas por proceso para que convenga repartir la lectura: iniciar
+# un proceso y abrir el libro en él cuesta lo que procesar unas miles de filas
+MIN_FILAS_POR_PROCESO = 5000
 
-def _get_data_name(hoja: Worksheet, row: int) -> Optional[str]:
+
+@dataclass(frozen=True)
+class EsquemaPagos:
+    """
+    Estructura de las columnas de pago, calculada una sola vez desde los headers.
+    
+    Las tuplas dias y meses se indexan por cantidad de pagos realizados, de modo
+    que el próximo día y mes a pagar de cualquier contacto se obtienen en O(1).
+    Como solo hay cantidad + 1 estados de pago posibles, se construyen todos
+    de antemano y los contactos comparten el mismo DatosPago.
+    
+    Attributes:
+        inicio: Primera columna de pago (1-indexed)
+        cantidad: Número de columnas de pago antes del marcador "Contador"
+        dias: Día de cada posición de pago (fila 2)
+        meses: Mes de cada posición de pago (fila 1), propagado sobre celdas combinadas
+        estados: Estado de pago de cada cantidad de pagos realizados
+    """
+    inicio: int
+    cantidad: int
+    dias: Tuple[Optional[str], ...]
+    meses: Tuple[Optional[str], ...]
+    estados: Tuple[DatosPago, ...] = ()
+
+
+def _valor(fila: Fila, column: int) -> Any:
+    """
+    Obtiene el valor de una columna dentro de una fila de valores.
+    
+    Args:
+        fila: Tupla de valores de la fila
+        column: Número de columna (1-indexed)
+        
+    Returns:
+        Valor de la celda, o None si la fila no llega a esa columna
+    """
+    indice = column - 1
+    return fila[indice] if indice < len(fila) else None
+
+
+def _get_data_name(fila: Fila) -> Optional[str]:
     """
     Lee el nombre de una fila y devuelve el nombre formateado.
     
     Args:
-        hoja: Hoja de Excel activa
-        row: Número de fila (1-indexed)
+        fila: Tupla de valores de la fila
         
     Returns:
         Nombre formateado con formato título, o None si no hay nombre válido
     """
-    nombre = hoja.cell(row=row, column=2).value
+    nombre = _valor(fila, 2)
     if nombre is None or str(nombre).strip() == "":
         return None
     return mayuscula(str(nombre))
 
 
-def _get_data_telefono(hoja: Worksheet, row: int) -> Optional[str]:
+def _get_data_telefono(fila: Fila) -> Optional[str]:
     """
     Lee el teléfono de una fila y devuelve el teléfono formateado.
     
     Args:
-        hoja: Hoja de Excel activa
-        row: Número de fila (1-indexed)
+        fila: Tupla de valores de la fila
         
     Returns:
         Teléfono formateado para WhatsApp, o None si no hay teléfono válido
     """
-    telefono = hoja.cell(row=row, column=3).value
+    telefono = _valor(fila, 3)
     if telefono is None or str(telefono).strip() == "":
         return None
     return formato(telefono)
 
 
-def _is_debe_pagar(hoja: Worksheet, row: int) -> bool:
+def _is_debe_pagar(fila: Fila) -> bool:
     """
     Determina si un contacto debe pagar basado en la columna de estado.
     
     Args:
-        hoja: Hoja de Excel activa
-        row: Número de fila (1-indexed)
+        fila: Tupla de valores de la fila
         
     Returns:
         True si debe pagar, False si está marcado como "inactiva"
     """
-    debe_pagar = hoja.cell(row=row, column=4).value
+    debe_pagar = _valor(fila, 4)
     if isinstance(debe_pagar, str) and debe_pagar.strip().lower() == "inactiva":
         return False
     return True
 
 
-def _is_pago_realizado(hoja: Worksheet, row: int, column: int) -> bool:
+def _is_pago_realizado(fila: Fila, column: int) -> bool:
     """
     Verifica si un pago específico ha sido realizado.
     
     Args:
-        hoja: Hoja de Excel activa
-        row: Número de fila (1-indexed)
+        fila: Tupla de valores de la fila
         column: Número de columna (1-indexed)
         
     Returns:
         True si el pago fue realizado, False en caso contrario
     """
-    pago_realizado = hoja.cell(row=row, column=column).value
-    
     # Verificar diferentes representaciones de "verdadero"
-    valores_verdaderos = {"True", "true", "Verdadero", "VERDADERO", True, "SI", "si", "Sí"}
-    
-    return pago_realizado in valores_verdaderos
+    return _valor(fila, column) in VALORES_VERDADEROS
 
 
-def _get_data_length_pago(hoja: Worksheet, row: int = 2) -> int:
+def _get_data_length_pago(cabecera_dias: Fila) -> int:
     """
     Calcula la cantidad total de columnas de pago disponibles.
     
     Args:
-        hoja: Hoja de Excel activa
-        row: Fila de referencia para buscar el marcador "Contador" (default: 2)
+        cabecera_dias: Fila de referencia con el marcador "Contador" (fila 2)
         
     Returns:
         Número de columnas de pago antes del marcador "Contador"
@@ -106,7 +154,7 @@ def _get_data_length_pago(hoja: Worksheet, row: int = 2) -> int:
     max_columns = 100  # Límite de seguridad
     
     while i <= max_columns:
-        valor = hoja.cell(row=row, column=i).value
+        valor = _valor(cabecera_dias, i)
         if valor == "Contador":
             break
         i += 1
@@ -115,178 +163,588 @@ def _get_data_length_pago(hoja: Worksheet, row: int = 2) -> int:
     return length_pago
 
 
-def _get_data_dia_ultimo_pago(hoja: Worksheet, row: int, destino: int) -> Optional[str]:
+def _construir_esquema(cabecera_meses: Fila, cabecera_dias: Fila) -> EsquemaPagos:
     """
-    Obtiene el día del próximo pago a realizar.
+    Construye el esquema de pagos leyendo una sola vez las filas de headers.
     
     Args:
-        hoja: Hoja de Excel activa
-        row: Fila de referencia (normalmente 2 para headers)
-        destino: Posición del próximo pago
+        cabecera_meses: Fila de headers con los meses (fila 1)
+        cabecera_dias: Fila de headers con los días (fila 2)
         
     Returns:
-        Día del próximo pago o None si no se encuentra
+        EsquemaPagos con el rango de columnas de pago y el día y mes de cada una
     """
-    column_pos = destino + 5  # Ajustar por offset de columnas iniciales
-    dia = hoja.cell(row=row, column=column_pos).value
-    return str(dia) if dia is not None else None
+    inicio = 5
+    cantidad = _get_data_length_pago(cabecera_dias)
+    
+    dias: List[Optional[str]] = []
+    meses: List[Optional[str]] = []
+    mes = None
+    
+    # Se incluye la posición siguiente al último pago para replicar
+    # la lectura original cuando todos los pagos están realizados
+    for column in range(inicio, inicio + cantidad + 1):
+        dia = _valor(cabecera_dias, column)
+        dias.append(str(dia) if dia is not None else None)
+        
+        # Los meses vienen en celdas combinadas: propagar hacia adelante
+        mes_aux = _valor(cabecera_meses, column)
+        if mes_aux is not None:
+            mes = mes_aux
+        meses.append(str(mes) if mes is not None else None)
+    
+    estados = tuple(
+        DatosPago(pagado, cantidad - pagado, dias[pagado], meses[pagado])
+        for pagado in range(cantidad + 1)
+    )
+    
+    return EsquemaPagos(
+        inicio=inicio,
+        cantidad=cantidad,
+        dias=tuple(dias),
+        meses=tuple(meses),
+        estados=estados
+    )
 
 
-def _get_data_mes_ultimo_pago(hoja: Worksheet, row: int, dias_pagados: int) -> Optional[str]:
+def _data_pagos(esquema: EsquemaPagos, cantidad_pagado: int) -> DatosPago:
     """
-    Obtiene el mes del próximo pago a realizar.
+    Obtiene el estado de pago correspondiente a la cantidad de pagos realizados.
     
     Args:
-        hoja: Hoja de Excel activa
-        row: Fila de referencia (normalmente 1 para headers de mes)
-        dias_pagados: Cantidad de pagos ya realizados
+        esquema: Esquema de columnas de pago construido desde los headers
+        cantidad_pagado: Número de pagos consecutivos realizados
         
     Returns:
-        Mes del próximo pago o None si no se encuentra
+        DatosPago compartido con cantidad pagada, faltantes y el día y mes
+        del próximo pago
     """
-    i = 5
-    mes = hoja.cell(row=row, column=i).value
-    
-    # Buscar el mes correspondiente al próximo pago
-    while i <= (dias_pagados + 5):
-        mes_aux = hoja.cell(row=row, column=i).value
-        if mes_aux is not None:
-            mes = mes_aux
-        i += 1
-    
-    return str(mes) if mes is not None else None
+    return esquema.estados[cantidad_pagado]
 
 
-def _get_data_fechas_pago(hoja: Worksheet, row: int) -> Dict[str, Any]:
+def _get_data_fechas_pago(fila: Fila, esquema: EsquemaPagos) -> DatosPago:
     """
     Calcula la información completa de pagos para un contacto.
     
     Args:
-        hoja: Hoja de Excel activa
-        row: Número de fila del contacto (1-indexed)
+        fila: Tupla de valores de la fila del contacto
+        esquema: Esquema de columnas de pago construido desde los headers
         
     Returns:
-        Diccionario con información de pagos:
-        - cantidadPagado: Número de pagos realizados
-        - faltantes: Número de pagos pendientes
-        - diaAPagar: Día del próximo pago
-        - mesAPagar: Mes del próximo pago
+        Estado de pago del contacto (ver _data_pagos)
     """
-    length_pago = _get_data_length_pago(hoja, 2)
-    
-    i = 5
+    i = esquema.inicio
+    fin = esquema.inicio + esquema.cantidad
     cantidad_pagado = 0
     
     # Contar pagos realizados consecutivos
-    while i < (5 + length_pago) and _is_pago_realizado(hoja, row, i):
+    while i < fin and _is_pago_realizado(fila, i):
         cantidad_pagado += 1
         i += 1
     
-    faltantes = length_pago - cantidad_pagado
-    dia_a_pagar = _get_data_dia_ultimo_pago(hoja, 2, cantidad_pagado)
-    mes_a_pagar = _get_data_mes_ultimo_pago(hoja, 1, cantidad_pagado)
-    
-    return {
-        "cantidadPagado": cantidad_pagado,
-        "faltantes": faltantes,
-        "diaAPagar": dia_a_pagar,
-        "mesAPagar": mes_a_pagar
-    }
+    return _data_pagos(esquema, cantidad_pagado)
 
 
-def _get_data_row(hoja: Worksheet, row: int) -> Optional[Dict[str, Any]]:
+def _get_data_contacto(fila: Fila, row: int) -> Optional[Tuple[str, str]]:
     """
-    Procesa una fila completa del Excel y extrae todos los datos del contacto.
+    Valida una fila y extrae el nombre y teléfono del contacto.
     
     Args:
-        hoja: Hoja de Excel activa
-        row: Número de fila (1-indexed)
+        fila: Tupla de valores de la fila
+        row: Número de fila (1-indexed), usado en los mensajes de log
         
     Returns:
-        Diccionario con datos del contacto o None si debe omitirse
+        Tupla (nombre, telefono) formateados, o None si la fila debe omitirse
     """
     # Verificar si el contacto debe pagar
-    if not _is_debe_pagar(hoja, row):
+    if not _is_debe_pagar(fila):
         logger.debug("Contacto en fila %d marcado como inactivo, omitiendo", row)
         return None
     
     # Obtener datos básicos
-    nombre = _get_data_name(hoja, row)
-    telefono = _get_data_telefono(hoja, row)
+    nombre = _get_data_name(fila)
+    telefono = _get_data_telefono(fila)
     
     # Validar datos obligatorios
     if nombre is None or telefono is None:
         logger.debug("Contacto en fila %d sin nombre o teléfono válido, omitiendo", row)
         return None
     
+    return nombre, telefono
+
+
+def _get_data_row(fila: Fila, row: int, esquema: EsquemaPagos) -> Optional[Contacto]:
+    """
+    Procesa una fila completa del Excel y extrae todos los datos del contacto.
+    
+    Args:
+        fila: Tupla de valores de la fila
+        row: Número de fila (1-indexed), usado en los mensajes de log
+        esquema: Esquema de columnas de pago construido desde los headers
+        
+    Returns:
+        Contacto con sus datos de pago, o None si debe omitirse
+    """
+    contacto = _get_data_contacto(fila, row)
+    if contacto is None:
+        return None
+    nombre, telefono = contacto
+    
     # Obtener datos de pagos
     try:
-        data_pagos = _get_data_fechas_pago(hoja, row)
+        data_pagos = _get_data_fechas_pago(fila, esquema)
     except Exception as e:
         logger.warning("Error procesando pagos para fila %d: %s", row, e)
         # Datos por defecto si hay error en pagos
-        data_pagos = {
-            "cantidadPagado": 0,
-            "faltantes": 0,
-            "diaAPagar": "N/A",
-            "mesAPagar": "N/A"
-        }
+        data_pagos = PAGOS_DESCONOCIDOS
+    
+    return Contacto(nombre, telefono, data_pagos)
+
+
+def _procesar_filas(
+    bloque: List[Tuple[int, Fila]],
+    esquema: EsquemaPagos
+) -> Tuple[List[Optional[Contacto]], int]:
+    """
+    Procesa un bloque de filas calculando los pagos de todas a la vez.
+    
+    Las filas se validan una por una y luego el estado de pagos de todas las
+    filas válidas se calcula en lote con motor_pagos.calcular_pagos. Si el
+    cálculo en lote falla, el bloque se procesa fila por fila.
+    
+    Args:
+        bloque: Lista de tuplas (número de fila, valores de la fila)
+        esquema: Esquema de columnas de pago construido desde los headers
+        
+    Returns:
+        Tupla (un contacto por fila del bloque, o None si la fila se omite,
+        cantidad de filas con error)
+    """
+    errores = 0
+    resultado: List[Optional[Contacto]] = [None] * len(bloque)
+    validos: List[Tuple[int, Fila, Tuple[str, str]]] = []
+    
+    for indice, (row, fila) in enumerate(bloque):
+        try:
+            contacto = _get_data_contacto(fila, row)
+        except Exception as e:
+            logger.warning("Error procesando fila %d: %s", row, e)
+            errores += 1
+            continue
+        if contacto is not None:
+            validos.append((indice, fila, contacto))
+    
+    try:
+        pagados, _ = calcular_pagos([fila for _, fila, _ in validos],
+                                    esquema.inicio, esquema.cantidad)
+    except Exception as e:
+        logger.warning("Error en cálculo de pagos por lote, procesando fila por fila: %s",
+                       e)
+        for indice, fila, _ in validos:
+            resultado[indice] = _get_data_row(fila, bloque[indice][0], esquema)
+        return resultado, errores
     
-    return {
-        "nombre": nombre,
-        "telefono": telefono,
-        "dataPagos": data_pagos
-    }
+    estados = esquema.estados
+    for (indice, _, (nombre, telefono)), cantidad_pagado in zip(validos, pagados):
+        resultado[indice] = Contacto(nombre, telefono, estados[cantidad_pagado])
+    return resultado, errores
 
 
-def getData() -> List[Dict[str, Any]]:
+def _procesar_bloque(
+    bloque: List[Tuple[int, Fila]],
+    esquema: EsquemaPagos
+) -> Tuple[List[Contacto], int]:
+    """
+    Procesa un bloque de filas y se queda con los contactos válidos.
+    
+    Args:
+        bloque: Lista de tuplas (número de fila, valores de la fila)
+        esquema: Esquema de columnas de pago construido desde los headers
+        
+    Returns:
+        Tupla (contactos válidos en orden de fila, cantidad de filas con error)
+    """
+    contactos, errores = _procesar_filas(bloque, esquema)
+    return [c for c in contactos if c is not None], errores
+
+
+def _abrir(ruta: str) -> Optional[Tuple[Generator[Fila, None, None], Fila, Fila]]:
+    """
+    Abre el archivo con el lector de su formato y lee las filas de headers.
+    
+    Args:
+        ruta: Ruta al archivo de entrada
+        
+    Returns:
+        Tupla (filas de datos desde la fila 3, fila de meses, fila de días),
+        o None si el archivo no se pudo abrir (el error queda en el logger).
+        El iterador de filas debe cerrarse con close() al terminar.
+    """
+    # La primera fila se lee aquí para que los errores de apertura se
+    # informen como tales
+    try:
+        filas = lector_para(ruta)(ruta)
+        cabecera_meses = next(filas, None) or ()
+    except FileNotFoundError:
+        logger.error("Archivo no encontrado: %s", ruta)
+        return None
+    except Exception as e:
+        logger.error("Error al abrir el archivo '%s': %s", ruta, e)
+        return None
+    
+    try:
+        cabecera_dias = next(filas, None) or ()
+    except Exception:
+        filas.close()
+        raise
+    return filas, cabecera_meses, cabecera_dias
+
+
+def _iniciar_proceso(nivel: int, formato: Optional[str], formato_fecha: Optional[str]) -> None:
+    """Configura el logging de un proceso de lectura como el del proceso principal."""
+    logging.basicConfig(level=nivel, format=formato, datefmt=formato_fecha)
+
+
+def _procesar_rango(
+    ruta: str,
+    inicio: int,
+    fin: int,
+    esquema: EsquemaPagos,
+    tamano_bloque: int
+) -> Tuple[List[Contacto], int, int]:
+    """
+    Lee y procesa un rango de filas dentro de un proceso de lectura.
+    
+    Args:
+        ruta: Ruta al archivo de entrada
+        inicio: Primera fila del rango (desde 1)
+        fin: Última fila del rango, inclusive
+        esquema: Esquema de columnas de pago construido desde los headers
+        tamano_bloque: Filas por bloque de procesamiento
+        
+    Returns:
+        Tupla (contactos con pagos pendientes en orden de fila, filas con
+        error, filas leídas)
+    """
+    filas = lector_rangos_para(ruta).filas(ruta, inicio, fin)
+    contactos: List[Contacto] = []
+    errores = leidas = 0
+    try:
+        for bloque in en_bloques(enumerate(filas, inicio), tamano_bloque):
+            leidas += len(bloque)
+            validos, fallidas = _procesar_bloque(bloque, esquema)
+            errores += fallidas
+            contactos.extend(c for c in validos if c.pagos.faltantes > 0)
+    finally:
+        filas.close()
+    return contactos, errores, leidas
+
+
+def _rangos_paralelos(ruta: str, procesos: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Reparte las filas de datos (desde la fila 3) en un rango por proceso.
+    
+    Returns:
+        Lista de rangos (inicio, fin) inclusive, o None si el archivo debe
+        leerse en un solo proceso: su formato no admite lectura por rangos,
+        no declara su tamaño o tiene pocas filas
+    """
+    lector = lector_rangos_para(ruta)
+    if lector is None:
+        logger.info("Este formato se lee en un solo proceso: %s", ruta)
+        return None
+    try:
+        total = lector.total_filas(ruta)
+    except Exception as e:
+        # La lectura en un solo proceso informa el error
+        logger.debug("No se pudo obtener el tamaño de '%s': %s", ruta, e)
+        return None
+    if total is None:
+        logger.warning("El libro no declara su tamaño, se lee en un solo proceso: %s", ruta)
+        return None
+    
+    datos = total - 2
+    procesos = min(procesos, datos // MIN_FILAS_POR_PROCESO)
+    if procesos < 2:
+        return None
+    tamano = math.ceil(datos / procesos)
+    return [(inicio, min(inicio + tamano - 1, total)) for inicio in range(3, total + 1, tamano)]
+
+
+def _iterData_paralelo(
+    ruta: str,
+    rangos: List[Tuple[int, int]],
+    tamano_bloque: int
+) -> Iterator[Contacto]:
+    """
+    Procesa cada rango de filas en su propio proceso y entrega los contactos en orden.
+    
+    Args:
+        ruta: Ruta al archivo de entrada
+        rangos: Rangos de filas (ver _rangos_paralelos)
+        tamano_bloque: Filas por bloque de procesamiento en cada proceso
+    """
+    cabeceras = lector_rangos_para(ruta).filas(ruta, 1, 2)
+    try:
+        cabecera_meses = next(cabeceras, None) or ()
+        cabecera_dias = next(cabeceras, None) or ()
+    finally:
+        cabeceras.close()
+    esquema = _construir_esquema(cabecera_meses, cabecera_dias)
+    
+    logger.info("Procesando %d filas en %d procesos", rangos[-1][1] - 2, len(rangos))
+    raiz = logging.getLogger()
+    formato = raiz.handlers[0].formatter if raiz.handlers else None
+    validos = errores_procesamiento = filas_leidas = 0
+    
+    # "spawn" como en fragmentos.py: crear procesos con fork desde un
+    # programa con hilos (--pipeline) puede dejarlos bloqueados
+    pool = concurrent.futures.ProcessPoolExecutor(
+        max_workers=len(rangos),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_iniciar_proceso,
+        initargs=(raiz.level, getattr(formato, "_fmt", None), getattr(formato, "datefmt", None))
+    )
+    try:
+        futuros = [pool.submit(_procesar_rango, ruta, inicio, fin, esquema, tamano_bloque)
+                   for inicio, fin in rangos]
+        for futuro in futuros:
+            with REGISTRO.etapa("lectura_paralela"):
+                contactos, errores, leidas = futuro.result()
+            filas_leidas += leidas
+            errores_procesamiento += errores
+            validos += len(contactos)
+            yield from contactos
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    
+    logger.info("Procesamiento completado: %d contactos válidos, %d errores",
+                validos, errores_procesamiento)
+    REGISTRO.incrementar("filas_leidas_total", filas_leidas)
+    REGISTRO.incrementar("contactos_pendientes_total", validos)
+    REGISTRO.incrementar("filas_con_error_total", errores_procesamiento)
+
+
+def iterData(
+    ruta: Optional[str] = None,
+    tamano_bloque: int = TAMANO_BLOQUE,
+    procesos: int = 1
+) -> Iterator[Contacto]:
+    """
+    Recorre el archivo Excel en modo streaming y entrega un contacto a la vez.
+    
+    El archivo se abre con el lector registrado para su extensión (un libro
+    Excel en modo solo lectura y solo valores, CSV, TSV o Parquet), y las filas se
+    recorren una única vez en bloques de tamano_bloque filas, por lo que el
+    uso de memoria se mantiene acotado sin importar la cantidad de filas.
+    
+    Args:
+        ruta: Ruta al archivo Excel. Si es None se usa get_excel_path()
+        tamano_bloque: Filas por bloque; bloques más chicos entregan antes el
+            primer contacto a cambio de un cálculo de pagos algo más lento
+        procesos: Procesos entre los que repartir las filas. Con más de uno,
+            los libros Excel que declaran su tamaño se dividen en rangos de
+            filas procesados en paralelo (ver lectores.LectorRangos); el
+            resto de los archivos se lee en un solo proceso
+        
+    Yields:
+        Contactos con pagos pendientes, con el mismo formato que los
+        elementos de getData()
+        
+    Note:
+        Los errores al abrir el archivo se registran en el logger y el
+        generador termina sin entregar elementos.
+    """
+    ruta = ruta or get_excel_path()
+    logger.info("Usando archivo de Excel: %s", ruta)
+    
+    if procesos > 1:
+        rangos = _rangos_paralelos(ruta, procesos)
+        if rangos is not None:
+            yield from _iterData_paralelo(ruta, rangos, tamano_bloque)
+            return
+    
+    # Abrir el archivo con el lector de su formato; las filas 1 y 2
+    # contienen los headers de meses y días
+    abierto = _abrir(ruta)
+    if abierto is None:
+        return
+    filas, cabecera_meses, cabecera_dias = abierto
+    
+    try:
+        esquema = _construir_esquema(cabecera_meses, cabecera_dias)
+        
+        validos = 0
+        errores_procesamiento = 0
+        filas_leidas = 0
+        
+        # Procesar las filas de datos (desde la fila 3) en bloques, separando
+        # el tiempo de lectura del archivo del tiempo de procesamiento
+        bloques = en_bloques(enumerate(filas, 3), tamano_bloque)
+        while True:
+            with REGISTRO.etapa("lectura_filas"):
+                bloque = next(bloques, None)
+            if bloque is None:
+                break
+            filas_leidas += len(bloque)
+            with REGISTRO.etapa("procesamiento_filas"):
+                contactos, errores = _procesar_bloque(bloque, esquema)
+            errores_procesamiento += errores
+            
+            for contacto in contactos:
+                if contacto.pagos.faltantes > 0:
+                    validos += 1
+                    yield contacto
+        
+        if filas_leidas == 0:
+            logger.warning("El archivo Excel no tiene suficientes filas de datos")
+            return
+        
+        logger.info("Procesamiento completado: %d contactos válidos, %d errores",
+                    validos, errores_procesamiento)
+        REGISTRO.incrementar("filas_leidas_total", filas_leidas)
+        REGISTRO.incrementar("contactos_pendientes_total", validos)
+        REGISTRO.incrementar("filas_con_error_total", errores_procesamiento)
+    finally:
+        filas.close()
+
+
+def getData(ruta: Optional[str] = None, procesos: int = 1) -> List[Contacto]:
     """
     Lee y procesa todos los datos del archivo Excel configurado.
     
+    Es un envoltorio sobre iterData() que acumula los contactos en una lista.
+    
+    Args:
+        ruta: Ruta al archivo Excel. Si es None se usa get_excel_path()
+        procesos: Procesos entre los que repartir las filas (ver iterData)
+        
     Returns:
-        Lista de diccionarios con información de contactos y sus datos de pago.
-        Cada diccionario contiene:
+        Lista de contactos (ver registros.Contacto) con sus datos de pago:
         - nombre: Nombre formateado del contacto
         - telefono: Teléfono formateado para WhatsApp
-        - dataPagos: Información detallada de pagos
+        - pagos: Estado de pago (dataPagos en Contacto.to_dict())
         
     Raises:
         Registra errores en el logger pero no lanza excepciones,
         devuelve lista vacía en caso de errores.
     """
-    ruta = get_excel_path()
-    logger.info("Usando archivo de Excel: %s", ruta)
+    return list(iterData(ruta, procesos=procesos))
+
+
+class ResumenLectura(NamedTuple):
+    """Resultado de una actualización de LecturaIncremental."""
+    filas: int  # Filas de datos leídas
+    reprocesadas: int  # Filas nuevas o cambiadas que se volvieron a procesar
+    contactos: int  # Contactos con pagos pendientes tras la actualización
+
+
+class LecturaIncremental:
+    """
+    Contactos del archivo en memoria, actualizados releyendo solo lo que cambió.
     
-    # Abrir workbook
-    try:
-        excel = openpyxl.load_workbook(ruta)
-        hoja = excel.active
-    except FileNotFoundError:
-        logger.error("Archivo no encontrado: %s", ruta)
-        return []
-    except Exception as e:
-        logger.error("Error al abrir el archivo Excel '%s': %s", ruta, e)
-        return []
+    Cada actualización recorre el archivo una vez, pero solo las filas nuevas
+    o modificadas pasan por la validación, el formateo de nombre y teléfono y
+    el cálculo de pagos; las filas idénticas a la lectura anterior reutilizan
+    su contacto. Si cambian las filas de headers (meses o días) se procesa
+    todo de nuevo, porque el esquema de pagos es otro.
     
-    # Verificar que haya suficientes filas
-    if hoja.max_row < 3:
-        logger.warning("El archivo Excel no tiene suficientes filas de datos")
-        return []
+    Args:
+        ruta: Ruta al archivo de entrada. Si es None se usa get_excel_path()
+        tamano_bloque: Filas por bloque de lectura y procesamiento
+        
+    Example:
+        >>> lectura = LecturaIncremental("Mensualidad.xlsx")
+        >>> lectura.actualizar()
+        ResumenLectura(filas=1000, reprocesadas=1000, contactos=900)
+        >>> lectura.actualizar()  # tras editar una fila
+        ResumenLectura(filas=1000, reprocesadas=1, contactos=899)
+        
+    Note:
+        Las filas se guardan tal como las entrega el lector para compararlas,
+        por lo que la memoria crece con el tamaño del archivo (a diferencia
+        de iterData).
+    """
     
-    lista: List[Dict[str, Any]] = []
-    errores_procesamiento = 0
+    def __init__(self, ruta: Optional[str] = None, tamano_bloque: int = TAMANO_BLOQUE) -> None:
+        self.ruta = ruta or get_excel_path()
+        self.tamano_bloque = tamano_bloque
+        self.contactos: List[Contacto] = []
+        self._cabeceras: Optional[Tuple[Fila, Fila]] = None
+        self._esquema: Optional[EsquemaPagos] = None
+        # Fila leída -> contacto resultante (None si la fila se omite)
+        self._por_fila: Dict[Fila, Optional[Contacto]] = {}
     
-    # Procesar cada fila de datos (empezando desde la fila 3)
-    for i in range(3, hoja.max_row + 1):
+    def actualizar(self) -> Optional[ResumenLectura]:
+        """
+        Vuelve a leer el archivo y actualiza self.contactos.
+        
+        Returns:
+            ResumenLectura con las filas leídas y reprocesadas, o None si el
+            archivo no se pudo leer (los contactos anteriores se conservan)
+        """
+        abierto = _abrir(self.ruta)
+        if abierto is None:
+            return None
+        filas, cabecera_meses, cabecera_dias = abierto
+        
         try:
-            fila = _get_data_row(hoja, i)
-            if fila is not None and fila.get('dataPagos', {}).get('faltantes', 0) > 0:
-                lista.append(fila)
+            with REGISTRO.etapa("lectura_incremental"):
+                cabeceras = (tuple(cabecera_meses), tuple(cabecera_dias))
+                if cabeceras != self._cabeceras or self._esquema is None:
+                    esquema = _construir_esquema(cabecera_meses, cabecera_dias)
+                    anteriores: Dict[Fila, Optional[Contacto]] = {}
+                else:
+                    esquema = self._esquema
+                    anteriores = self._por_fila
+                
+                por_fila: Dict[Fila, Optional[Contacto]] = {}
+                contactos: List[Contacto] = []
+                entregados = set()
+                leidas = reprocesadas = errores = 0
+                
+                for bloque in en_bloques(enumerate(filas, 3), self.tamano_bloque):
+                    leidas += len(bloque)
+                    
+                    # Procesar juntas las filas que no estaban en la lectura anterior
+                    nuevas: Dict[Fila, int] = {}
+                    for row, fila in bloque:
+                        if fila in anteriores:
+                            por_fila[fila] = anteriores[fila]
+                        elif fila not in por_fila:
+                            nuevas.setdefault(fila, row)
+                    if nuevas:
+                        pendientes = [(row, fila) for fila, row in nuevas.items()]
+                        resultado, fallidas = _procesar_filas(pendientes, esquema)
+                        por_fila.update(zip(nuevas, resultado))
+                        reprocesadas += len(pendientes)
+                        errores += fallidas
+                    
+                    for _, fila in bloque:
+                        contacto = por_fila[fila]
+                        if contacto is None or contacto.pagos.faltantes <= 0:
+                            continue
+                        # Filas repetidas: cada una con su propio contacto
+                        if id(contacto) in entregados:
+                            contacto = Contacto(contacto.nombre, contacto.telefono,
+                                                contacto.pagos)
+                        entregados.add(id(contacto))
+                        contactos.append(contacto)
         except Exception as e:
-            logger.warning("Error procesando fila %d: %s", i, e)
-            errores_procesamiento += 1
-    
-    logger.info("Procesamiento completado: %d contactos válidos, %d errores",
-                len(lista), errores_procesamiento)
-    
-    return lista
+            logger.error("Error leyendo '%s', se conservan los datos anteriores: %s",
+                         self.ruta, e)
+            return None
+        finally:
+            filas.close()
+        
+        self._cabeceras = cabeceras
+        self._esquema = esquema
+        self._por_fila = por_fila
+        self.contactos = contactos
+        
+        REGISTRO.incrementar("filas_leidas_total", leidas)
+        REGISTRO.incrementar("filas_reprocesadas_total", reprocesadas)
+        REGISTRO.incrementar("filas_con_error_total", errores)
+        logger.info("Lectura incremental: %d filas, %d reprocesadas, %d contactos pendientes",
+                    leidas, reprocesadas, len(contactos))
+        return ResumenLectura(leidas, reprocesadas, len(contactos))
@@ -0,0 +1,281 @@
+"""
+Módulo de métricas de ejecución.
+
+Reúne contadores, cronómetros por etapa (carga del libro, procesamiento de
+filas, renderizado, envío) e histogramas de latencia de los envíos, con
+sus fases separadas (carga de la página, pegado y Enter). Al final de la
+ejecución las métricas se pueden exportar como resumen JSON o como archivo
+de texto en formato Prometheus para el textfile collector de node_exporter.
+
+Las métricas se registran en el registro global REGISTRO, que es seguro
+para usar desde varios hilos.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import pathlib
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Prefijo de las métricas exportadas a Prometheus
+PREFIJO = "mensaje_automatico"
+
+# Límites superiores (segundos) de los buckets de los histogramas de latencia
+BUCKETS_LATENCIA = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 30.0, 60.0)
+
+# Identificador de una serie: nombre y etiquetas ordenadas
+Serie = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _serie(nombre: str, etiquetas: Dict[str, Any]) -> Serie:
+    """Construye la clave de una serie a partir de su nombre y etiquetas."""
+    return nombre, tuple(sorted((k, str(v)) for k, v in etiquetas.items()))
+
+
+def _escapar(valor: str) -> str:
+    """Escapa el valor de una etiqueta según el formato de texto de Prometheus."""
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatear_serie(serie: Serie, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    """Formatea una serie como nombre{etiqueta="valor",...} para Prometheus."""
+    nombre, etiquetas = serie
+    todas = etiquetas + extra
+    if not todas:
+        return f"{PREFIJO}_{nombre}"
+    texto = ",".join(f'{k}="{_escapar(v)}"' for k, v in todas)
+    return f"{PREFIJO}_{nombre}{{{texto}}}"
+
+
+class Histograma:
+    """
+    Histograma acumulativo de duraciones, al estilo de Prometheus.
+
+    Args:
+        limites: Límites superiores de los buckets en segundos
+    """
+
+    __slots__ = ("limites", "cuentas", "suma", "cantidad", "maximo")
+
+    def __init__(self, limites: Tuple[float, ...] = BUCKETS_LATENCIA) -> None:
+        self.limites = limites
+        self.cuentas = [0] * len(limites)
+        self.suma = 0.0
+        self.cantidad = 0
+        self.maximo = 0.0
+
+    def observar(self, valor: float) -> None:
+        """Registra una observación."""
+        self.suma += valor
+        self.cantidad += 1
+        self.maximo = max(self.maximo, valor)
+        for i, limite in enumerate(self.limites):
+            if valor <= limite:
+                self.cuentas[i] += 1
+                break
+
+    def acumulado(self) -> List[int]:
+        """Cantidad de observaciones menores o iguales a cada límite."""
+        total = 0
+        resultado = []
+        for cuenta in self.cuentas:
+            total += cuenta
+            resultado.append(total)
+        return resultado
+
+    def percentil(self, p: float) -> Optional[float]:
+        """
+        Estima un percentil como el límite del bucket que lo contiene.
+
+        Returns:
+            Límite superior del bucket, el máximo observado si cae sobre el
+            último límite, o None si no hay observaciones
+        """
+        if not self.cantidad:
+            return None
+        objetivo = p * self.cantidad
+        for limite, acumulado in zip(self.limites, self.acumulado()):
+            if acumulado >= objetivo:
+                return min(limite, self.maximo)
+        return self.maximo
+
+
+class Metricas:
+    """
+    Registro de contadores, cronómetros por etapa e histogramas.
+
+    Example:
+        >>> with REGISTRO.etapa("carga_libro"):
+        ...     libro = openpyxl.load_workbook(ruta, read_only=True)
+        >>> REGISTRO.incrementar("filas_leidas_total", 500)
+        >>> REGISTRO.observar("envio_fase_segundos", 0.8, fase="pegado")
+        >>> REGISTRO.exportar_json("metricas.json")
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._inicio = time.time()
+        self.contadores: Dict[Serie, float] = {}
+        self.etapas: Dict[Serie, List[float]] = {}  # [segundos, veces]
+        self.histogramas: Dict[Serie, Histograma] = {}
+
+    def reiniciar(self) -> None:
+        """Descarta todas las métricas registradas."""
+        with self._lock:
+            self._inicio = time.time()
+            self.contadores.clear()
+            self.etapas.clear()
+            self.histogramas.clear()
+
+    def incrementar(self, nombre: str, valor: float = 1, **etiquetas: Any) -> None:
+        """Suma valor a un contador."""
+        serie = _serie(nombre, etiquetas)
+        with self._lock:
+            self.contadores[serie] = self.contadores.get(serie, 0) + valor
+
+    def sumar_etapa(self, nombre: str, segundos: float) -> None:
+        """Acumula la duración de una ejecución de una etapa."""
+        serie = _serie(nombre, {})
+        with self._lock:
+            acumulado = self.etapas.setdefault(serie, [0.0, 0])
+            acumulado[0] += segundos
+            acumulado[1] += 1
+
+    @contextlib.contextmanager
+    def etapa(self, nombre: str) -> Iterator[None]:
+        """Cronometra el bloque y lo acumula en la etapa indicada."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sumar_etapa(nombre, time.perf_counter() - inicio)
+
+    def observar(self, nombre: str, segundos: float, **etiquetas: Any) -> None:
+        """Registra una duración en el histograma indicado."""
+        serie = _serie(nombre, etiquetas)
+        with self._lock:
+            histograma = self.histogramas.get(serie)
+            if histograma is None:
+                histograma = self.histogramas[serie] = Histograma()
+            histograma.observar(segundos)
+
+    def resumen(self) -> Dict[str, Any]:
+        """
+        Genera un resumen serializable de todas las métricas.
+
+        Returns:
+            Diccionario con contadores, etapas (segundos y veces) e
+            histogramas (cantidad, suma, promedio, p50, p95 y máximo)
+        """
+        with self._lock:
+            return {
+                "inicio": self._inicio,
+                "duracion_segundos": time.time() - self._inicio,
+                "contadores": {
+                    _formatear_serie(s)[len(PREFIJO) + 1:]: v
+                    for s, v in self.contadores.items()
+                },
+                "etapas": {
+                    s[0]: {"segundos": v[0], "veces": v[1]}
+                    for s, v in self.etapas.items()
+                },
+                "histogramas": {
+                    _formatear_serie(s)[len(PREFIJO) + 1:]: {
+                        "cantidad": h.cantidad,
+                        "suma": h.suma,
+                        "promedio": h.suma / h.cantidad if h.cantidad else None,
+                        "p50": h.percentil(0.5),
+                        "p95": h.percentil(0.95),
+                        "maximo": h.maximo,
+                    }
+                    for s, h in self.histogramas.items()
+                },
+            }
+
+    def prometheus(self) -> str:
+        """
+        Genera las métricas en el formato de texto de Prometheus.
+
+        Returns:
+            Texto listo para un archivo .prom del textfile collector
+        """
+        lineas: List[str] = []
+        tipos_emitidos = set()
+
+        def tipo(nombre: str, clase: str) -> None:
+            if nombre not in tipos_emitidos:
+                tipos_emitidos.add(nombre)
+                lineas.append(f"# TYPE {PREFIJO}_{nombre} {clase}")
+
+        with self._lock:
+            for serie, valor in sorted(self.contadores.items()):
+                tipo(serie[0], "counter")
+                lineas.append(f"{_formatear_serie(serie)} {valor}")
+
+            # Cada familia de métricas debe quedar agrupada en el archivo
+            for indice, familia in enumerate(("etapa_segundos_total", "etapa_veces_total")):
+                for (nombre, _), valores in sorted(self.etapas.items()):
+                    tipo(familia, "counter")
+                    serie = (familia, (("etapa", nombre),))
+                    lineas.append(f"{_formatear_serie(serie)} {valores[indice]}")
+
+            for (nombre, etiquetas), h in sorted(self.histogramas.items()):
+                tipo(nombre, "histogram")
+                cubo = (nombre + "_bucket", etiquetas)
+                for limite, acumulado in zip(h.limites, h.acumulado()):
+                    lineas.append(
+                        f"{_formatear_serie(cubo, (('le', str(limite)),))} {acumulado}"
+                    )
+                lineas.append(f"{_formatear_serie(cubo, (('le', '+Inf'),))} {h.cantidad}")
+                lineas.append(f"{_formatear_serie((nombre + '_sum', etiquetas))} {h.suma}")
+                lineas.append(
+                    f"{_formatear_serie((nombre + '_count', etiquetas))} {h.cantidad}"
+                )
+
+        tipo("ultima_ejecucion_timestamp_seconds", "gauge")
+        lineas.append(f"{PREFIJO}_ultima_ejecucion_timestamp_seconds {time.time()}")
+        return "\n".join(lineas) + "\n"
+
+    def exportar_json(self, ruta: str) -> None:
+        """Guarda el resumen de métricas en un archivo JSON."""
+        _escribir_atomico(ruta, json.dumps(self.resumen(), ensure_ascii=False, indent=2))
+        logger.info("Métricas guardadas en %s", ruta)
+
+    def exportar_prometheus(self, ruta: str) -> None:
+        """
+        Guarda las métricas como archivo de texto de Prometheus.
+
+        El archivo se escribe de forma atómica para que node_exporter nunca
+        lea un archivo a medio escribir.
+        """
+        _escribir_atomico(ruta, self.prometheus())
+        logger.info("Métricas Prometheus guardadas en %s", ruta)
+
+    def registrar_resumen(self) -> None:
+        """Muestra en el logger la duración de cada etapa y las latencias de envío."""
+        resumen = self.resumen()
+        for nombre, etapa in sorted(resumen["etapas"].items(),
+                                    key=lambda x: -x[1]["segundos"]):
+            logger.info("Etapa %-20s %8.3f s (%d veces)",
+                        nombre, etapa["segundos"], etapa["veces"])
+        for nombre, h in sorted(resumen["histogramas"].items()):
+            logger.info("Latencia %s: n=%d, promedio %.2f s, p95 %.2f s, máx %.2f s",
+                        nombre, h["cantidad"], h["promedio"] or 0, h["p95"] or 0,
+                        h["maximo"])
+
+
+def _escribir_atomico(ruta: str, contenido: str) -> None:
+    """Escribe un archivo de texto mediante un temporal y un rename."""
+    destino = pathlib.Path(ruta)
+    temporal = destino.with_name(destino.name + ".tmp")
+    temporal.write_text(contenido, encoding="utf-8")
+    os.replace(temporal, destino)
+
+
+# Registro global usado por el resto de los módulos
+REGISTRO = Metricas()
@@ -0,0 +1,99 @@
+"""
+Módulo de cálculo del estado de pagos por lotes.
+
+Calcula para muchas filas a la vez la cantidad de pagos consecutivos
+realizados y los pagos faltantes de cada contacto.
+
+El costo está en decidir, celda por celda, si un valor de Python cuenta
+como pago realizado (una búsqueda en VALORES_VERDADEROS). Esa búsqueda no
+se puede vectorizar con NumPy sobre celdas de tipos mezclados: una versión
+con NumPy resultó más lenta que este recorrido, que corta cada fila en el
+primer pago pendiente.
+"""
+
+from itertools import islice
+from typing import Any, Iterator, List, Sequence, Tuple
+
+# Representaciones aceptadas de un pago realizado
+VALORES_VERDADEROS = frozenset(
+    {"True", "true", "Verdadero", "VERDADERO", True, "SI", "si", "Sí"}
+)
+
+
+def _contar_pagados(
+    filas: Sequence[Sequence[Any]],
+    inicio: int,
+    cantidad: int
+) -> List[int]:
+    """
+    Cuenta los pagos consecutivos de cada fila.
+
+    Las columnas que faltan al final de una fila corta cuentan como pagos
+    pendientes, igual que una celda vacía.
+    """
+    desde = inicio - 1
+    hasta = desde + cantidad
+    verdaderos = VALORES_VERDADEROS
+    pagados = []
+    for fila in filas:
+        contador = 0
+        for valor in fila[desde:hasta]:
+            if valor not in verdaderos:
+                break
+            contador += 1
+        pagados.append(contador)
+    return pagados
+
+
+def calcular_pagos(
+    filas: Sequence[Sequence[Any]],
+    inicio: int,
+    cantidad: int
+) -> Tuple[List[int], List[int]]:
+    """
+    Calcula pagos realizados y faltantes para un lote de filas.
+
+    Un pago cuenta como realizado solo si todos los anteriores también lo están,
+    es decir, se mide el largo del tramo inicial de celdas verdaderas.
+
+    Args:
+        filas: Tuplas de valores de las filas a procesar
+        inicio: Primera columna de pago (1-indexed)
+        cantidad: Número de columnas de pago
+
+    Returns:
+        Tupla (cantidadPagado, faltantes) con una lista de enteros por fila
+
+    Example:
+        >>> calcular_pagos([(None,) * 4 + (True, "si", None)], 5, 3)
+        ([2], [1])
+    """
+    if not filas:
+        return [], []
+
+    if cantidad <= 0:
+        pagados = [0] * len(filas)
+    else:
+        pagados = _contar_pagados(filas, inicio, cantidad)
+
+    faltantes = [cantidad - p for p in pagados]
+    return pagados, faltantes
+
+
+def en_bloques(iterable: Any, tamano: int) -> Iterator[List[Any]]:
+    """
+    Agrupa los elementos de un iterable en listas de a lo más `tamano` elementos.
+
+    Args:
+        iterable: Elementos a agrupar
+        tamano: Tamaño máximo de cada bloque
+
+    Yields:
+        Listas consecutivas de elementos
+    """
+    iterador = iter(iterable)
+    while True:
+        bloque = list(islice(iterador, tamano))
+        if not bloque:
+            return
+        yield bloque
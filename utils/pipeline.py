@@ -0,0 +1,328 @@
+"""
+Módulo de pipeline de envío: lectura, renderizado y envío superpuestos.
+
+En el flujo normal el Excel se lee completo, luego se generan todos los
+mensajes y recién entonces sale el primero. El pipeline conecta las tres
+etapas con colas asyncio acotadas:
+
+    hilo lector --(contactos)--> renderizado --(envíos)--> enviadores
+
+- El hilo lector recorre la fuente (por ejemplo iterDataConCache) y se
+  bloquea cuando la cola de contactos está llena, de modo que la memoria
+  queda acotada por la capacidad de las colas (contrapresión).
+- El renderizado genera el mensaje de cada contacto, lo registra en la
+  bitácora y lo deja en la cola de envíos.
+- Los enviadores despachan los mensajes por el transporte en hilos
+  aparte: uno para TransporteGUI y max_en_vuelo para TransporteHTTP.
+
+Así el primer mensaje sale apenas se lee el primer bloque de filas, sin
+importar el tamaño del Excel, y la lectura del resto ocurre mientras se
+espera a cada envío.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+from typing import Any, Iterable, List, NamedTuple, Optional, Tuple
+
+from .bitacora_envios import EN_CURSO, BitacoraEnvios, Envio, estado_resultado
+from .metricas import REGISTRO
+from .planificador import LimitadorEnvios
+from .plantillas import RenderizadorMensajes
+from .registros import Destinatario
+from .salida import Salida
+from .transporte import Transporte
+
+logger = logging.getLogger(__name__)
+
+# Configuraciones por defecto
+DEFAULT_CAPACIDAD = 1024  # Contactos en espera entre la lectura y el renderizado
+DEFAULT_VENTANA_GRUPO = 256  # Contactos de anticipación para agrupar teléfonos
+DEFAULT_BLOQUE_LECTURA = 256  # Filas por bloque de lectura del Excel (ver iterData)
+TAMANO_LOTE = 64  # Contactos que el hilo lector pasa juntos al loop
+PAUSA_LOTE = 0.01  # Pausa de la fuente (segundos) tras la que se entrega un lote incompleto
+
+# Marca de fin en las colas
+_FIN: Any = object()
+
+
+class ResultadoPipeline(NamedTuple):
+    """Resultado de una ejecución del pipeline."""
+    contactos: int  # Contactos (o grupos) entregados por la fuente
+    envios: int  # Mensajes generados
+    fallidos: List[Destinatario]  # Contactos cuyo mensaje no se pudo enviar
+    primer_envio: Optional[float]  # Segundos hasta el primer envío (o mensaje)
+    completo: bool  # False si la lectura de la fuente se interrumpió por un error
+
+
+class PipelineEnvio:
+    """
+    Pipeline de lectura, renderizado y envío con colas acotadas.
+
+    Args:
+        send_messages: Si True, envía los mensajes; si no, solo los muestra
+        transporte: Transporte de envío (obligatorio con send_messages)
+        bitacora: Bitácora donde registrar los envíos (solo con send_messages)
+        limitador: Planificador que marca el ritmo de los envíos (opcional)
+        renderizador: Plantillas de mensajes (por defecto el mensaje estándar)
+        salida: Donde mostrar los contactos y mensajes (por defecto la consola)
+        capacidad: Tamaño de la cola de contactos leídos
+
+    Example:
+        >>> fuente = agrupar_en_ventana(iterDataConCache(ruta), DEFAULT_VENTANA_GRUPO)
+        >>> with TransporteNulo() as transporte:
+        ...     resultado = PipelineEnvio(True, transporte).ejecutar(fuente)
+        >>> resultado.primer_envio
+        0.08
+    """
+
+    def __init__(
+        self,
+        send_messages: bool = False,
+        transporte: Optional[Transporte] = None,
+        bitacora: Optional[BitacoraEnvios] = None,
+        limitador: Optional[LimitadorEnvios] = None,
+        renderizador: Optional[RenderizadorMensajes] = None,
+        salida: Optional[Salida] = None,
+        capacidad: int = DEFAULT_CAPACIDAD
+    ) -> None:
+        if send_messages and transporte is None:
+            raise ValueError("El pipeline necesita un transporte para enviar mensajes")
+        self.send_messages = send_messages
+        self.transporte = transporte
+        self.bitacora = bitacora
+        self.limitador = limitador
+        self.renderizador = renderizador or RenderizadorMensajes()
+        self.salida = salida
+        self.capacidad = max(1, capacidad)
+        # Un enviador por solicitud simultánea que admita el transporte
+        self.enviadores = max(1, getattr(transporte, "max_en_vuelo", 1))
+
+    def ejecutar(self, fuente: Iterable[Destinatario]) -> ResultadoPipeline:
+        """
+        Recorre la fuente generando y enviando cada mensaje apenas se lee.
+
+        Args:
+            fuente: Contactos (o grupos de agrupar_en_ventana) en orden; se
+                recorre en un hilo aparte, por lo que no debe usar objetos
+                atados al hilo principal (como conexiones SQLite)
+
+        Returns:
+            ResultadoPipeline con los contactos cuyo envío falló
+        """
+        if self.salida is None:
+            with Salida() as salida:
+                self.salida = salida
+                try:
+                    return self.ejecutar(fuente)
+                finally:
+                    self.salida = None
+
+        with REGISTRO.etapa("pipeline"):
+            resultado = asyncio.run(self._ejecutar(fuente))
+
+        if resultado.primer_envio is not None:
+            REGISTRO.sumar_etapa("hasta_primer_envio", resultado.primer_envio)
+            logger.info("Pipeline: primer mensaje a los %.3f s", resultado.primer_envio)
+        if not self.send_messages:
+            logger.info("Modo preview - %d mensajes generados, ninguno enviado",
+                        resultado.envios)
+        return resultado
+
+    def _leer(
+        self,
+        fuente: Iterable[Destinatario],
+        cola: "asyncio.Queue[Any]",
+        loop: asyncio.AbstractEventLoop,
+        detener: threading.Event,
+        errores: List[BaseException]
+    ) -> None:
+        """Recorre la fuente en el hilo lector y deja los contactos en la cola."""
+
+        def poner(elemento: Any) -> bool:
+            # Espera a que haya lugar en la cola sin quedar bloqueado si el
+            # pipeline se detiene mientras tanto
+            futuro = asyncio.run_coroutine_threadsafe(cola.put(elemento), loop)
+            while True:
+                try:
+                    futuro.result(timeout=0.1)
+                    return True
+                except concurrent.futures.TimeoutError:
+                    if detener.is_set():
+                        futuro.cancel()
+                        return False
+
+        # Los contactos se pasan en lotes para no pagar un cambio de hilo por
+        # cada uno. Si la fuente hace una pausa (al leer el próximo bloque del
+        # Excel), el lote incompleto se entrega sin esperar a llenarlo
+        # con los contactos de ese bloque
+        lote: List[Destinatario] = []
+        ultimo = time.perf_counter()
+        try:
+            for contacto in fuente:
+                if lote and time.perf_counter() - ultimo > PAUSA_LOTE:
+                    if not poner(lote):
+                        return
+                    lote = []
+                lote.append(contacto)
+                ultimo = time.perf_counter()
+                if len(lote) >= TAMANO_LOTE:
+                    if detener.is_set() or not poner(lote):
+                        return
+                    lote = []
+        except Exception as e:
+            logger.error("Error leyendo datos: %s", e)
+            errores.append(e)
+        if detener.is_set():
+            return
+        if lote:
+            poner(lote)
+        poner(_FIN)
+
+    def _renderizar(self, item: Destinatario, posicion: int) -> Optional[Envio]:
+        """
+        Muestra un contacto leído y genera su mensaje.
+
+        Returns:
+            Envío listo para despachar, o None si el contacto no tiene teléfono
+        """
+        for miembro in item.miembros or (item,):
+            self.salida.contacto(miembro)
+        if not item.telefono:
+            logger.warning("Contacto %d sin teléfono válido, omitiendo", posicion)
+            return None
+        with REGISTRO.etapa("renderizado"):
+            mensaje = self.renderizador.renderizar(item)
+        return Envio(posicion, item.nombre, item.telefono, mensaje)
+
+    async def _ejecutar(self, fuente: Iterable[Destinatario]) -> ResultadoPipeline:
+        """Ejecuta las tres etapas hasta agotar la fuente."""
+        loop = asyncio.get_running_loop()
+        inicio = time.perf_counter()
+        contactos_cola: "asyncio.Queue[Any]" = asyncio.Queue(
+            max(1, self.capacidad // TAMANO_LOTE)
+        )
+        envios_cola: "asyncio.Queue[Any]" = asyncio.Queue(2 * self.enviadores)
+        detener = threading.Event()
+        errores: List[BaseException] = []
+        fallidos: List[Tuple[int, Destinatario]] = []
+        cuentas = {"contactos": 0, "envios": 0}
+        primer_envio: List[float] = []
+
+        campana = None
+        if self.send_messages and self.bitacora is not None:
+            campana = self.bitacora.nueva_campana()
+
+        def marcar_primero() -> None:
+            if not primer_envio:
+                primer_envio.append(time.perf_counter() - inicio)
+
+        async def renderizar() -> None:
+            posicion = 0
+            while True:
+                lote = await contactos_cola.get()
+                if lote is _FIN:
+                    break
+                for item in lote:
+                    posicion += 1
+                    envio = self._renderizar(item, posicion)
+                    if envio is None:
+                        continue
+                    cuentas["envios"] += 1
+                    if not self.send_messages:
+                        marcar_primero()
+                        self.salida.envio(envio)
+                        continue
+                    if campana is not None:
+                        self.bitacora.agregar(campana, envio)
+                    await envios_cola.put((envio, item))
+                cuentas["contactos"] += len(lote)
+
+            if self.send_messages:
+                for _ in range(self.enviadores):
+                    await envios_cola.put(_FIN)
+
+        async def enviar(ejecutor: concurrent.futures.ThreadPoolExecutor) -> None:
+            transporte = self.transporte
+            while True:
+                par = await envios_cola.get()
+                if par is _FIN:
+                    return
+                envio, item = par
+
+                if self.limitador is not None:
+                    await self.limitador.esperar_async()
+                marcar_primero()
+                self.salida.envio(envio, en_vivo=True)
+                logger.info("Enviando mensaje a %s (%s)", envio.nombre, envio.telefono)
+                if campana is not None:
+                    self.bitacora.marcar(campana, envio.posicion, EN_CURSO)
+
+                enviado_en = time.monotonic()
+                error = None
+                try:
+                    exito = await loop.run_in_executor(
+                        ejecutor, transporte.enviar, envio.telefono, envio.mensaje
+                    )
+                    if exito is None:
+                        error = f"el transporte {transporte.nombre} no confirmó si llegó"
+                    elif not exito:
+                        error = f"el transporte {transporte.nombre} no pudo completar el envío"
+                except Exception as e:
+                    exito, error = False, str(e)
+
+                REGISTRO.observar("envio_segundos", time.monotonic() - enviado_en,
+                                  transporte=transporte.nombre)
+                REGISTRO.incrementar(
+                    "envios_total", transporte=transporte.nombre,
+                    resultado="ok" if exito else "error" if exito is False else "desconocido"
+                )
+                if exito is None:
+                    # Pudo haber llegado: no se reintenta para no duplicarlo
+                    logger.warning("No se sabe si llegó el mensaje a %s (%s)",
+                                   envio.nombre, error)
+                elif not exito:
+                    logger.error("Error enviando mensaje a %s: %s", envio.nombre, error)
+                    fallidos.append((envio.posicion, item))
+                if campana is not None:
+                    self.bitacora.marcar(campana, envio.posicion,
+                                         estado_resultado(exito), error)
+
+        lector = threading.Thread(
+            target=self._leer,
+            args=(fuente, contactos_cola, loop, detener, errores),
+            name="pipeline-lector",
+            daemon=True,
+        )
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.enviadores, thread_name_prefix="pipeline-envio"
+        ) as ejecutor:
+            tareas = [asyncio.ensure_future(renderizar())]
+            if self.send_messages:
+                tareas += [asyncio.ensure_future(enviar(ejecutor))
+                           for _ in range(self.enviadores)]
+            lector.start()
+            try:
+                await asyncio.gather(*tareas)
+            finally:
+                detener.set()
+                for tarea in tareas:
+                    tarea.cancel()
+
+        if campana is not None:
+            if errores:
+                # La campaña no tiene los envíos de las filas que no se
+                # llegaron a leer: no se da por terminada
+                logger.warning("Lectura incompleta - la campaña %d queda abierta", campana)
+            else:
+                self.bitacora.terminar(campana)
+
+        return ResultadoPipeline(
+            contactos=cuentas["contactos"],
+            envios=cuentas["envios"],
+            fallidos=[item for _, item in sorted(fallidos, key=lambda f: f[0])],
+            primer_envio=primer_envio[0] if primer_envio else None,
+            completo=not errores,
+        )
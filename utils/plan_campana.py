@@ -0,0 +1,232 @@
+"""
+Módulo de planes de campaña: mensajes ya generados, listos para enviar.
+
+Separa la preparación de una campaña del envío. Con --plan se lee el Excel,
+se agrupan, priorizan y renderizan los mensajes y se guardan en un archivo
+de plan; con --from-plan otro equipo (o el mismo, más tarde) envía ese
+archivo sin openpyxl ni las plantillas: solo abre el plan con mmap y
+decodifica cada mensaje recién cuando el transporte lo necesita.
+
+Formato del archivo (enteros little-endian, textos UTF-8):
+
+    Cabecera  "MAPC" | versión (u16) | reservado (u16) | largo (u32) | metadatos JSON
+    Registros por envío: posición (u32) | largo nombre (u32) | largo teléfono (u32)
+              | largo mensaje (u32) | nombre | teléfono | mensaje
+    Índice    desplazamiento de cada registro (u64)
+    Pie       desplazamiento del índice (u64) | envíos (u32) | CRC32 de los
+              registros (u32) | "MAPC"
+
+El pie se escribe al final: un archivo truncado (por ejemplo, una copia
+interrumpida) no tiene el identificador final y se rechaza al abrirlo.
+"""
+
+import array
+import datetime
+import json
+import logging
+import mmap
+import os
+import pathlib
+import struct
+import sys
+import zlib
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .bitacora_envios import Envio
+
+logger = logging.getLogger(__name__)
+
+# Identificador y versión del formato
+_MAGIC = b"MAPC"
+_VERSION = 1
+
+_CABECERA = struct.Struct("<4sHHI")
+_REGISTRO = struct.Struct("<IIII")
+_DESPLAZAMIENTO = struct.Struct("<Q")
+_PIE = struct.Struct("<QII4s")
+
+
+def escribir_plan(
+    ruta: str,
+    envios: Iterable[Envio],
+    metadatos: Optional[Dict[str, Any]] = None
+) -> int:
+    """
+    Guarda los envíos en un archivo de plan, de forma atómica.
+
+    Los envíos se escriben a medida que llegan, sin juntarlos en memoria.
+
+    Args:
+        ruta: Ruta del archivo de plan
+        envios: Mensajes ya generados, en el orden de envío
+        metadatos: Datos adicionales para la cabecera (se agrega la fecha
+            de creación)
+
+    Returns:
+        Cantidad de envíos guardados
+
+    Raises:
+        OSError: Si no se puede escribir el archivo
+        ValueError: Si una posición o un texto no entra en el formato
+    """
+    destino = pathlib.Path(ruta)
+    temporal = destino.with_name(destino.name + ".tmp")
+    datos = dict(metadatos or {})
+    datos.setdefault("creado", datetime.datetime.now().isoformat(timespec="seconds"))
+    cabecera_json = json.dumps(datos, ensure_ascii=False).encode("utf-8")
+
+    desplazamientos = array.array("Q")
+    crc = 0
+    try:
+        with open(temporal, "wb") as archivo:
+            archivo.write(_CABECERA.pack(_MAGIC, _VERSION, 0, len(cabecera_json)))
+            archivo.write(cabecera_json)
+            posicion_archivo = _CABECERA.size + len(cabecera_json)
+
+            for envio in envios:
+                nombre = envio.nombre.encode("utf-8")
+                telefono = envio.telefono.encode("utf-8")
+                mensaje = envio.mensaje.encode("utf-8")
+                try:
+                    registro = _REGISTRO.pack(envio.posicion, len(nombre),
+                                              len(telefono), len(mensaje))
+                except struct.error as e:
+                    raise ValueError(f"Envío {envio.posicion} fuera del formato: {e}")
+                registro += nombre + telefono + mensaje
+                desplazamientos.append(posicion_archivo)
+                crc = zlib.crc32(registro, crc)
+                archivo.write(registro)
+                posicion_archivo += len(registro)
+
+            if sys.byteorder == "big":
+                desplazamientos.byteswap()
+            archivo.write(desplazamientos.tobytes())
+            archivo.write(_PIE.pack(posicion_archivo, len(desplazamientos), crc, _MAGIC))
+        os.replace(temporal, destino)
+    except BaseException:
+        temporal.unlink(missing_ok=True)
+        raise
+
+    logger.info("Plan guardado en %s: %d envíos", destino, len(desplazamientos))
+    return len(desplazamientos)
+
+
+class PlanCampana(Sequence):
+    """
+    Plan de campaña abierto con mmap, como secuencia de Envio de solo lectura.
+
+    Abrirlo solo valida la cabecera, el pie y el CRC: los registros se
+    decodifican al accederlos, de modo que el costo de arranque no depende
+    de la cantidad de mensajes y la memoria usada es la de las páginas que
+    el sistema operativo ya tiene en caché.
+
+    Args:
+        ruta: Ruta del archivo de plan
+        verificar: Si False, no calcula el CRC de los registros
+
+    Raises:
+        OSError: Si no se puede abrir el archivo
+        ValueError: Si no es un plan, es de otra versión o está truncado
+            o dañado
+
+    Example:
+        >>> with PlanCampana("campana.plan") as plan:
+        ...     for envio in plan:
+        ...         print(envio.telefono, envio.mensaje)
+    """
+
+    def __init__(self, ruta: str, verificar: bool = True) -> None:
+        self.ruta = str(ruta)
+        with open(self.ruta, "rb") as archivo:
+            tamano = os.fstat(archivo.fileno()).st_size
+            if tamano < _CABECERA.size + _PIE.size:
+                raise ValueError(f"{self.ruta} no es un plan de campaña (demasiado corto)")
+            self._mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self._abrir(tamano, verificar)
+        except BaseException:
+            self._mapa.close()
+            raise
+
+    def _abrir(self, tamano: int, verificar: bool) -> None:
+        """Valida la cabecera y el pie y lee los metadatos."""
+        magic, version, _, largo = _CABECERA.unpack_from(self._mapa, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{self.ruta} no es un plan de campaña")
+        if version != _VERSION:
+            raise ValueError(
+                f"Versión de plan no soportada en {self.ruta}: {version} "
+                f"(se admite la {_VERSION})"
+            )
+
+        indice, cantidad, crc, magic_final = _PIE.unpack_from(self._mapa, tamano - _PIE.size)
+        self._inicio = _CABECERA.size + largo
+        if (magic_final != _MAGIC or not self._inicio <= indice
+                or indice + cantidad * _DESPLAZAMIENTO.size != tamano - _PIE.size):
+            raise ValueError(f"Plan de campaña truncado o dañado: {self.ruta}")
+        self._indice = indice
+        self._cantidad = cantidad
+
+        if verificar:
+            with memoryview(self._mapa) as vista, vista[self._inicio:indice] as registros:
+                if zlib.crc32(registros) != crc:
+                    raise ValueError(f"Plan de campaña dañado (CRC incorrecto): {self.ruta}")
+
+        try:
+            self.metadatos: Dict[str, Any] = json.loads(
+                self._mapa[_CABECERA.size:self._inicio].decode("utf-8")
+            )
+        except ValueError as e:
+            raise ValueError(f"Metadatos inválidos en el plan {self.ruta}: {e}")
+
+    def __enter__(self) -> "PlanCampana":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.cerrar()
+
+    def cerrar(self) -> None:
+        """Libera el mapeo del archivo."""
+        self._mapa.close()
+
+    def __len__(self) -> int:
+        return self._cantidad
+
+    def _leer(self, desplazamiento: int) -> Tuple[Envio, int]:
+        """Decodifica el registro en un desplazamiento; devuelve el envío y el siguiente."""
+        posicion, nombre, telefono, mensaje = _REGISTRO.unpack_from(self._mapa, desplazamiento)
+        inicio = desplazamiento + _REGISTRO.size
+        fin_nombre = inicio + nombre
+        fin_telefono = fin_nombre + telefono
+        fin = fin_telefono + mensaje
+        if fin > self._indice:
+            raise ValueError(f"Registro dañado en el plan {self.ruta}")
+        mapa = self._mapa
+        envio = Envio(
+            posicion,
+            mapa[inicio:fin_nombre].decode("utf-8"),
+            mapa[fin_nombre:fin_telefono].decode("utf-8"),
+            mapa[fin_telefono:fin].decode("utf-8"),
+        )
+        return envio, fin
+
+    def __getitem__(self, indice: Union[int, slice]) -> Union[Envio, List[Envio]]:
+        if isinstance(indice, slice):
+            return [self[i] for i in range(*indice.indices(self._cantidad))]
+        if indice < 0:
+            indice += self._cantidad
+        if not 0 <= indice < self._cantidad:
+            raise IndexError("índice fuera del plan")
+        (desplazamiento,) = _DESPLAZAMIENTO.unpack_from(
+            self._mapa, self._indice + indice * _DESPLAZAMIENTO.size
+        )
+        return self._leer(desplazamiento)[0]
+
+    def __iter__(self) -> Iterator[Envio]:
+        # Los registros están contiguos: se recorren sin consultar el índice
+        desplazamiento = self._inicio
+        for _ in range(self._cantidad):
+            envio, desplazamiento = self._leer(desplazamiento)
+            yield envio
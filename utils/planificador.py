@@ -0,0 +1,331 @@
+"""
+Módulo de planificación del ritmo de envío.
+
+Controla cuántos mensajes se envían por segundo, minuto y hora mediante
+cubos de tokens, agrega opcionalmente una espera aleatoria (jitter) para
+que los envíos no tengan un patrón fijo y respeta ventanas de horas de
+silencio en las que no se envía nada. Además estima el tiempo restante
+(ETA) para terminar la cola de envíos.
+"""
+
+import asyncio
+import datetime
+import logging
+import random
+import threading
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from .metricas import REGISTRO
+
+logger = logging.getLogger(__name__)
+
+# Ventana de silencio: (inicio, fin) en hora local; puede cruzar la medianoche
+VentanaSilencio = Tuple[datetime.time, datetime.time]
+
+
+class CuboTokens:
+    """
+    Cubo de tokens: permite ráfagas de hasta `capacidad` envíos y un ritmo
+    sostenido de `capacidad` envíos cada `periodo` segundos.
+
+    Las reservas pueden dejar el cubo en negativo; la deuda indica cuánto
+    debe esperar cada reserva para respetar el ritmo.
+
+    Args:
+        capacidad: Envíos permitidos por periodo
+        periodo: Duración del periodo en segundos
+        ahora: Instante inicial (reloj monotónico)
+    """
+
+    def __init__(self, capacidad: float, periodo: float, ahora: float) -> None:
+        if capacidad <= 0 or periodo <= 0:
+            raise ValueError("La capacidad y el periodo deben ser positivos")
+        self.capacidad = capacidad
+        self.ritmo = capacidad / periodo
+        self.tokens = capacidad
+        self._ultimo = ahora
+
+    def _recargar(self, ahora: float) -> None:
+        """Agrega los tokens generados desde la última actualización."""
+        generados = (ahora - self._ultimo) * self.ritmo
+        self.tokens = min(self.capacidad, self.tokens + generados)
+        self._ultimo = ahora
+
+    def reservar(self, ahora: float) -> float:
+        """
+        Reserva un token.
+
+        Returns:
+            Segundos a esperar antes de usar el token reservado
+        """
+        self._recargar(ahora)
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.ritmo)
+
+    def tiempo_para(self, cantidad: int, ahora: float) -> float:
+        """
+        Estima cuánto tarda el cubo en entregar `cantidad` tokens más.
+
+        Returns:
+            Segundos hasta que el último de esos tokens esté disponible
+        """
+        self._recargar(ahora)
+        return max(0.0, (cantidad - self.tokens) / self.ritmo)
+
+
+def parse_ventana(texto: str) -> VentanaSilencio:
+    """
+    Interpreta una ventana de silencio con formato "HH:MM-HH:MM".
+
+    Args:
+        texto: Ventana, por ejemplo "22:00-08:00"
+
+    Returns:
+        Tupla (inicio, fin)
+
+    Raises:
+        ValueError: Si el formato no es válido
+    """
+    try:
+        inicio, fin = texto.split("-")
+        return (
+            datetime.datetime.strptime(inicio.strip(), "%H:%M").time(),
+            datetime.datetime.strptime(fin.strip(), "%H:%M").time(),
+        )
+    except ValueError:
+        raise ValueError(f"Ventana de silencio inválida: {texto!r} (usar HH:MM-HH:MM)")
+
+
+def parse_tasa(texto: str) -> float:
+    """
+    Interpreta un máximo de mensajes por periodo (--rate-second y similares).
+
+    Raises:
+        ValueError: Si no es un número positivo y finito (0 no desactiva el
+            límite: basta con no indicarlo)
+    """
+    try:
+        tasa = float(texto)
+    except ValueError:
+        raise ValueError(f"Tasa inválida: {texto!r} (usar un número de mensajes)")
+    if not 0 < tasa < float("inf"):
+        raise ValueError(f"La tasa debe ser positiva y finita: {texto!r}")
+    return tasa
+
+
+def parse_jitter(texto: str) -> float:
+    """
+    Interpreta la espera aleatoria máxima entre mensajes, en segundos.
+
+    Raises:
+        ValueError: Si no es un número finito mayor o igual a 0
+    """
+    try:
+        jitter = float(texto)
+    except ValueError:
+        raise ValueError(f"Espera aleatoria inválida: {texto!r} (usar segundos)")
+    if not 0 <= jitter < float("inf"):
+        raise ValueError(f"La espera aleatoria no puede ser negativa ni infinita: {texto!r}")
+    return jitter
+
+
+def parse_duracion(texto: str) -> float:
+    """
+    Interpreta una duración como segundos, con unidades d, h, m y s.
+
+    Acepta el mismo formato que entrega formatear_duracion, con o sin
+    espacios, y un número solo se interpreta como segundos.
+
+    Example:
+        >>> parse_duracion("1h 30m")
+        5400.0
+        >>> parse_duracion("45")
+        45.0
+
+    Raises:
+        ValueError: Si el formato no es válido o la duración no es positiva
+    """
+    unidades = {"d": 86400, "h": 3600, "m": 60, "s": 1}
+    compacto = texto.replace(" ", "").lower()
+    try:
+        total = float(compacto)
+    except ValueError:
+        total = 0.0
+        numero = ""
+        for caracter in compacto:
+            if caracter in unidades and numero:
+                total += float(numero) * unidades[caracter]
+                numero = ""
+            elif caracter.isdigit() or caracter == ".":
+                numero += caracter
+            else:
+                raise ValueError(f"Duración inválida: {texto!r} (usar por ejemplo 90s, 15m o 1h30m)")
+        if numero or not compacto:
+            raise ValueError(f"Duración inválida: {texto!r} (usar por ejemplo 90s, 15m o 1h30m)")
+    if not 0 < total < float("inf"):
+        raise ValueError(f"La duración debe ser positiva y finita: {texto!r}")
+    return total
+
+
+def _segundos_hasta_fin(ventana: VentanaSilencio, momento: datetime.datetime) -> float:
+    """
+    Calcula cuánto falta para que termine una ventana de silencio.
+
+    Returns:
+        Segundos hasta el fin de la ventana, o 0 si el momento está fuera de ella
+    """
+    inicio, fin = ventana
+    hora = momento.time()
+
+    if inicio <= fin:
+        dentro = inicio <= hora < fin
+    else:
+        # La ventana cruza la medianoche (ej: 22:00-08:00)
+        dentro = hora >= inicio or hora < fin
+    if not dentro:
+        return 0.0
+
+    termino = datetime.datetime.combine(momento.date(), fin)
+    if termino <= momento:
+        termino += datetime.timedelta(days=1)
+    return (termino - momento).total_seconds()
+
+
+class LimitadorEnvios:
+    """
+    Planificador de envíos con cubos de tokens por segundo, minuto y hora.
+
+    Es seguro para usar desde varios hilos: cada llamada a reservar() obtiene
+    su turno en orden y devuelve cuánto debe esperar.
+
+    Args:
+        por_segundo: Envíos máximos por segundo (None sin límite)
+        por_minuto: Envíos máximos por minuto (None sin límite)
+        por_hora: Envíos máximos por hora (None sin límite)
+        jitter: Espera aleatoria adicional máxima en segundos por envío
+        horas_silencio: Ventanas de hora local en las que no se envía
+        reloj: Reloj monotónico (reemplazable en pruebas)
+        dormir: Función de espera (reemplazable en pruebas)
+        hora_local: Función que devuelve la fecha y hora local actual
+        aleatorio: Generador de números en [0, 1)
+
+    Example:
+        >>> limitador = LimitadorEnvios(por_minuto=20, por_hora=300, jitter=2.0)
+        >>> limitador.esperar()  # antes de cada envío
+        >>> limitador.eta(100)   # segundos estimados para 100 envíos más
+    """
+
+    def __init__(
+        self,
+        por_segundo: Optional[float] = None,
+        por_minuto: Optional[float] = None,
+        por_hora: Optional[float] = None,
+        jitter: float = 0.0,
+        horas_silencio: Sequence[VentanaSilencio] = (),
+        reloj: Callable[[], float] = time.monotonic,
+        dormir: Callable[[float], None] = time.sleep,
+        hora_local: Callable[[], datetime.datetime] = datetime.datetime.now,
+        aleatorio: Callable[[], float] = random.random
+    ) -> None:
+        self._reloj = reloj
+        self._dormir = dormir
+        self._hora_local = hora_local
+        self._aleatorio = aleatorio
+        self.jitter = max(0.0, jitter)
+        self.horas_silencio = list(horas_silencio)
+        self._lock = threading.Lock()
+
+        ahora = reloj()
+        self._cubos: List[CuboTokens] = [
+            CuboTokens(limite, periodo, ahora)
+            for limite, periodo in ((por_segundo, 1), (por_minuto, 60), (por_hora, 3600))
+            if limite
+        ]
+
+    def _espera_silencio(self, espera: float) -> float:
+        """Segundos extra si el envío cae dentro de una ventana de silencio."""
+        if not self.horas_silencio:
+            return 0.0
+        momento = self._hora_local() + datetime.timedelta(seconds=espera)
+        extra = max(_segundos_hasta_fin(v, momento) for v in self.horas_silencio)
+        if extra:
+            logger.info("Horas de silencio: próximo envío en %.0f minutos", extra / 60)
+        return extra
+
+    def reservar(self) -> float:
+        """
+        Reserva el turno del próximo envío.
+
+        Returns:
+            Segundos a esperar antes de enviar
+        """
+        with self._lock:
+            ahora = self._reloj()
+            espera = max((cubo.reservar(ahora) for cubo in self._cubos), default=0.0)
+        espera += self._espera_silencio(espera)
+        if self.jitter:
+            espera += self._aleatorio() * self.jitter
+        return espera
+
+    def esperar(self) -> float:
+        """
+        Bloquea hasta que esté permitido enviar el próximo mensaje.
+
+        Returns:
+            Segundos esperados
+        """
+        espera = self.reservar()
+        if espera > 0:
+            REGISTRO.sumar_etapa("espera_ritmo", espera)
+            self._dormir(espera)
+        return espera
+
+    async def esperar_async(self) -> float:
+        """Versión asyncio de esperar(), que no bloquea el loop."""
+        espera = self.reservar()
+        if espera > 0:
+            REGISTRO.sumar_etapa("espera_ritmo", espera)
+            await asyncio.sleep(espera)
+        return espera
+
+    def eta(self, restantes: int, duracion_envio: float = 0.0) -> float:
+        """
+        Estima los segundos necesarios para enviar los mensajes restantes.
+
+        Considera el ritmo permitido por los cubos, la duración propia de
+        cada envío y el jitter promedio; no incluye horas de silencio.
+
+        Args:
+            restantes: Cantidad de envíos pendientes
+            duracion_envio: Duración promedio de un envío en segundos
+
+        Returns:
+            Segundos estimados hasta terminar la cola
+        """
+        if restantes <= 0:
+            return 0.0
+        with self._lock:
+            ahora = self._reloj()
+            ritmo = max(
+                (cubo.tiempo_para(restantes, ahora) for cubo in self._cubos), default=0.0
+            )
+        return max(ritmo, restantes * duracion_envio) + restantes * self.jitter / 2
+
+
+def formatear_duracion(segundos: float) -> str:
+    """
+    Formatea una duración en segundos como texto legible.
+
+    Example:
+        >>> formatear_duracion(3725)
+        '1h 02m 05s'
+    """
+    segundos = int(round(segundos))
+    horas, resto = divmod(segundos, 3600)
+    minutos, segs = divmod(resto, 60)
+    if horas:
+        return f"{horas}h {minutos:02d}m {segs:02d}s"
+    if minutos:
+        return f"{minutos}m {segs:02d}s"
+    return f"{segs}s"
@@ -0,0 +1,433 @@
+"""
+Módulo de plantillas de mensajes.
+
+Las plantillas son archivos de texto con campos entre llaves (sintaxis de
+str.format), por ejemplo:
+
+    Hola {nombre}, te quedan {faltantes} pagos pendientes.
+
+Campos disponibles: nombre, cantidadPagado, faltantes, diaAPagar y mesAPagar.
+Los campos sin dato (vacíos) se reemplazan por su valor por defecto de
+CAMPOS, por ejemplo "Usuario" para el nombre.
+
+Una carpeta de plantillas contiene los archivos .txt y, opcionalmente, un
+reglas.json que elige la plantilla de cada contacto según su estado de pago:
+
+    {
+      "por_defecto": "recordatorio.txt",
+      "reglas": [
+        {"plantilla": "ultimo_aviso.txt", "faltantes_min": 3},
+        {"plantilla": "fin_de_ano.txt", "meses": ["Diciembre"]}
+      ]
+    }
+
+Las reglas se evalúan en orden y se usa la primera que coincide.
+
+Los contactos agrupados por teléfono (ver agrupacion.py) reciben un mensaje
+combinado: grupo.txt (campos {nombres} y {detalle}) envuelve una línea por
+integrante generada con grupo_linea.txt (mismos campos que un contacto).
+Ambos son opcionales y pueden indicarse en reglas.json con las claves
+"grupo" y "grupo_linea".
+
+Las plantillas y reglas se validan una sola vez al cargarlas (cada plantilla
+se prueba con valores de ejemplo de los mismos tipos que los reales, para que
+un error de formato no aparezca recién a mitad del envío), y el
+renderizado por lotes memoriza cada mensaje por (nombre, estado de pago), ya
+que muchos contactos comparten el mismo estado de pago.
+"""
+
+import json
+import logging
+import os
+import pathlib
+import string
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from .agrupacion import unir_nombres
+from .registros import Contacto, Destinatario
+
+logger = logging.getLogger(__name__)
+
+# Variable de entorno con la carpeta de plantillas
+PLANTILLAS_ENV = "PLANTILLAS_DIR"
+REGLAS_ARCHIVO = "reglas.json"
+POR_DEFECTO_ARCHIVO = "por_defecto.txt"
+
+# Campos que puede usar una plantilla, con su valor cuando falta el dato
+# (también sirven de valores de ejemplo al compilar: tienen el tipo real)
+CAMPOS: Dict[str, Any] = {
+    "nombre": "Usuario",
+    "cantidadPagado": 0,
+    "faltantes": 0,
+    "diaAPagar": "N/A",
+    "mesAPagar": "N/A",
+}
+
+# Mensaje histórico del script, usado si no se configura ninguna plantilla
+PLANTILLA_POR_DEFECTO = (
+    "Hola {nombre},\n\n"
+    "Según nuestros registros, has realizado {cantidadPagado} pagos. "
+    "Te quedan {faltantes} pagos pendientes. "
+    "El próximo pago vence el día {diaAPagar} del mes {mesAPagar}.\n\n"
+    "Por favor, asegúrate de completar tus pagos a tiempo para evitar inconvenientes.\n\n"
+    "¡Gracias por tu atención!"
+)
+
+# Mensaje combinado para varios integrantes que comparten teléfono
+CAMPOS_GRUPO = ("nombres", "detalle")
+PLANTILLA_GRUPO_POR_DEFECTO = (
+    "Hola,\n\n"
+    "Según nuestros registros, estos integrantes tienen pagos pendientes:\n\n"
+    "{detalle}\n\n"
+    "Por favor, asegúrate de completar tus pagos a tiempo para evitar inconvenientes.\n\n"
+    "¡Gracias por tu atención!"
+)
+PLANTILLA_LINEA_POR_DEFECTO = (
+    "- {nombre}: has realizado {cantidadPagado} pagos y quedan {faltantes} "
+    "pendientes. El próximo vence el día {diaAPagar} del mes {mesAPagar}."
+)
+GRUPO_ARCHIVO = "grupo.txt"
+GRUPO_LINEA_ARCHIVO = "grupo_linea.txt"
+
+# Clave de memorización: (nombre, cantidadPagado, faltantes, diaAPagar, mesAPagar)
+ClaveMensaje = Tuple[Any, ...]
+
+
+class Plantilla:
+    """
+    Plantilla compilada: validada una vez y lista para renderizar.
+
+    Args:
+        nombre: Nombre de la plantilla (para mensajes de error y logs)
+        texto: Texto con campos entre llaves
+        campos: Campos permitidos en el texto
+
+    Raises:
+        ValueError: Si el texto tiene errores de formato o campos desconocidos,
+            o si no se puede renderizar con valores del tipo de cada campo
+    """
+
+    __slots__ = ("nombre", "texto", "_formatear")
+
+    def __init__(
+        self,
+        nombre: str,
+        texto: str,
+        campos: Iterable[str] = tuple(CAMPOS)
+    ) -> None:
+        permitidos = tuple(campos)
+        try:
+            usados = {
+                campo for _, campo, _, _ in string.Formatter().parse(texto)
+                if campo is not None
+            }
+        except ValueError as e:
+            raise ValueError(f"Plantilla '{nombre}' mal formada: {e}")
+
+        desconocidos = sorted(c for c in usados if c not in permitidos)
+        if desconocidos:
+            raise ValueError(
+                f"Plantilla '{nombre}' usa campos desconocidos: {', '.join(desconocidos)} "
+                f"(disponibles: {', '.join(permitidos)})"
+            )
+
+        # parse() no revisa las especificaciones de formato ni las
+        # conversiones ({diaAPagar:d}, {nombre!z}): se prueban renderizando
+        # con valores de ejemplo del tipo de cada campo
+        ejemplo = {campo: CAMPOS.get(campo, "") for campo in permitidos}
+        try:
+            texto.format_map(ejemplo)
+        except (ValueError, TypeError, KeyError, IndexError, AttributeError) as e:
+            raise ValueError(f"Plantilla '{nombre}' no se puede renderizar: {e}")
+
+        self.nombre = nombre
+        self.texto = texto
+        self._formatear: Callable[[Dict[str, Any]], str] = texto.format_map
+
+    def renderizar(self, valores: Dict[str, Any]) -> str:
+        """Reemplaza los campos de la plantilla por los valores dados."""
+        return self._formatear(valores)
+
+
+@dataclass(frozen=True)
+class Regla:
+    """
+    Condición para elegir una plantilla según el estado de pago.
+
+    Todas las condiciones definidas deben cumplirse; las que son None (o
+    vacías) no se consideran.
+
+    Attributes:
+        plantilla: Nombre del archivo de plantilla
+        faltantes_min: Mínimo de pagos faltantes
+        faltantes_max: Máximo de pagos faltantes
+        meses: Meses a pagar en los que aplica (ej: {"Diciembre"})
+    """
+    plantilla: str
+    faltantes_min: Optional[int] = None
+    faltantes_max: Optional[int] = None
+    meses: FrozenSet[str] = frozenset()
+
+    def coincide(self, faltantes: Any, mes: Any) -> bool:
+        """Indica si la regla aplica a un estado de pago."""
+        if self.faltantes_min is not None and not (
+            isinstance(faltantes, int) and faltantes >= self.faltantes_min
+        ):
+            return False
+        if self.faltantes_max is not None and not (
+            isinstance(faltantes, int) and faltantes <= self.faltantes_max
+        ):
+            return False
+        if self.meses and mes not in self.meses:
+            return False
+        return True
+
+
+def _clave(item: Contacto) -> ClaveMensaje:
+    """Extrae los campos de plantilla de un contacto, en el orden de CAMPOS."""
+    return (item.nombre,) + item.pagos.clave()
+
+
+def _valores(clave: ClaveMensaje) -> Dict[str, Any]:
+    """Valores de los campos de una clave, con el valor por defecto de los que faltan."""
+    return {
+        campo: defecto if valor is None or valor == "" else valor
+        for (campo, defecto), valor in zip(CAMPOS.items(), clave)
+    }
+
+
+class RenderizadorMensajes:
+    """
+    Genera los mensajes de los contactos a partir de plantillas compiladas.
+
+    Args:
+        por_defecto: Plantilla usada cuando ninguna regla coincide
+        reglas: Pares (regla, plantilla) evaluados en orden
+        grupo: Plantilla del mensaje combinado de un grupo
+        grupo_linea: Plantilla de la línea de cada integrante de un grupo
+
+    Example:
+        >>> renderizador = cargar_plantillas("plantillas")
+        >>> mensajes = renderizador.renderizar_lote(data)
+    """
+
+    def __init__(
+        self,
+        por_defecto: Optional[Plantilla] = None,
+        reglas: Iterable[Tuple[Regla, Plantilla]] = (),
+        grupo: Optional[Plantilla] = None,
+        grupo_linea: Optional[Plantilla] = None
+    ) -> None:
+        self.por_defecto = por_defecto or Plantilla("por defecto", PLANTILLA_POR_DEFECTO)
+        self.reglas = list(reglas)
+        self.grupo = grupo or Plantilla(
+            "grupo por defecto", PLANTILLA_GRUPO_POR_DEFECTO, CAMPOS_GRUPO
+        )
+        self.grupo_linea = grupo_linea or Plantilla(
+            "línea de grupo por defecto", PLANTILLA_LINEA_POR_DEFECTO
+        )
+        self._memo: Dict[ClaveMensaje, str] = {}
+        self._memo_grupos: Dict[Tuple[ClaveMensaje, ...], str] = {}
+
+    def elegir(self, valores: Dict[str, Any]) -> Plantilla:
+        """Devuelve la plantilla de la primera regla que coincide."""
+        faltantes = valores["faltantes"]
+        mes = valores["mesAPagar"]
+        for regla, plantilla in self.reglas:
+            if regla.coincide(faltantes, mes):
+                return plantilla
+        return self.por_defecto
+
+    def renderizar(self, item: Destinatario) -> str:
+        """
+        Genera el mensaje de un contacto.
+
+        Args:
+            item: Contacto con nombre y estado de pago, o Grupo con sus miembros
+
+        Returns:
+            Mensaje listo para enviar
+        """
+        miembros = item.miembros
+        if miembros:
+            return self._renderizar_grupo(miembros)
+
+        clave = _clave(item)
+        mensaje = self._memo.get(clave)
+        if mensaje is None:
+            valores = _valores(clave)
+            mensaje = self.elegir(valores).renderizar(valores)
+            self._memo[clave] = mensaje
+        return mensaje
+
+    def _renderizar_grupo(self, miembros: List[Contacto]) -> str:
+        """Genera el mensaje combinado de los integrantes que comparten teléfono."""
+        claves = tuple(_clave(m) for m in miembros)
+        mensaje = self._memo_grupos.get(claves)
+        if mensaje is None:
+            valores = [_valores(clave) for clave in claves]
+            lineas = [self.grupo_linea.renderizar(v) for v in valores]
+            mensaje = self.grupo.renderizar({
+                "nombres": unir_nombres([str(v["nombre"]) for v in valores]),
+                "detalle": "\n".join(lineas),
+            })
+            self._memo_grupos[claves] = mensaje
+        return mensaje
+
+    def renderizar_lote(self, data: Iterable[Destinatario]) -> List[str]:
+        """
+        Genera los mensajes de una lista de contactos.
+
+        Args:
+            data: Contactos en orden
+
+        Returns:
+            Mensajes en el mismo orden
+        """
+        renderizar = self.renderizar
+        mensajes = [renderizar(item) for item in data]
+        logger.debug("Renderizados %d mensajes (%d distintos)",
+                     len(mensajes), len(self._memo))
+        return mensajes
+
+
+def _leer_plantilla(
+    carpeta: pathlib.Path,
+    archivo: str,
+    campos: Iterable[str] = tuple(CAMPOS)
+) -> Plantilla:
+    """Lee y compila un archivo de plantilla de la carpeta."""
+    ruta = carpeta / archivo
+    try:
+        texto = ruta.read_text(encoding="utf-8")
+    except OSError as e:
+        raise ValueError(f"No se pudo leer la plantilla '{ruta}': {e}")
+    return Plantilla(archivo, texto.rstrip("\n"), campos)
+
+
+def _plantilla_opcional(
+    carpeta: pathlib.Path,
+    config: Dict[str, Any],
+    clave: str,
+    archivo: str,
+    campos: Iterable[str] = tuple(CAMPOS)
+) -> Optional[Plantilla]:
+    """
+    Compila la plantilla indicada en reglas.json, o el archivo por defecto si existe.
+
+    Returns:
+        Plantilla compilada, o None si no está configurada
+    """
+    elegido = config.get(clave)
+    if elegido is None and (carpeta / archivo).exists():
+        elegido = archivo
+    if elegido is None:
+        return None
+    return _leer_plantilla(carpeta, elegido, campos)
+
+
+def _entero_opcional(valor: Any) -> bool:
+    """Indica si un valor de reglas.json es un entero (no booleano) o null."""
+    return valor is None or (isinstance(valor, int) and not isinstance(valor, bool))
+
+
+def _leer_regla(i: int, definicion: Any, ruta: pathlib.Path) -> Regla:
+    """
+    Valida y construye una regla de reglas.json.
+
+    Raises:
+        ValueError: Si falta la plantilla o alguna clave tiene un tipo inválido
+    """
+    if not isinstance(definicion, dict):
+        raise ValueError(f"Regla {i} de '{ruta}' inválida: debe ser un objeto")
+    plantilla = definicion.get("plantilla")
+    if not isinstance(plantilla, str) or not plantilla:
+        raise ValueError(f"Regla {i} de '{ruta}' inválida: 'plantilla' debe ser "
+                         "el nombre de un archivo")
+    for clave in ("faltantes_min", "faltantes_max"):
+        if not _entero_opcional(definicion.get(clave)):
+            raise ValueError(f"Regla {i} de '{ruta}' inválida: '{clave}' debe ser "
+                             f"un número entero, no {definicion[clave]!r}")
+    meses = definicion.get("meses", [])
+    if not isinstance(meses, list) or not all(isinstance(m, str) for m in meses):
+        raise ValueError(f"Regla {i} de '{ruta}' inválida: 'meses' debe ser una "
+                         f"lista de nombres de mes, no {meses!r}")
+    return Regla(
+        plantilla=plantilla,
+        faltantes_min=definicion.get("faltantes_min"),
+        faltantes_max=definicion.get("faltantes_max"),
+        meses=frozenset(meses),
+    )
+
+
+def cargar_plantillas(carpeta: str) -> RenderizadorMensajes:
+    """
+    Carga y compila las plantillas y reglas de una carpeta.
+
+    Si la carpeta no tiene reglas.json, se usan por_defecto.txt, grupo.txt y
+    grupo_linea.txt cuando existen y, si no, los mensajes por defecto.
+
+    Args:
+        carpeta: Carpeta con los archivos .txt y el reglas.json opcional
+
+    Returns:
+        Renderizador listo para usar
+
+    Raises:
+        ValueError: Si la carpeta, las reglas o alguna plantilla no son válidas
+    """
+    base = pathlib.Path(carpeta)
+    if not base.is_dir():
+        raise ValueError(f"La carpeta de plantillas '{carpeta}' no existe")
+
+    config: Dict[str, Any] = {}
+    ruta_reglas = base / REGLAS_ARCHIVO
+    if ruta_reglas.exists():
+        try:
+            config = json.loads(ruta_reglas.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            raise ValueError(f"No se pudo leer '{ruta_reglas}': {e}")
+        if not isinstance(config, dict):
+            raise ValueError(f"'{ruta_reglas}' debe contener un objeto JSON")
+        for clave in ("por_defecto", "grupo", "grupo_linea"):
+            if config.get(clave) is not None and not isinstance(config[clave], str):
+                raise ValueError(f"'{ruta_reglas}': '{clave}' debe ser el nombre de un archivo")
+        if not isinstance(config.get("reglas", []), list):
+            raise ValueError(f"'{ruta_reglas}': 'reglas' debe ser una lista")
+
+    por_defecto = _plantilla_opcional(base, config, "por_defecto", POR_DEFECTO_ARCHIVO)
+    grupo = _plantilla_opcional(base, config, "grupo", GRUPO_ARCHIVO, CAMPOS_GRUPO)
+    grupo_linea = _plantilla_opcional(base, config, "grupo_linea", GRUPO_LINEA_ARCHIVO)
+
+    # Cada archivo se compila una sola vez aunque lo usen varias reglas
+    compiladas: Dict[str, Plantilla] = {}
+    reglas = []
+    for i, definicion in enumerate(config.get("reglas", []), 1):
+        regla = _leer_regla(i, definicion, ruta_reglas)
+        if regla.plantilla not in compiladas:
+            compiladas[regla.plantilla] = _leer_plantilla(base, regla.plantilla)
+        reglas.append((regla, compiladas[regla.plantilla]))
+
+    logger.info("Plantillas cargadas desde %s: %d reglas", base, len(reglas))
+    return RenderizadorMensajes(por_defecto, reglas, grupo, grupo_linea)
+
+
+def renderizador_desde_entorno(carpeta: Optional[str] = None) -> RenderizadorMensajes:
+    """
+    Crea el renderizador con la carpeta indicada o la de PLANTILLAS_DIR.
+
+    Args:
+        carpeta: Carpeta de plantillas. Si es None se usa la variable de entorno
+
+    Returns:
+        Renderizador configurado, o uno con el mensaje por defecto si no
+        hay carpeta configurada
+
+    Raises:
+        ValueError: Si la carpeta configurada no es válida
+    """
+    carpeta = carpeta or os.getenv(PLANTILLAS_ENV, "").strip()
+    if not carpeta:
+        return RenderizadorMensajes()
+    return cargar_plantillas(carpeta)
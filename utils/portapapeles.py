@@ -0,0 +1,194 @@
+"""
+Módulo de portapapeles para pegar los mensajes en WhatsApp Web.
+
+pyperclip copia cada mensaje lanzando un proceso xclip/xsel en Linux (y
+pbcopy en macOS): un fork/exec por contacto, y el pegado puede adelantarse
+a que el proceso nuevo tome el portapapeles. PortapapelesTk mantiene un
+único dueño del portapapeles durante toda la ejecución: un intérprete Tk
+en un hilo propio, que toma el portapapeles en cada copia y atiende las
+solicitudes de pegado del navegador desde su bucle de eventos. copiar()
+vuelve recién cuando el texto ya es el contenido del portapapeles.
+
+El mecanismo se elige con la variable WSP_PORTAPAPELES:
+    - "auto" (por defecto): Tk si está disponible y hay pantalla, si no pyperclip
+    - "tk": solo Tk
+    - "pyperclip": un proceso por copia, como antes
+
+tkinter y pyperclip se importan recién al crear el portapapeles, de modo
+que importar este módulo no carga módulos de interfaz gráfica.
+"""
+
+import logging
+import os
+import queue
+import threading
+from typing import Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Variable de entorno con el mecanismo de portapapeles
+PORTAPAPELES_ENV = "WSP_PORTAPAPELES"
+MECANISMOS = ("auto", "tk", "pyperclip")
+
+# Configuraciones por defecto
+DEFAULT_TIMEOUT = 5.0  # Segundos máximos para iniciar Tk o completar una copia
+INTERVALO_TK_MS = 2  # Milisegundos entre revisiones de la cola de copias
+
+
+class Portapapeles:
+    """Mecanismo para dejar un texto en el portapapeles del sistema."""
+
+    nombre = "base"
+
+    def __enter__(self) -> "Portapapeles":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.cerrar()
+
+    def copiar(self, texto: str) -> None:
+        """
+        Deja el texto en el portapapeles.
+
+        Raises:
+            RuntimeError: Si no se pudo copiar
+        """
+        raise NotImplementedError
+
+    def cerrar(self) -> None:
+        """Libera los recursos del portapapeles."""
+
+
+class PortapapelesPyperclip(Portapapeles):
+    """Copia con pyperclip: en Linux y macOS, un proceso nuevo por copia."""
+
+    nombre = "pyperclip"
+
+    def __init__(self) -> None:
+        import pyperclip
+
+        self._pyperclip = pyperclip
+
+    def copiar(self, texto: str) -> None:
+        self._pyperclip.copy(texto)
+
+
+class PortapapelesTk(Portapapeles):
+    """
+    Dueño persistente del portapapeles con Tk, en un hilo propio.
+
+    Tk no admite llamadas desde varios hilos: el intérprete se crea, se usa
+    y se destruye solo en el hilo del portapapeles, y copiar() le entrega
+    los textos por una cola.
+
+    Args:
+        timeout: Segundos máximos para iniciar Tk y para cada copia
+
+    Raises:
+        RuntimeError: Si tkinter no está instalado o no hay pantalla
+
+    Example:
+        >>> with PortapapelesTk() as portapapeles:
+        ...     portapapeles.copiar("Hola")
+    """
+
+    nombre = "tk"
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT) -> None:
+        self.timeout = timeout
+        self._pedidos: "queue.Queue[Optional[Tuple[str, threading.Event]]]" = queue.Queue()
+        self._error: Optional[str] = None
+        iniciado = threading.Event()
+        self._hilo = threading.Thread(
+            target=self._ejecutar, args=(iniciado,),
+            name="wsp-portapapeles", daemon=True
+        )
+        self._hilo.start()
+        if not iniciado.wait(timeout):
+            raise RuntimeError("Tk no respondió al iniciar el portapapeles")
+        if self._error is not None:
+            raise RuntimeError(f"No se pudo iniciar el portapapeles Tk: {self._error}")
+
+    def _ejecutar(self, iniciado: threading.Event) -> None:
+        """Bucle del hilo del portapapeles: atiende copias y pedidos de pegado."""
+        try:
+            import tkinter
+
+            raiz = tkinter.Tk()
+            raiz.withdraw()
+        except Exception as e:  # ImportError, o TclError si no hay pantalla
+            self._error = str(e)
+            iniciado.set()
+            return
+        iniciado.set()
+
+        def atender() -> None:
+            while True:
+                try:
+                    pedido = self._pedidos.get_nowait()
+                except queue.Empty:
+                    break
+                if pedido is None:
+                    raiz.destroy()
+                    return
+                texto, hecho = pedido
+                try:
+                    raiz.clipboard_clear()
+                    raiz.clipboard_append(texto)
+                    # Procesar eventos pendientes: la toma del portapapeles
+                    # llega al servidor gráfico antes de avisar que terminó
+                    raiz.update()
+                except Exception as e:
+                    logger.debug("Error copiando al portapapeles Tk: %s", e)
+                else:
+                    hecho.set()
+            raiz.after(INTERVALO_TK_MS, atender)
+
+        raiz.after(0, atender)
+        raiz.mainloop()
+
+    def copiar(self, texto: str) -> None:
+        if not self._hilo.is_alive():
+            raise RuntimeError("El portapapeles Tk está cerrado")
+        hecho = threading.Event()
+        self._pedidos.put((texto, hecho))
+        if not hecho.wait(self.timeout):
+            raise RuntimeError("El portapapeles Tk no completó la copia")
+
+    def cerrar(self) -> None:
+        if self._hilo.is_alive():
+            self._pedidos.put(None)
+            self._hilo.join(self.timeout)
+
+
+def crear_portapapeles(mecanismo: Optional[str] = None) -> Portapapeles:
+    """
+    Crea el portapapeles configurado.
+
+    Args:
+        mecanismo: "auto", "tk" o "pyperclip" (por defecto la variable
+            WSP_PORTAPAPELES, o "auto")
+
+    Returns:
+        Portapapeles listo para usar
+
+    Raises:
+        ValueError: Si el mecanismo no es válido
+        RuntimeError: Si se pidió "tk" y no está disponible
+    """
+    if mecanismo is None:
+        mecanismo = os.getenv(PORTAPAPELES_ENV, "").strip().lower() or "auto"
+    if mecanismo not in MECANISMOS:
+        raise ValueError(
+            f"{PORTAPAPELES_ENV} debe ser uno de {', '.join(MECANISMOS)}: {mecanismo!r}"
+        )
+
+    if mecanismo == "pyperclip":
+        return PortapapelesPyperclip()
+    if mecanismo == "tk":
+        return PortapapelesTk()
+    try:
+        return PortapapelesTk()
+    except RuntimeError as e:
+        logger.info("%s; se usará pyperclip", e)
+        return PortapapelesPyperclip()
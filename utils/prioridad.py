@@ -0,0 +1,204 @@
+"""
+Módulo de priorización de envíos por urgencia.
+
+Por defecto los mensajes se envían en el orden del Excel. Cuando no hay
+tiempo para enviarlos todos (cada envío por WhatsApp Web toma unos 12 s),
+ColaPrioridad ordena los envíos por urgencia y, con un presupuesto de
+tiempo, elige los más urgentes que alcanzan a enviarse:
+
+    1. Fecha de vencimiento del próximo pago (diaAPagar / mesAPagar) más
+       cercana o más atrasada primero; los contactos sin fecha van al final
+    2. Más pagos pendientes (faltantes) primero
+    3. Orden del Excel, para desempatar
+
+La cola es un heap: agregar contactos nuevos cuesta O(log n) y no obliga a
+reordenar los que ya estaban.
+"""
+
+import datetime
+import heapq
+import itertools
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .planificador import LimitadorEnvios
+from .registros import DatosPago, Destinatario
+
+logger = logging.getLogger(__name__)
+
+# Segundos estimados por envío de cada transporte, para planificar con presupuesto
+DURACION_ENVIO_ESTIMADA: Dict[str, float] = {"gui": 12.0, "http": 1.0, "nulo": 0.0}
+
+MESES: Dict[str, int] = {
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4, "mayo": 5, "junio": 6,
+    "julio": 7, "agosto": 8, "septiembre": 9, "setiembre": 9, "octubre": 10,
+    "noviembre": 11, "diciembre": 12,
+}
+
+# Urgencia: (ordinal de la fecha de vencimiento, -faltantes); menor es más urgente
+Urgencia = Tuple[int, int]
+_SIN_FECHA = datetime.date.max.toordinal()
+
+
+def fecha_vencimiento(
+    pagos: DatosPago,
+    hoy: Optional[datetime.date] = None
+) -> Optional[datetime.date]:
+    """
+    Calcula la fecha del próximo pago a partir del día y el mes de la planilla.
+
+    La planilla no indica el año: se usa el del vencimiento más cercano a
+    hoy (el año anterior, el actual o el siguiente), de modo que un pago de
+    diciembre visto en enero se considera atrasado y no once meses a futuro.
+
+    Args:
+        pagos: Estado de pago del contacto
+        hoy: Fecha de referencia (por defecto la fecha local actual)
+
+    Returns:
+        Fecha de vencimiento, o None si el día o el mes no se reconocen o
+        el día no está entre 1 y 31 (un día 31 en un mes de 30 días vence
+        el último día del mes)
+    """
+    mes = MESES.get(str(pagos.mes_a_pagar or "").strip().lower())
+    try:
+        dia = int(float(str(pagos.dia_a_pagar).strip()))
+    except (ValueError, OverflowError):  # OverflowError: "inf"
+        return None
+    if mes is None or not 1 <= dia <= 31:
+        return None
+
+    hoy = hoy or datetime.date.today()
+    candidatas = []
+    for anio in (hoy.year - 1, hoy.year, hoy.year + 1):
+        try:
+            candidatas.append(datetime.date(anio, mes, dia))
+        except ValueError:
+            # Día fuera del mes (ej: 31 de junio): último día del mes
+            siguiente = datetime.date(anio + mes // 12, mes % 12 + 1, 1)
+            candidatas.append(siguiente - datetime.timedelta(days=1))
+    return min(candidatas, key=lambda fecha: abs(fecha - hoy))
+
+
+def urgencia(item: Destinatario, hoy: Optional[datetime.date] = None) -> Urgencia:
+    """
+    Calcula la clave de urgencia de un contacto o grupo.
+
+    Un grupo es tan urgente como su integrante más urgente.
+
+    Returns:
+        Tupla (ordinal del vencimiento, -faltantes); menor es más urgente
+    """
+    hoy = hoy or datetime.date.today()
+    claves = []
+    for miembro in item.miembros or (item,):
+        fecha = fecha_vencimiento(miembro.pagos, hoy)
+        faltantes = miembro.pagos.faltantes
+        claves.append((
+            fecha.toordinal() if fecha is not None else _SIN_FECHA,
+            -faltantes if isinstance(faltantes, int) else 0,
+        ))
+    return min(claves)
+
+
+class ColaPrioridad:
+    """
+    Cola de envíos ordenada por urgencia.
+
+    Args:
+        items: Contactos o grupos iniciales, en el orden del Excel
+        hoy: Fecha de referencia para los vencimientos (por defecto hoy)
+
+    Example:
+        >>> cola = ColaPrioridad(destinatarios)
+        >>> cola.agregar(contacto_nuevo)
+        >>> elegidos, omitidos = cola.planificar(3600, duracion_envio=12)
+    """
+
+    def __init__(
+        self,
+        items: Iterable[Destinatario] = (),
+        hoy: Optional[datetime.date] = None
+    ) -> None:
+        self.hoy = hoy or datetime.date.today()
+        self._orden = itertools.count()
+        self._heap: List[Tuple[Urgencia, int, Destinatario]] = [
+            (urgencia(item, self.hoy), next(self._orden), item) for item in items
+        ]
+        heapq.heapify(self._heap)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def agregar(self, item: Destinatario) -> None:
+        """Agrega un contacto o grupo en O(log n), después de los igual de urgentes."""
+        heapq.heappush(self._heap, (urgencia(item, self.hoy), next(self._orden), item))
+
+    def sacar(self) -> Destinatario:
+        """
+        Saca el envío más urgente.
+
+        Raises:
+            IndexError: Si la cola está vacía
+        """
+        return heapq.heappop(self._heap)[2]
+
+    def ordenados(self) -> List[Destinatario]:
+        """Todos los envíos de la cola, del más al menos urgente, sin sacarlos."""
+        return [item for _, _, item in sorted(self._heap)]
+
+    def planificar(
+        self,
+        presupuesto: Optional[float],
+        duracion_envio: float,
+        limitador: Optional[LimitadorEnvios] = None
+    ) -> Tuple[List[Destinatario], List[Destinatario]]:
+        """
+        Elige los envíos más urgentes que alcanzan a enviarse en el presupuesto.
+
+        Args:
+            presupuesto: Segundos disponibles, o None para enviar todos
+            duracion_envio: Segundos estimados por envío (ya divididos por la
+                cantidad de envíos simultáneos del transporte)
+            limitador: Planificador de ritmo, cuyos límites también cuentan
+
+        Returns:
+            Tupla (envíos elegidos por urgencia, envíos que no alcanzan), sin
+            sacarlos de la cola. Los contactos sin teléfono no consumen
+            presupuesto (se omiten al enviar).
+        """
+        orden = self.ordenados()
+        if presupuesto is None:
+            return orden, []
+
+        def tiempo(cantidad: int) -> float:
+            if limitador is not None:
+                return limitador.eta(cantidad, duracion_envio)
+            return cantidad * duracion_envio
+
+        # Mayor cantidad de envíos cuyo tiempo estimado cabe en el presupuesto
+        enviables = sum(1 for item in orden if item.telefono)
+        bajo, alto = 0, enviables
+        while bajo < alto:
+            medio = (bajo + alto + 1) // 2
+            if tiempo(medio) <= presupuesto:
+                bajo = medio
+            else:
+                alto = medio - 1
+
+        elegidos: List[Destinatario] = []
+        omitidos: List[Destinatario] = []
+        restantes = bajo
+        for item in orden:
+            if not item.telefono:
+                elegidos.append(item)
+            elif restantes > 0:
+                elegidos.append(item)
+                restantes -= 1
+            else:
+                omitidos.append(item)
+
+        if omitidos:
+            logger.info("Presupuesto de tiempo: %d envíos caben, %d quedan para después",
+                        bajo, len(omitidos))
+        return elegidos, omitidos
@@ -0,0 +1,187 @@
+"""
+Módulo de registros compactos de contactos y estados de pago.
+
+Cada contacto leído era un diccionario con otro diccionario (dataPagos)
+adentro, repitiendo las mismas claves de texto en cada fila. Con cientos de
+miles de filas eso son varios cientos de bytes por contacto y mucho trabajo
+para el recolector de basura. Estas clases usan __slots__ (sin __dict__ por
+instancia) y el estado de pago es inmutable, de modo que los contactos con
+la misma cantidad de pagos comparten un único DatosPago (ver
+manejo_archivo.EsquemaPagos.estados).
+
+El formato de diccionario se mantiene para la vista previa JSON, las
+salidas ndjson y las plantillas mediante to_dict().
+"""
+
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+
+class DatosPago:
+    """
+    Estado de pago de un contacto (inmutable).
+
+    Args:
+        cantidad_pagado: Número de pagos consecutivos realizados
+        faltantes: Número de pagos pendientes
+        dia_a_pagar: Día del próximo pago
+        mes_a_pagar: Mes del próximo pago
+    """
+
+    __slots__ = ("cantidad_pagado", "faltantes", "dia_a_pagar", "mes_a_pagar")
+
+    def __init__(
+        self,
+        cantidad_pagado: int,
+        faltantes: int,
+        dia_a_pagar: Optional[str],
+        mes_a_pagar: Optional[str]
+    ) -> None:
+        object.__setattr__(self, "cantidad_pagado", cantidad_pagado)
+        object.__setattr__(self, "faltantes", faltantes)
+        object.__setattr__(self, "dia_a_pagar", dia_a_pagar)
+        object.__setattr__(self, "mes_a_pagar", mes_a_pagar)
+
+    def __setattr__(self, nombre: str, valor: Any) -> None:
+        raise AttributeError("DatosPago es inmutable: es compartido entre contactos")
+
+    def clave(self) -> Tuple[int, int, Optional[str], Optional[str]]:
+        """Valores como tupla (cantidadPagado, faltantes, diaAPagar, mesAPagar)."""
+        return self.cantidad_pagado, self.faltantes, self.dia_a_pagar, self.mes_a_pagar
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Diccionario dataPagos con las claves históricas."""
+        return {
+            "cantidadPagado": self.cantidad_pagado,
+            "faltantes": self.faltantes,
+            "diaAPagar": self.dia_a_pagar,
+            "mesAPagar": self.mes_a_pagar
+        }
+
+    @classmethod
+    def desde_dict(cls, data_pagos: Dict[str, Any]) -> "DatosPago":
+        """Construye el estado desde un diccionario dataPagos."""
+        return cls(
+            data_pagos.get("cantidadPagado", 0),
+            data_pagos.get("faltantes", 0),
+            data_pagos.get("diaAPagar", "N/A"),
+            data_pagos.get("mesAPagar", "N/A")
+        )
+
+    def __eq__(self, otro: object) -> bool:
+        if not isinstance(otro, DatosPago):
+            return NotImplemented
+        return self.clave() == otro.clave()
+
+    def __hash__(self) -> int:
+        return hash(self.clave())
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # pickle guarda una sola vez cada estado compartido
+        return DatosPago, self.clave()
+
+    def __repr__(self) -> str:
+        return (f"DatosPago(cantidad_pagado={self.cantidad_pagado!r}, "
+                f"faltantes={self.faltantes!r}, dia_a_pagar={self.dia_a_pagar!r}, "
+                f"mes_a_pagar={self.mes_a_pagar!r})")
+
+
+# Estado usado cuando los pagos de una fila no se pueden calcular
+PAGOS_DESCONOCIDOS = DatosPago(0, 0, "N/A", "N/A")
+
+
+class Contacto:
+    """
+    Contacto leído del archivo de entrada.
+
+    Args:
+        nombre: Nombre formateado del contacto
+        telefono: Teléfono formateado para WhatsApp
+        pagos: Estado de pago del contacto
+
+    Example:
+        >>> contacto = Contacto("Ana Pérez", "+56912345678", DatosPago(3, 2, "5", "Junio"))
+        >>> contacto.to_dict()["dataPagos"]["faltantes"]
+        2
+    """
+
+    __slots__ = ("nombre", "telefono", "pagos")
+
+    # Un contacto individual no es un grupo (ver Grupo.miembros)
+    miembros: Optional[List["Contacto"]] = None
+
+    def __init__(self, nombre: Optional[str], telefono: Optional[str], pagos: DatosPago) -> None:
+        self.nombre = nombre
+        self.telefono = telefono
+        self.pagos = pagos
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Diccionario con nombre, telefono y dataPagos, para la vista previa JSON."""
+        return {
+            "nombre": self.nombre,
+            "telefono": self.telefono,
+            "dataPagos": self.pagos.to_dict()
+        }
+
+    @classmethod
+    def desde_dict(cls, contacto: Dict[str, Any]) -> "Contacto":
+        """Construye el contacto desde su forma de diccionario."""
+        return cls(
+            contacto.get("nombre"),
+            contacto.get("telefono"),
+            DatosPago.desde_dict(contacto.get("dataPagos") or {})
+        )
+
+    def __eq__(self, otro: object) -> bool:
+        if not isinstance(otro, Contacto):
+            return NotImplemented
+        return (self.nombre, self.telefono, self.pagos) == (otro.nombre, otro.telefono, otro.pagos)
+
+    __hash__ = None  # type: ignore[assignment]  # mutable, como el diccionario que reemplaza
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return Contacto, (self.nombre, self.telefono, self.pagos)
+
+    def __repr__(self) -> str:
+        return f"Contacto({self.nombre!r}, {self.telefono!r}, {self.pagos!r})"
+
+
+class Grupo:
+    """
+    Contactos que comparten teléfono y reciben un único mensaje.
+
+    Args:
+        nombre: Nombres de los integrantes unidos (ej: "Ana y Luis")
+        telefono: Teléfono común
+        miembros: Contactos originales, en orden
+    """
+
+    __slots__ = ("nombre", "telefono", "miembros")
+
+    def __init__(self, nombre: str, telefono: Optional[str], miembros: List[Contacto]) -> None:
+        self.nombre = nombre
+        self.telefono = telefono
+        self.miembros = miembros
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Diccionario con nombre, telefono y los miembros como diccionarios."""
+        return {
+            "nombre": self.nombre,
+            "telefono": self.telefono,
+            "miembros": [miembro.to_dict() for miembro in self.miembros]
+        }
+
+    def __eq__(self, otro: object) -> bool:
+        if not isinstance(otro, Grupo):
+            return NotImplemented
+        return (self.nombre, self.telefono, self.miembros) == (
+            otro.nombre, otro.telefono, otro.miembros
+        )
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"Grupo({self.nombre!r}, {self.telefono!r}, {self.miembros!r})"
+
+
+# Elemento a enviar: un contacto o un grupo de contactos
+Destinatario = Union[Contacto, Grupo]
@@ -0,0 +1,184 @@
+"""
+Módulo de salida por consola o archivo de la vista previa y los envíos.
+
+Modos disponibles:
+    - completo: todos los contactos como JSON indentado y cada mensaje completo
+      (el comportamiento histórico del script)
+    - resumen: solo los primeros N contactos y mensajes, más los totales
+    - ndjson: un objeto JSON por línea y por contacto o envío, escrito a medida
+      que se genera, para redirigirlo a un archivo o a otro programa
+    - silencioso: solo los totales al terminar
+
+Todas las escrituras pasan por un buffer que se vacía por bloques, de modo
+que la consola no se convierte en el cuello de botella con listas grandes.
+"""
+
+import json
+import logging
+import sys
+from typing import Any, Dict, Iterable, List, Optional, TextIO
+
+from .bitacora_envios import Envio
+from .registros import Contacto
+
+logger = logging.getLogger(__name__)
+
+# Modos de salida
+COMPLETO = "completo"
+RESUMEN = "resumen"
+NDJSON = "ndjson"
+SILENCIOSO = "silencioso"
+MODOS = (COMPLETO, RESUMEN, NDJSON, SILENCIOSO)
+
+# Configuraciones por defecto
+DEFAULT_PAGINA = 20  # Contactos y mensajes mostrados en modo resumen
+TAMANO_BUFFER = 64 * 1024  # Caracteres acumulados antes de escribir
+
+
+class Salida:
+    """
+    Escritor de la vista previa y de los envíos según el modo elegido.
+
+    Args:
+        modo: Uno de MODOS
+        destino: Archivo donde escribir (por defecto sys.stdout)
+        pagina: Cantidad de contactos y mensajes mostrados en modo resumen
+
+    Example:
+        >>> with Salida(NDJSON, open("vista.ndjson", "w", encoding="utf-8")) as salida:
+        ...     salida.datos(data)
+        ...     salida.envio(Envio(1, "Ana", "+56912345678", "Hola"), total=1)
+    """
+
+    def __init__(
+        self,
+        modo: str = COMPLETO,
+        destino: Optional[TextIO] = None,
+        pagina: int = DEFAULT_PAGINA
+    ) -> None:
+        if modo not in MODOS:
+            raise ValueError(f"Modo de salida desconocido: {modo!r}")
+        self.modo = modo
+        self.pagina = max(0, pagina)
+        self._destino = destino
+        self._buffer: List[str] = []
+        self._pendiente = 0
+        self.contactos = 0
+        self.envios = 0
+
+    def __enter__(self) -> "Salida":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.cerrar()
+
+    def _escribir(self, texto: str) -> None:
+        """Acumula texto y lo escribe cuando el buffer supera TAMANO_BUFFER."""
+        self._buffer.append(texto)
+        self._pendiente += len(texto)
+        if self._pendiente >= TAMANO_BUFFER:
+            self.vaciar()
+
+    def vaciar(self) -> None:
+        """Escribe el contenido del buffer en el destino."""
+        if not self._buffer:
+            return
+        destino = self._destino or sys.stdout
+        destino.write("".join(self._buffer))
+        destino.flush()
+        self._buffer.clear()
+        self._pendiente = 0
+
+    def _linea_json(self, tipo: str, contenido: Dict[str, Any]) -> None:
+        """Escribe un registro NDJSON."""
+        self._escribir(
+            json.dumps({"tipo": tipo, **contenido}, ensure_ascii=False, default=str)
+            + "\n"
+        )
+
+    def datos(self, data: Iterable[Contacto]) -> None:
+        """
+        Muestra los contactos leídos.
+
+        Args:
+            data: Contactos a mostrar
+        """
+        if self.modo == NDJSON:
+            for contacto in data:
+                self.contactos += 1
+                self._linea_json("contacto", contacto.to_dict())
+            return
+
+        data = list(data)
+        self.contactos += len(data)
+        if self.modo == SILENCIOSO:
+            return
+
+        visibles = [
+            contacto.to_dict()
+            for contacto in (data if self.modo == COMPLETO else data[:self.pagina])
+        ]
+        self._escribir("=== DATOS LEÍDOS ===\n")
+        try:
+            self._escribir(json.dumps(visibles, ensure_ascii=False, indent=2) + "\n")
+        except Exception as e:
+            logger.warning("No se pudo mostrar datos como JSON: %s", e)
+            self._escribir(f"Datos leídos: {visibles}\n")
+        if len(visibles) < len(data):
+            self._escribir(f"... y {len(data) - len(visibles)} contactos más\n")
+        self._escribir("=== FIN DATOS ===\n\n")
+
+    def contacto(self, contacto: Contacto) -> None:
+        """
+        Muestra un contacto a medida que se lee (pipeline de envío).
+
+        Solo el modo ndjson lo escribe; los demás modos solo lo cuentan
+        para los totales, porque el volcado JSON necesita la lista completa.
+
+        Args:
+            contacto: Contacto leído
+        """
+        self.contactos += 1
+        if self.modo == NDJSON:
+            self._linea_json("contacto", contacto.to_dict())
+
+    def envio(self, envio: Envio, total: Optional[int] = None, en_vivo: bool = False) -> None:
+        """
+        Muestra el destinatario y el mensaje de un envío.
+
+        Args:
+            envio: Envío a mostrar
+            total: Total de contactos, solo para mostrar el avance
+            en_vivo: Si True (durante el envío real), se escribe de inmediato
+                en vez de esperar a que se llene el buffer
+        """
+        self.envios += 1
+        if self.modo == NDJSON:
+            self._linea_json("envio", envio._asdict())
+            if en_vivo:
+                self.vaciar()
+            return
+        if self.modo == SILENCIOSO:
+            return
+        if self.modo == RESUMEN and self.envios > self.pagina:
+            return
+
+        numero = f"{envio.posicion}/{total}" if total else f"{envio.posicion}"
+        self._escribir(
+            f"\n=== CONTACTO {numero} ===\n"
+            f"Destinatario: {envio.nombre} ({envio.telefono})\n"
+            f"Mensaje:\n{envio.mensaje}\n"
+            f"{'=' * 50}\n"
+        )
+        if en_vivo:
+            self.vaciar()
+
+    def cerrar(self) -> None:
+        """Escribe los totales (salvo en modo completo) y vacía el buffer."""
+        if self.modo == RESUMEN and self.envios > self.pagina:
+            self._escribir(f"\n... y {self.envios - self.pagina} mensajes más\n")
+        if self.modo == NDJSON:
+            self._linea_json("totales", {"contactos": self.contactos, "envios": self.envios})
+        elif self.modo != COMPLETO:
+            self._escribir(f"Total: {self.contactos} contactos, {self.envios} mensajes\n")
+        self.vaciar()
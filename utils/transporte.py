@@ -0,0 +1,519 @@
+"""
+Módulo de transportes de envío de mensajes.
+
+Define la interfaz común por la que process_contacts despacha los mensajes
+y sus implementaciones:
+
+- TransporteGUI: automatización de WhatsApp Web con pyautogui (wsp_message)
+- TransporteHTTP: API HTTP al estilo de WhatsApp Cloud API, con un pool de
+  conexiones keep-alive y envíos concurrentes acotados con asyncio
+- TransporteNulo: no envía nada; útil para vistas previas y mediciones
+- TransporteFragmentado (fragmentos.py): reparte los envíos entre varios
+  procesos, cada uno con su pantalla virtual y perfil de navegador
+
+La configuración de TransporteHTTP se lee de las variables de entorno
+WSP_API_URL, WSP_API_TOKEN y WSP_API_CONCURRENCIA, y la latencia simulada
+de TransporteNulo de WSP_NULO_LATENCIA.
+
+El resultado de cada envío es True (llegó), False (no llegó) o None (no se
+sabe: por ejemplo, la API no respondió a tiempo después de recibir la
+solicitud). Un resultado None no se reintenta, para no duplicar el mensaje.
+"""
+
+import asyncio
+import http.client
+import json
+import logging
+import os
+import queue
+import select
+import socket
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from .bitacora_envios import Envio
+from .planificador import LimitadorEnvios
+
+logger = logging.getLogger(__name__)
+
+# Variables de entorno del transporte HTTP
+API_URL_ENV = "WSP_API_URL"
+API_TOKEN_ENV = "WSP_API_TOKEN"
+API_CONCURRENCIA_ENV = "WSP_API_CONCURRENCIA"
+
+# Variable de entorno con la latencia simulada del transporte nulo
+NULO_LATENCIA_ENV = "WSP_NULO_LATENCIA"
+
+# Configuraciones por defecto
+DEFAULT_MAX_EN_VUELO = 16  # Solicitudes HTTP simultáneas como máximo
+DEFAULT_HTTP_TIMEOUT = 30.0  # Timeout de cada solicitud HTTP (segundos)
+
+# Ganchos de process_contacts: antes de cada envío y con su resultado
+# (True si llegó, False si no, None si no se sabe)
+AntesEnvio = Callable[[Envio], None]
+DespuesEnvio = Callable[[Envio, Optional[bool], Optional[str]], None]
+
+# Errores de una conexión keep-alive que el servidor cerró mientras estaba
+# inactiva. Solo indican que la solicitud no llegó a procesarse si ocurren
+# al escribirla: si ocurren esperando la respuesta, el servidor pudo
+# haberla recibido antes de cortar
+_ERRORES_CONEXION_CERRADA = (
+    http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError
+)
+
+
+def _sin_gancho(*args: Any) -> None:
+    """Gancho por defecto que no hace nada."""
+
+
+class Transporte:
+    """
+    Interfaz base de los mecanismos de envío.
+
+    Las subclases implementan enviar(); enviar_lote() recorre los envíos en
+    orden y puede reemplazarse por una versión concurrente.
+    """
+
+    nombre = "base"
+
+    def __enter__(self) -> "Transporte":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.cerrar()
+
+    def enviar(self, telefono: str, mensaje: str) -> Optional[bool]:
+        """
+        Envía un mensaje a un teléfono.
+
+        Args:
+            telefono: Número con formato internacional (ej: +56912345678)
+            mensaje: Texto del mensaje
+
+        Returns:
+            True si el envío fue exitoso, False si falló y None si no se
+            sabe si el mensaje llegó
+        """
+        raise NotImplementedError
+
+    def enviar_lote(
+        self,
+        envios: Sequence[Envio],
+        antes: AntesEnvio = _sin_gancho,
+        despues: DespuesEnvio = _sin_gancho,
+        limitador: Optional[LimitadorEnvios] = None
+    ) -> List[Optional[bool]]:
+        """
+        Envía una lista de mensajes llamando a los ganchos en cada envío.
+
+        Args:
+            envios: Mensajes a enviar
+            antes: Se llama justo antes de cada envío
+            despues: Se llama con (envio, exito, error) al terminar cada envío
+            limitador: Planificador que marca el ritmo de los envíos (opcional)
+
+        Returns:
+            Lista con el resultado de cada envío (True, False o None si no se
+            sabe), en el mismo orden
+        """
+        resultados = []
+        for envio in envios:
+            if limitador is not None:
+                limitador.esperar()
+            antes(envio)
+            error = None
+            try:
+                exito = self.enviar(envio.telefono, envio.mensaje)
+                if exito is None:
+                    error = f"el transporte {self.nombre} no confirmó si el mensaje llegó"
+                elif not exito:
+                    error = f"el transporte {self.nombre} no pudo completar el envío"
+            except Exception as e:
+                exito, error = False, str(e)
+            despues(envio, exito, error)
+            resultados.append(exito)
+        return resultados
+
+    def cerrar(self) -> None:
+        """Libera los recursos del transporte."""
+
+
+class TransporteNulo(Transporte):
+    """
+    Transporte que no envía nada y siempre informa éxito.
+
+    Args:
+        latencia: Segundos que simula tardar cada envío (para probar el
+            reparto entre emisores sin pantalla, ver fragmentos.py)
+    """
+
+    nombre = "nulo"
+
+    def __init__(self, latencia: float = 0.0) -> None:
+        self.latencia = max(0.0, latencia)
+
+    def enviar(self, telefono: str, mensaje: str) -> bool:
+        if self.latencia:
+            time.sleep(self.latencia)
+        return True
+
+
+class TransporteGUI(Transporte):
+    """
+    Transporte por automatización de WhatsApp Web (pyautogui).
+
+    Args:
+        sesion: Si True, usa SesionWhatsApp y mantiene una sola pestaña abierta
+        sonda: Sonda de disponibilidad del chat (por defecto sonda_desde_entorno())
+        controlador: Acciones de interfaz (por defecto wsp_message.ControladorGUI)
+    """
+
+    nombre = "gui"
+
+    def __init__(
+        self,
+        sesion: bool = False,
+        sonda: Optional[Callable[[], bool]] = None,
+        controlador: Optional[Any] = None
+    ):
+        # Importación diferida: wsp_message solo se carga con este transporte y
+        # pyautogui y el portapapeles recién en el primer envío
+        from . import wsp_message
+
+        if sonda is None:
+            sonda = wsp_message.sonda_desde_entorno()
+        self._sonda = sonda
+        self._controlador = controlador
+        self._sesion = (
+            wsp_message.SesionWhatsApp(sonda=sonda, controlador=controlador)
+            if sesion else None
+        )
+        self._enviar = wsp_message.enviarMensajeWhatsApp
+        self._cerrar_portapapeles = wsp_message.cerrar_portapapeles
+
+    def enviar(self, telefono: str, mensaje: str) -> Optional[bool]:
+        if self._sesion is not None:
+            return self._sesion.enviar(telefono, mensaje)
+        return self._enviar(telefono, mensaje, sonda=self._sonda,
+                            controlador=self._controlador)
+
+    def cerrar(self) -> None:
+        if self._sesion is not None:
+            self._sesion.cerrar()
+        self._cerrar_portapapeles()
+
+
+def _cerrada_por_el_servidor(conexion: http.client.HTTPConnection) -> bool:
+    """
+    Indica si el servidor cerró una conexión keep-alive inactiva.
+
+    Una conexión inactiva no tiene nada que leer: si el socket está listo
+    para lectura, el servidor la cerró (o envió datos inesperados).
+    """
+    if conexion.sock is None:
+        return True
+    try:
+        legibles, _, _ = select.select([conexion.sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(legibles)
+
+
+class _PoolConexiones:
+    """
+    Pool de conexiones HTTP keep-alive hacia un mismo servidor.
+
+    Args:
+        url: URL del endpoint (http o https)
+        tamano: Cantidad máxima de conexiones inactivas conservadas
+        timeout: Timeout de cada conexión en segundos
+    """
+
+    def __init__(self, url: urllib.parse.SplitResult, tamano: int, timeout: float):
+        self._clase = (
+            http.client.HTTPSConnection if url.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        self._host = url.hostname
+        self._puerto = url.port
+        self._timeout = timeout
+        self._libres: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(
+            tamano
+        )
+
+    def obtener(self, nueva: bool = False) -> Tuple[http.client.HTTPConnection, bool]:
+        """
+        Entrega una conexión libre o crea una nueva.
+
+        Las conexiones libres que el servidor ya cerró se descartan antes de
+        usarlas, porque un corte después de escribir la solicitud no se
+        puede reintentar.
+
+        Args:
+            nueva: Si True, no reutiliza una conexión libre
+
+        Returns:
+            Tupla (conexión, True si es una conexión keep-alive reutilizada)
+        """
+        while not nueva:
+            try:
+                conexion = self._libres.get_nowait()
+            except queue.Empty:
+                break
+            if not _cerrada_por_el_servidor(conexion):
+                return conexion, True
+            logger.debug("Conexión keep-alive cerrada por el servidor, descartada")
+            conexion.close()
+        return self._clase(self._host, self._puerto, timeout=self._timeout), False
+
+    def devolver(self, conexion: http.client.HTTPConnection) -> None:
+        """Devuelve una conexión al pool para reutilizarla."""
+        try:
+            self._libres.put_nowait(conexion)
+        except queue.Full:
+            conexion.close()
+
+    def cerrar(self) -> None:
+        """Cierra todas las conexiones libres."""
+        while True:
+            try:
+                self._libres.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class TransporteHTTP(Transporte):
+    """
+    Transporte por API HTTP al estilo de WhatsApp Cloud API.
+
+    Cada mensaje se envía como POST JSON al endpoint configurado. Las
+    conexiones se reutilizan (keep-alive) desde un pool, y enviar_lote()
+    despacha los mensajes de forma concurrente con asyncio, con a lo más
+    max_en_vuelo solicitudes simultáneas.
+
+    Args:
+        url: URL completa del endpoint de mensajes
+            (ej: https://graph.facebook.com/v19.0/<PHONE_NUMBER_ID>/messages)
+        token: Token de acceso, enviado como "Authorization: Bearer"
+        max_en_vuelo: Solicitudes simultáneas como máximo
+        timeout: Timeout de cada solicitud en segundos
+
+    Example:
+        >>> with TransporteHTTP("http://127.0.0.1:8080/messages", "token") as t:
+        ...     t.enviar_lote(envios)
+        [True, True]
+    """
+
+    nombre = "http"
+
+    def __init__(
+        self,
+        url: str,
+        token: str,
+        max_en_vuelo: int = DEFAULT_MAX_EN_VUELO,
+        timeout: float = DEFAULT_HTTP_TIMEOUT
+    ):
+        partes = urllib.parse.urlsplit(url)
+        if partes.scheme not in ("http", "https") or not partes.hostname:
+            raise ValueError(f"URL de API inválida: {url!r}")
+
+        self._ruta = partes.path or "/"
+        if partes.query:
+            self._ruta += "?" + partes.query
+        self._cabeceras = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+            "Connection": "keep-alive",
+        }
+        self.max_en_vuelo = max(1, max_en_vuelo)
+        self._timeout = timeout
+        self._pool = _PoolConexiones(partes, self.max_en_vuelo, timeout)
+        self._ejecutor = ThreadPoolExecutor(
+            max_workers=self.max_en_vuelo, thread_name_prefix="wsp-http"
+        )
+
+    @staticmethod
+    def _cuerpo(telefono: str, mensaje: str) -> bytes:
+        """Arma el cuerpo JSON de un mensaje de texto."""
+        return json.dumps({
+            "messaging_product": "whatsapp",
+            "to": telefono.lstrip("+"),
+            "type": "text",
+            "text": {"body": mensaje},
+        }, ensure_ascii=False).encode("utf-8")
+
+    def _post(self, telefono: str, mensaje: str) -> Tuple[Optional[bool], Optional[str]]:
+        """
+        Envía un mensaje con una conexión del pool.
+
+        El POST no es idempotente: solo se reintenta, una vez y con una
+        conexión nueva, cuando escribir la solicitud en una conexión
+        keep-alive reutilizada falla porque el servidor ya la había cerrado.
+        Si la conexión se corta o no hay respuesta a tiempo después de
+        escribir la solicitud, el resultado es None: el servidor pudo
+        haberla recibido y reintentarla duplicaría el mensaje.
+
+        Returns:
+            Tupla (exito, descripción del error); exito es None si no se
+            sabe si el mensaje llegó
+        """
+        cuerpo = self._cuerpo(telefono, mensaje)
+
+        for intento in range(2):
+            conexion, reutilizada = self._pool.obtener(nueva=intento > 0)
+            if not reutilizada:
+                # Conectar aparte: si falla, la solicitud seguro no salió
+                try:
+                    conexion.connect()
+                except OSError as e:
+                    conexion.close()
+                    return False, f"no se pudo conectar: {e}"
+            try:
+                conexion.request("POST", self._ruta, body=cuerpo, headers=self._cabeceras)
+            except _ERRORES_CONEXION_CERRADA as e:
+                conexion.close()
+                if reutilizada and intento == 0:
+                    logger.debug("Conexión keep-alive cerrada por el servidor, "
+                                 "reintentando con una nueva: %s", e)
+                    continue
+                return False, f"no se pudo enviar la solicitud: {e}"
+            except (http.client.HTTPException, OSError) as e:
+                # La solicitud no se terminó de escribir: el servidor no
+                # puede haberla procesado
+                conexion.close()
+                return False, f"no se pudo enviar la solicitud: {e}"
+
+            try:
+                respuesta = conexion.getresponse()
+                contenido = respuesta.read()
+            except _ERRORES_CONEXION_CERRADA as e:
+                conexion.close()
+                return None, f"conexión cortada sin respuesta: {e}"
+            except socket.timeout:
+                conexion.close()
+                return None, f"sin respuesta en {self._timeout:g} s"
+            except (http.client.HTTPException, OSError) as e:
+                conexion.close()
+                return None, f"sin respuesta válida: {e}"
+
+            if respuesta.will_close:
+                conexion.close()
+            else:
+                self._pool.devolver(conexion)
+
+            if 200 <= respuesta.status < 300:
+                return True, None
+            detalle = contenido[:200].decode("utf-8", errors="replace")
+            return False, f"HTTP {respuesta.status}: {detalle}"
+
+        return False, "sin respuesta del servidor"
+
+    def enviar(self, telefono: str, mensaje: str) -> Optional[bool]:
+        exito, error = self._post(telefono, mensaje)
+        if exito is None:
+            logger.warning("No se sabe si llegó el mensaje a %s por HTTP: %s",
+                           telefono, error)
+        elif not exito:
+            logger.error("Error enviando mensaje a %s por HTTP: %s", telefono, error)
+        return exito
+
+    async def _enviar_lote_async(
+        self,
+        envios: Sequence[Envio],
+        antes: AntesEnvio,
+        despues: DespuesEnvio,
+        limitador: Optional[LimitadorEnvios]
+    ) -> List[Optional[bool]]:
+        """Despacha los envíos en paralelo con un semáforo de max_en_vuelo."""
+        loop = asyncio.get_running_loop()
+        semaforo = asyncio.Semaphore(self.max_en_vuelo)
+
+        async def uno(envio: Envio) -> Optional[bool]:
+            async with semaforo:
+                if limitador is not None:
+                    await limitador.esperar_async()
+                # Los ganchos corren en el hilo del loop: la bitácora SQLite
+                # solo se usa desde el hilo que la creó
+                antes(envio)
+                try:
+                    exito, error = await loop.run_in_executor(
+                        self._ejecutor, self._post, envio.telefono, envio.mensaje
+                    )
+                except Exception as e:
+                    exito, error = False, str(e)
+                despues(envio, exito, error)
+                return exito
+
+        return list(await asyncio.gather(*(uno(envio) for envio in envios)))
+
+    def enviar_lote(
+        self,
+        envios: Sequence[Envio],
+        antes: AntesEnvio = _sin_gancho,
+        despues: DespuesEnvio = _sin_gancho,
+        limitador: Optional[LimitadorEnvios] = None
+    ) -> List[Optional[bool]]:
+        return asyncio.run(self._enviar_lote_async(envios, antes, despues, limitador))
+
+    def cerrar(self) -> None:
+        self._ejecutor.shutdown(wait=True)
+        self._pool.cerrar()
+
+
+def transporte_http_desde_entorno() -> TransporteHTTP:
+    """
+    Crea un TransporteHTTP con la configuración de las variables de entorno.
+
+    Returns:
+        Transporte configurado con WSP_API_URL, WSP_API_TOKEN y
+        WSP_API_CONCURRENCIA (opcional)
+
+    Raises:
+        ValueError: Si falta la URL o el token
+    """
+    url = os.getenv(API_URL_ENV, "").strip()
+    token = os.getenv(API_TOKEN_ENV, "").strip()
+    if not url or not token:
+        raise ValueError(
+            f"Definir {API_URL_ENV} y {API_TOKEN_ENV} para usar el transporte HTTP"
+        )
+
+    concurrencia = int(os.getenv(API_CONCURRENCIA_ENV, DEFAULT_MAX_EN_VUELO))
+    return TransporteHTTP(url, token, max_en_vuelo=concurrencia)
+
+
+def crear_transporte(nombre: str, sesion: bool = False, fragmentos: int = 1) -> Transporte:
+    """
+    Crea un transporte por nombre.
+
+    Args:
+        nombre: "gui", "http" o "nulo"
+        sesion: Para "gui", mantiene una sola pestaña de WhatsApp Web abierta
+        fragmentos: Emisores en paralelo para "gui" o "nulo", cada uno en su
+            propio proceso (ver fragmentos.py)
+
+    Returns:
+        Transporte listo para usar
+
+    Raises:
+        ValueError: Si el nombre no es válido o falta configuración
+        OSError: Si no se pudo iniciar una pantalla virtual de los fragmentos
+    """
+    if nombre not in ("gui", "http", "nulo"):
+        raise ValueError(f"Transporte desconocido: {nombre!r}")
+    latencia = float(os.getenv(NULO_LATENCIA_ENV, "0") or 0)
+    if fragmentos > 1:
+        if nombre == "http":
+            raise ValueError("El transporte HTTP ya envía en paralelo: usar "
+                             f"{API_CONCURRENCIA_ENV} en vez de fragmentos")
+        # Importación diferida: multiprocessing solo se usa con fragmentos
+        from .fragmentos import TransporteFragmentado
+
+        return TransporteFragmentado(fragmentos, nombre, sesion=sesion, latencia=latencia)
+    if nombre == "gui":
+        return TransporteGUI(sesion=sesion)
+    if nombre == "http":
+        return transporte_http_desde_entorno()
+    return TransporteNulo(latencia)
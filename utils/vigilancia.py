@@ -0,0 +1,111 @@
+"""
+Módulo de vigilancia de cambios del archivo de entrada.
+
+El modo residente (--watch) consulta periódicamente la fecha de
+modificación y el tamaño del archivo, sin dependencias externas ni
+servicios del sistema operativo, de modo que funciona igual en Windows,
+macOS, Linux y carpetas compartidas por red.
+
+Excel guarda el libro escribiendo un temporal y reemplazando el original,
+y una planilla puede copiarse por partes: un cambio solo se informa cuando
+la firma del archivo se mantiene igual durante una consulta completa, para
+no leer un archivo a medio escribir.
+"""
+
+import logging
+import os
+import time
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Configuraciones por defecto
+DEFAULT_INTERVALO = 2.0  # Segundos entre consultas del archivo
+
+# Firma de un archivo: (mtime en nanosegundos, tamaño en bytes)
+Firma = Tuple[int, int]
+
+
+def firma_archivo(ruta: str) -> Optional[Firma]:
+    """
+    Obtiene la firma de modificación de un archivo.
+
+    Returns:
+        Tupla (mtime en nanosegundos, tamaño), o None si el archivo no existe
+        o no se puede consultar
+    """
+    try:
+        info = os.stat(ruta)
+    except OSError:
+        return None
+    return info.st_mtime_ns, info.st_size
+
+
+class VigilanteArchivo:
+    """
+    Detecta cambios en un archivo consultando su firma.
+
+    La firma se toma al crear el vigilante, por lo que conviene crearlo
+    antes de la primera lectura: un cambio durante esa lectura se informa
+    en la consulta siguiente.
+
+    Args:
+        ruta: Archivo a vigilar
+        intervalo: Segundos entre consultas (ver esperar_cambio)
+
+    Example:
+        >>> vigilante = VigilanteArchivo("Mensualidad.xlsx")
+        >>> lectura.actualizar()
+        >>> while True:
+        ...     if vigilante.esperar_cambio(60):
+        ...         lectura.actualizar()
+    """
+
+    def __init__(self, ruta: str, intervalo: float = DEFAULT_INTERVALO) -> None:
+        if intervalo <= 0:
+            raise ValueError("El intervalo de consulta debe ser positivo")
+        self.ruta = ruta
+        self.intervalo = intervalo
+        self._vista = firma_archivo(ruta)  # Última firma consultada
+        self._informada = self._vista  # Firma del último cambio informado
+
+    def cambio(self) -> bool:
+        """
+        Consulta el archivo una vez.
+
+        Returns:
+            True si el archivo cambió desde el último cambio informado y su
+            firma no varió desde la consulta anterior
+        """
+        firma = firma_archivo(self.ruta)
+        if firma != self._vista:
+            # Todavía cambiando: confirmar en la próxima consulta
+            self._vista = firma
+            return False
+        if firma == self._informada:
+            return False
+        self._informada = firma
+        if firma is None:
+            logger.warning("El archivo vigilado ya no existe: %s", self.ruta)
+            return False
+        logger.info("Cambio detectado en %s", self.ruta)
+        return True
+
+    def esperar_cambio(self, limite: float) -> bool:
+        """
+        Consulta el archivo cada intervalo segundos hasta que cambie.
+
+        Args:
+            limite: Segundos máximos de espera
+
+        Returns:
+            True si el archivo cambió, False si se cumplió el límite
+        """
+        fin = time.monotonic() + max(0.0, limite)
+        while True:
+            if self.cambio():
+                return True
+            restante = fin - time.monotonic()
+            if restante <= 0:
+                return False
+            time.sleep(min(self.intervalo, restante))
@@ -3,30 +3,250 @@ Módulo de envío de mensajes WhatsApp.
 
 Este módulo contiene funciones para automatizar el envío de mensajes
 a través de WhatsApp Web utilizando pyautogui y pyperclip.
+
+En vez de esperar siempre DEFAULT_WAIT_TIME segundos a que cargue el chat,
+enviarMensajeWhatsApp puede recibir una sonda de disponibilidad: cualquier
+función sin argumentos que devuelva True cuando el cuadro de texto del chat
+está listo. La sonda se consulta periódicamente hasta agotar el tiempo de
+espera, y el envío continúa apenas responde True.
+
+pyautogui y el portapapeles se cargan recién en la primera acción real de
+interfaz (pegar, presionar una tecla o buscar en pantalla), de modo que
+importar este módulo no carga los backends gráficos ni requiere pantalla.
+El portapapeles (ver portapapeles.py) se crea una sola vez y se reutiliza
+en todos los mensajes del proceso.
 """
 
 import logging
+import os
 import time
 import webbrowser
-from typing import Optional
+from types import ModuleType
+from typing import Any, Callable, Dict, Optional, Tuple
 
-import pyautogui
-import pyperclip
+from .metricas import REGISTRO
+from .portapapeles import Portapapeles, PortapapelesPyperclip, crear_portapapeles
 
 logger = logging.getLogger(__name__)
 
 # Configuraciones por defecto
 DEFAULT_WAIT_TIME = 9  # Tiempo de espera para cargar WhatsApp Web
 DEFAULT_ACTION_DELAY = 1  # Delay entre acciones
+DEFAULT_POLL_INTERVAL = 0.25  # Intervalo entre consultas a la sonda
+
+# Variable de entorno con la captura del cuadro de texto del chat
+SONDA_IMAGEN_ENV = "WSP_SONDA_IMAGEN"
+
+# Sonda de disponibilidad: devuelve True cuando el chat está listo
+Sonda = Callable[[], bool]
+
+# Configuración de pyautogui, aplicada al importarlo por primera vez
+_CONFIG_PYAUTOGUI: Dict[str, Any] = {
+    "pause": 0.1,
+    "fail_safe": True,
+    "fail_safe_corner": None,
+}
+
+# Módulos de interfaz cargados bajo demanda
+_pyautogui: Optional[ModuleType] = None
+_portapapeles: Optional[Portapapeles] = None
+
+
+def _cargar_pyautogui() -> ModuleType:
+    """
+    Importa pyautogui en el primer uso y le aplica la configuración vigente.
+
+    Returns:
+        Módulo pyautogui
+    """
+    global _pyautogui
+    if _pyautogui is None:
+        import pyautogui
+
+        _pyautogui = pyautogui
+        _aplicar_configuracion()
+    return _pyautogui
+
+
+def _cargar_portapapeles() -> Portapapeles:
+    """Crea el portapapeles configurado (WSP_PORTAPAPELES) en el primer uso."""
+    global _portapapeles
+    if _portapapeles is None:
+        _portapapeles = crear_portapapeles()
+        logger.info("Usando el portapapeles %s", _portapapeles.nombre)
+    return _portapapeles
+
+
+def _copiar(texto: str) -> None:
+    """
+    Copia el texto con el portapapeles del proceso.
+
+    Si el portapapeles persistente deja de responder, se cierra y se
+    continúa con pyperclip por el resto de la ejecución.
+    """
+    global _portapapeles
+    portapapeles = _cargar_portapapeles()
+    try:
+        portapapeles.copiar(texto)
+    except RuntimeError as e:
+        if isinstance(portapapeles, PortapapelesPyperclip):
+            raise
+        logger.warning("%s; se usará pyperclip", e)
+        REGISTRO.incrementar("portapapeles_fallback_total")
+        portapapeles.cerrar()
+        _portapapeles = PortapapelesPyperclip()
+        _portapapeles.copiar(texto)
+
+
+def cerrar_portapapeles() -> None:
+    """Cierra el portapapeles del proceso, si se llegó a crear."""
+    global _portapapeles
+    if _portapapeles is not None:
+        _portapapeles.cerrar()
+        _portapapeles = None
+
+
+def _url_chat(celular: str) -> str:
+    """URL de WhatsApp Web que abre el chat de un número."""
+    return f"https://web.whatsapp.com/send?phone={celular}"
+
+
+def _registrar_fase(fase: str, inicio: float, reloj: Callable[[], float]) -> float:
+    """
+    Registra la duración de una fase del envío en el histograma de latencias.
+
+    Returns:
+        Instante actual, que sirve de inicio para la fase siguiente
+    """
+    ahora = reloj()
+    REGISTRO.observar("envio_fase_segundos", ahora - inicio, fase=fase)
+    return ahora
+
+
+class ControladorGUI:
+    """
+    Acciones de interfaz usadas para enviar un mensaje.
+
+    La implementación por defecto usa el navegador, el portapapeles del
+    proceso (ver portapapeles.py) y pyautogui.
+    Se puede reemplazar (por ejemplo con ControladorFalso de tests/dobles.py)
+    para ejecutar la lógica de envío sin pantalla.
+    """
+
+    def abrir(self, url: str) -> None:
+        """Abre una URL en el navegador."""
+        webbrowser.open(url)
+
+    def pegar(self, texto: str) -> None:
+        """Copia el texto al portapapeles y lo pega en la ventana activa."""
+        _copiar(texto)
+        _cargar_pyautogui().hotkey("ctrl", "v")
+
+    def presionar(self, tecla: str) -> None:
+        """Presiona una tecla."""
+        _cargar_pyautogui().press(tecla)
+
+    def atajo(self, *teclas: str) -> None:
+        """Presiona una combinación de teclas."""
+        _cargar_pyautogui().hotkey(*teclas)
+
+
+def esperar_listo(
+    sonda: Sonda,
+    timeout: float,
+    intervalo: float = DEFAULT_POLL_INTERVAL,
+    reloj: Callable[[], float] = time.monotonic,
+    dormir: Callable[[float], None] = time.sleep
+) -> bool:
+    """
+    Consulta una sonda hasta que indique que el chat está listo o se agote el tiempo.
+
+    Args:
+        sonda: Función que devuelve True cuando el chat está listo
+        timeout: Tiempo máximo de espera en segundos
+        intervalo: Tiempo entre consultas en segundos
+        reloj: Fuente de tiempo monotónico (reemplazable en pruebas)
+        dormir: Función de espera (reemplazable en pruebas)
+
+    Returns:
+        True si la sonda respondió True antes del timeout
+    """
+    limite = reloj() + timeout
+    while True:
+        try:
+            if sonda():
+                return True
+        except Exception as e:
+            logger.debug("Error consultando la sonda de disponibilidad: %s", e)
+
+        restante = limite - reloj()
+        if restante <= 0:
+            return False
+        dormir(min(intervalo, restante))
+
+
+def sonda_pantalla(
+    imagen: str,
+    region: Optional[Tuple[int, int, int, int]] = None,
+    confianza: Optional[float] = None
+) -> Sonda:
+    """
+    Crea una sonda que busca una imagen en pantalla con pyautogui.
+
+    Args:
+        imagen: Ruta a una captura del cuadro de texto del chat
+        region: Región (x, y, ancho, alto) donde buscar, para acelerar la búsqueda
+        confianza: Tolerancia de coincidencia (requiere opencv-python)
+
+    Returns:
+        Sonda que devuelve True cuando la imagen aparece en pantalla
+
+    Example:
+        >>> sonda = sonda_pantalla("chat_listo.png", region=(0, 600, 1920, 480))
+        >>> enviarMensajeWhatsApp("+56912345678", "Hola", sonda=sonda)
+    """
+    opciones = {}
+    if region is not None:
+        opciones["region"] = region
+    if confianza is not None:
+        opciones["confidence"] = confianza
+
+    def sonda() -> bool:
+        pyautogui = _cargar_pyautogui()
+        try:
+            return pyautogui.locateOnScreen(imagen, **opciones) is not None
+        except pyautogui.ImageNotFoundException:
+            return False
+
+    return sonda
+
+
+def sonda_desde_entorno() -> Optional[Sonda]:
+    """
+    Crea la sonda de pantalla configurada en la variable WSP_SONDA_IMAGEN.
+
+    Returns:
+        Sonda de pantalla, o None si la variable no está definida
+        (se usa entonces la espera fija)
+    """
+    imagen = os.getenv(SONDA_IMAGEN_ENV, "").strip()
+    if not imagen:
+        return None
+    logger.info("Usando sonda de disponibilidad con la imagen %s", imagen)
+    return sonda_pantalla(imagen)
 
 
 def enviarMensajeWhatsApp(
     celular: str, 
     mensaje: str,
-    wait_time: int = DEFAULT_WAIT_TIME,
-    action_delay: int = DEFAULT_ACTION_DELAY,
-    close_tab: bool = True
-) -> bool:
+    wait_time: float = DEFAULT_WAIT_TIME,
+    action_delay: float = DEFAULT_ACTION_DELAY,
+    close_tab: bool = True,
+    sonda: Optional[Sonda] = None,
+    controlador: Optional[ControladorGUI] = None,
+    reloj: Callable[[], float] = time.monotonic,
+    dormir: Callable[[float], None] = time.sleep
+) -> Optional[bool]:
     """
     Envía un mensaje a través de WhatsApp Web.
     
@@ -37,11 +257,20 @@ def enviarMensajeWhatsApp(
         celular: Número de teléfono con formato internacional (ej: +56912345678)
         mensaje: Texto del mensaje a enviar
         wait_time: Tiempo de espera en segundos para que cargue WhatsApp Web
+            (tiempo máximo de espera si se usa una sonda)
         action_delay: Tiempo de espera entre acciones automatizadas
-        close_tab: Si True, cierra la pestaña después del envío
+        close_tab: Si True, cierra la pestaña después del envío. Si el envío
+            falla, la pestaña abierta se cierra siempre
+        sonda: Sonda de disponibilidad del chat. Si es None se espera
+            wait_time segundos fijos
+        controlador: Acciones de interfaz a usar (por defecto ControladorGUI)
+        reloj: Fuente de tiempo monotónico (reemplazable en pruebas)
+        dormir: Función de espera (reemplazable en pruebas)
         
     Returns:
-        True si el envío fue exitoso, False en caso contrario
+        True si el envío fue exitoso (aunque después falle el cierre de la
+        pestaña), False si falló antes de enviar el mensaje y None si falló
+        al presionar Enter, cuando no se sabe si el mensaje salió
         
     Raises:
         Registra errores en el logger pero no lanza excepciones
@@ -55,6 +284,8 @@ def enviarMensajeWhatsApp(
         >>> enviarMensajeWhatsApp("+56912345678", "Hola, este es un mensaje de prueba")
         True
     """
+    gui = controlador or ControladorGUI()
+    pestana_abierta = presionando_enter = enviado = False
     try:
         logger.info("Iniciando envío de mensaje a %s", celular)
         
@@ -64,39 +295,254 @@ def enviarMensajeWhatsApp(
             return False
         
         # Construir URL de WhatsApp Web
-        url = f"https://web.whatsapp.com/send?phone={celular}"
+        url = _url_chat(celular)
         logger.debug("Abriendo URL: %s", url)
         
         # Abrir WhatsApp Web con el número de teléfono
-        webbrowser.open(url)
+        inicio = reloj()
+        gui.abrir(url)
+        pestana_abierta = True
         
         # Esperar a que cargue WhatsApp Web
-        logger.debug("Esperando %d segundos para que cargue WhatsApp Web", wait_time)
-        time.sleep(wait_time)
+        if sonda is None:
+            logger.debug("Esperando %.1f segundos para que cargue WhatsApp Web",
+                         wait_time)
+            dormir(wait_time)
+        elif not esperar_listo(sonda, wait_time, reloj=reloj, dormir=dormir):
+            logger.error("El chat de %s no estuvo listo en %.1f segundos",
+                         celular, wait_time)
+            REGISTRO.incrementar("chat_no_listo_total")
+            _cerrar_pestana(gui)
+            return False
+        inicio = _registrar_fase("carga_pagina", inicio, reloj)
         
         # Copiar mensaje al portapapeles y pegarlo
         logger.debug("Copiando mensaje al portapapeles y pegando")
-        pyperclip.copy(mensaje)
-        pyautogui.hotkey("ctrl", "v")
-        time.sleep(action_delay)
+        gui.pegar(mensaje)
+        dormir(action_delay)
+        inicio = _registrar_fase("pegado", inicio, reloj)
         
-        # Enviar mensaje (presionar Enter)
+        # Enviar mensaje (presionar Enter): desde aquí el mensaje pudo
+        # haber salido y un error ya no permite reintentarlo
         logger.debug("Enviando mensaje")
-        pyautogui.press("enter")
-        time.sleep(action_delay)
+        presionando_enter = True
+        gui.presionar("enter")
+        enviado = True
+        dormir(action_delay)
+        inicio = _registrar_fase("enter", inicio, reloj)
         
         # Cerrar pestaña si está configurado
         if close_tab:
             logger.debug("Cerrando pestaña de WhatsApp Web")
-            pyautogui.hotkey('ctrl', 'w')
-            time.sleep(action_delay)
+            gui.atajo('ctrl', 'w')
+            dormir(action_delay)
+            _registrar_fase("cierre", inicio, reloj)
         
         logger.info("Mensaje enviado exitosamente a %s", celular)
         return True
         
     except Exception as e:
-        logger.error("Error enviando mensaje a %s: %s", celular, e)
-        return False
+        if enviado:
+            logger.warning("Mensaje enviado a %s, pero falló el cierre del envío: %s",
+                           celular, e)
+            return True
+        if presionando_enter:
+            logger.error("Error al presionar Enter en el chat de %s, no se sabe si el "
+                         "mensaje salió: %s", celular, e)
+        else:
+            logger.error("Error enviando mensaje a %s: %s", celular, e)
+        if pestana_abierta:
+            _cerrar_pestana(gui)
+        return None if presionando_enter else False
+
+
+def _cerrar_pestana(gui: ControladorGUI) -> None:
+    """Cierra la pestaña de un envío fallido, sin interrumpir si no se puede."""
+    try:
+        gui.atajo('ctrl', 'w')
+    except Exception as e:
+        logger.warning("No se pudo cerrar la pestaña de WhatsApp Web: %s", e)
+
+
+class SesionWhatsApp:
+    """
+    Emisor que mantiene una sola pestaña de WhatsApp Web abierta.
+    
+    El primer mensaje abre WhatsApp Web con la URL del contacto y deja la
+    pestaña abierta. Los siguientes cierran el chat actual y llevan esa
+    misma pestaña a la URL del contacto siguiente, sin abrir ni cerrar
+    pestañas. Se usa la URL y no la búsqueda de "Nuevo chat" porque la
+    URL solo puede abrir el chat de ese número: la búsqueda puede abrir
+    otro contacto que coincida, o dejar abierto el chat anterior si no
+    encuentra el número.
+    
+    Si el cambio de chat falla (la sonda no detecta el chat listo a tiempo
+    o una acción lanza una excepción), el mensaje se envía con
+    enviarMensajeWhatsApp abriendo y cerrando una pestaña como siempre, y
+    la siguiente llamada vuelve a abrir la sesión.
+    
+    Note:
+        Sin sonda no es posible detectar un cambio de chat fallido, y el
+        mensaje podría pegarse en el chat equivocado: sin sonda cada
+        mensaje se envía abriendo su propia pestaña con la URL del contacto.
+    
+    Example:
+        >>> sesion = SesionWhatsApp(sonda=sonda_desde_entorno())
+        >>> sesion.enviar("+56912345678", "Hola")
+        True
+        >>> sesion.cerrar()
+    """
+    
+    def __init__(
+        self,
+        sonda: Optional[Sonda] = None,
+        wait_time: float = DEFAULT_WAIT_TIME,
+        action_delay: float = DEFAULT_ACTION_DELAY,
+        controlador: Optional[ControladorGUI] = None,
+        reloj: Callable[[], float] = time.monotonic,
+        dormir: Callable[[float], None] = time.sleep
+    ) -> None:
+        """
+        Args:
+            sonda: Sonda de disponibilidad del chat
+            wait_time: Tiempo máximo de espera por la carga inicial o un cambio de chat
+            action_delay: Tiempo de espera entre acciones automatizadas
+            controlador: Acciones de interfaz a usar (por defecto ControladorGUI)
+            reloj: Fuente de tiempo monotónico (reemplazable en pruebas)
+            dormir: Función de espera (reemplazable en pruebas)
+        """
+        self.sonda = sonda
+        self.wait_time = wait_time
+        self.action_delay = action_delay
+        self.controlador = controlador or ControladorGUI()
+        self.reloj = reloj
+        self.dormir = dormir
+        self.abierta = False
+        if sonda is None:
+            logger.warning("Sesión de WhatsApp Web sin sonda (%s): no se puede verificar "
+                           "el cambio de chat, se abrirá una pestaña por mensaje",
+                           SONDA_IMAGEN_ENV)
+    
+    def _enviar_directo(self, celular: str, mensaje: str, close_tab: bool) -> Optional[bool]:
+        """Envía abriendo WhatsApp Web con la URL del contacto."""
+        return enviarMensajeWhatsApp(
+            celular,
+            mensaje,
+            wait_time=self.wait_time,
+            action_delay=self.action_delay,
+            close_tab=close_tab,
+            sonda=self.sonda,
+            controlador=self.controlador,
+            reloj=self.reloj,
+            dormir=self.dormir
+        )
+    
+    def _cambiar_chat(self, celular: str) -> bool:
+        """
+        Abre el chat de un número dentro de la pestaña de la sesión.
+        
+        Returns:
+            True si el chat del número quedó listo para escribir
+        """
+        gui = self.controlador
+        
+        # Cerrar el chat actual y confirmar que se cerró: así, si la
+        # navegación no abre el nuevo, la sonda no encuentra un cuadro de
+        # texto y no se pega nada en el chat anterior
+        gui.presionar("esc")
+        self.dormir(self.action_delay)
+        try:
+            cerrado = not self.sonda()
+        except Exception as e:
+            logger.debug("Error consultando la sonda de disponibilidad: %s", e)
+            cerrado = False
+        if not cerrado:
+            logger.warning("El chat anterior sigue abierto, no se puede cambiar a %s",
+                           celular)
+            return False
+        
+        # Llevar la pestaña a la URL del número, que solo abre su chat
+        gui.atajo("ctrl", "l")
+        self.dormir(self.action_delay)
+        gui.pegar(_url_chat(celular))
+        gui.presionar("enter")
+        
+        return esperar_listo(
+            self.sonda, self.wait_time, reloj=self.reloj, dormir=self.dormir
+        )
+    
+    def enviar(self, celular: str, mensaje: str) -> Optional[bool]:
+        """
+        Envía un mensaje reutilizando la pestaña de la sesión.
+        
+        Args:
+            celular: Número de teléfono con formato internacional (ej: +56912345678)
+            mensaje: Texto del mensaje a enviar
+            
+        Returns:
+            True si el envío fue exitoso, False si falló y None si no se sabe
+            si el mensaje salió (ver enviarMensajeWhatsApp)
+        """
+        if not celular or not mensaje:
+            logger.error("Número de teléfono o mensaje vacío")
+            return False
+        
+        # Sin sonda no se puede confirmar que se abrió el chat correcto
+        if self.sonda is None:
+            return self._enviar_directo(celular, mensaje, close_tab=True)
+        
+        # Primer envío: cargar WhatsApp Web una sola vez y dejar la pestaña abierta
+        if not self.abierta:
+            resultado = self._enviar_directo(celular, mensaje, close_tab=False)
+            self.abierta = resultado is True
+            return resultado
+        
+        presionando_enter = enviado = False
+        try:
+            logger.info("Cambiando al chat de %s dentro de la sesión", celular)
+            inicio = self.reloj()
+            if self._cambiar_chat(celular):
+                inicio = _registrar_fase("cambio_chat", inicio, self.reloj)
+                self.controlador.pegar(mensaje)
+                self.dormir(self.action_delay)
+                inicio = _registrar_fase("pegado", inicio, self.reloj)
+                presionando_enter = True
+                self.controlador.presionar("enter")
+                enviado = True
+                self.dormir(self.action_delay)
+                _registrar_fase("enter", inicio, self.reloj)
+                logger.info("Mensaje enviado exitosamente a %s", celular)
+                return True
+            REGISTRO.incrementar("chat_no_listo_total")
+            logger.warning("No se pudo abrir el chat de %s en la sesión", celular)
+        except Exception as e:
+            # Tras presionar Enter el mensaje pudo haber salido: no se reenvía
+            if enviado:
+                logger.warning("Mensaje enviado a %s, pero falló la sesión después: %s",
+                               celular, e)
+                return True
+            if presionando_enter:
+                logger.error("Error al presionar Enter en el chat de %s, no se sabe si el "
+                             "mensaje salió: %s", celular, e)
+                self.cerrar()
+                return None
+            logger.warning("Error en la sesión de WhatsApp Web: %s", e)
+        
+        # Alternativa: cerrar la sesión y enviar abriendo una pestaña nueva
+        logger.info("Reintentando envío a %s en una pestaña nueva", celular)
+        self.cerrar()
+        return self._enviar_directo(celular, mensaje, close_tab=True)
+    
+    def cerrar(self) -> None:
+        """Cierra la pestaña de la sesión si está abierta."""
+        if not self.abierta:
+            return
+        self.abierta = False
+        try:
+            self.controlador.atajo('ctrl', 'w')
+            self.dormir(self.action_delay)
+        except Exception as e:
+            logger.warning("No se pudo cerrar la pestaña de la sesión: %s", e)
 
 
 def configurar_pyautogui(
@@ -107,6 +553,9 @@ def configurar_pyautogui(
     """
     Configura pyautogui con opciones de seguridad.
     
+    Si pyautogui todavía no se importó, la configuración se guarda y se
+    aplica en el primer envío, sin cargar los backends gráficos ahora.
+    
     Args:
         pause: Pausa entre acciones de pyautogui (en segundos)
         fail_safe: Si True, mover el mouse a la esquina superior izquierda cancela la automatización
@@ -115,14 +564,21 @@ def configurar_pyautogui(
     Example:
         >>> configurar_pyautogui(pause=0.5, fail_safe=True)
     """
-    pyautogui.PAUSE = pause
-    pyautogui.FAILSAFE = fail_safe
-    
-    if fail_safe_corner:
-        pyautogui.FAILSAFE_POINTS = [fail_safe_corner]
-    
-    logger.info("pyautogui configurado: pause=%.2f, failsafe=%s", pause, fail_safe)
+    _CONFIG_PYAUTOGUI.update(
+        pause=pause, fail_safe=fail_safe, fail_safe_corner=fail_safe_corner
+    )
+    if _pyautogui is not None:
+        _aplicar_configuracion()
 
 
-# Configurar pyautogui con valores seguros por defecto
-configurar_pyautogui()
\ No newline at end of file
+def _aplicar_configuracion() -> None:
+    """Aplica _CONFIG_PYAUTOGUI al módulo pyautogui ya importado."""
+    pyautogui = _pyautogui
+    pyautogui.PAUSE = _CONFIG_PYAUTOGUI["pause"]
+    pyautogui.FAILSAFE = _CONFIG_PYAUTOGUI["fail_safe"]
+    
+    if _CONFIG_PYAUTOGUI["fail_safe_corner"]:
+        pyautogui.FAILSAFE_POINTS = [_CONFIG_PYAUTOGUI["fail_safe_corner"]]
+    
+    logger.info("pyautogui configurado: pause=%.2f, failsafe=%s",
+                pyautogui.PAUSE, pyautogui.FAILSAFE)